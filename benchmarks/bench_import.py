@@ -0,0 +1,88 @@
+"""
+Measures the cost of importing the driver modules and checks that importing them does no VISA I/O.
+
+Each module is imported in a fresh interpreter. The check fails if the import loaded pyvisa or created a resource
+manager, which would mean a VISA backend load (and possibly a bus scan) happens at import time, or if it pulled in
+tkinter or colorama, which the command line tool must not pay for.
+The cold start of a whole CLI call (interpreter start, imports and a snapshot from the simulator) is timed too and
+checked against its own budget.
+Prints one JSON object with the results and exits non-zero if a check fails or a budget is exceeded.
+
+Usage: python benchmarks/bench_import.py [--repeat 5] [--budget-ms 150] [--cli-budget-ms 250]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'modules')
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import visa_backend
+print(elapsed, 'pyvisa' in sys.modules, visa_backend._resource_manager is not None,
+      'tkinter' in sys.modules or 'colorama' in sys.modules)
+"""
+CLI_COMMAND = ["dp832_cli.py", "--backend", "sim", "snapshot", "USB0::0x1AB1::0x0E11::DP8SIM0000001::INSTR"]
+
+
+def measure(module: str, repeat: int) -> dict:
+    timings = []
+    loaded_pyvisa = False
+    created_resource_manager = False
+    loaded_ui = False
+
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=MODULES_DIR,
+                                capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(output[0]))
+        loaded_pyvisa |= output[1] == "True"
+        created_resource_manager |= output[2] == "True"
+        loaded_ui |= output[3] == "True"
+
+    timings.sort()
+    return {
+        "median_ms": timings[len(timings) // 2] * 1e3,
+        "min_ms": timings[0] * 1e3,
+        "loaded_pyvisa": loaded_pyvisa,
+        "created_resource_manager": created_resource_manager,
+        "loaded_tkinter_or_colorama": loaded_ui,
+    }
+
+
+def measure_cli(repeat: int) -> dict:
+    """ Wall time of complete CLI calls in fresh interpreters, what a script or CI job pays per call. """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + CLI_COMMAND, cwd=MODULES_DIR, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {"command": " ".join(CLI_COMMAND), "median_ms": timings[len(timings) // 2] * 1e3, "min_ms": timings[0] * 1e3}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--cli-budget-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.repeat) for module in ["dp832", "find_instrument", "dp832_cli"]}
+    cli = measure_cli(args.repeat)
+    print(json.dumps(dict(results, cli_cold_start=cli), indent=2))
+
+    failed = [module for module, result in results.items()
+              if result["loaded_pyvisa"] or result["created_resource_manager"] or result["median_ms"] > args.budget_ms
+              or (module == "dp832_cli" and result["loaded_tkinter_or_colorama"])]
+    if cli["median_ms"] > args.cli_budget_ms:
+        failed.append("dp832_cli cold start")
+    if failed:
+        print(f"Import check failed for: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,76 @@
+"""
+Compares the old open/close-per-call access pattern against a persistent DP832Session.
+
+Runs against a simulated instrument whose open, close and query costs are set on the command line, so the numbers
+reflect the access pattern and not the bench hardware. Prints one JSON object with the results.
+
+Usage: python benchmarks/bench_session.py [--calls 200] [--open-ms 20] [--close-ms 5] [--query-ms 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'modules'))
+
+import dp832
+from dp832_simulator import SimulatedDP832, SimulatedResource
+
+RESOURCE = "USB0::0x1AB1::0x0E11::DP8SIM0000001::INSTR"
+
+
+class SlowClosingResource(SimulatedResource):
+    """ Simulated resource with a fixed cost for closing the VISA session. """
+
+    def __init__(self, instrument: SimulatedDP832, close_s: float):
+        super().__init__(instrument, RESOURCE)
+        self.close_s = close_s
+
+    def close(self):
+        time.sleep(self.close_s)
+        super().close()
+
+
+def run(calls: int, open_s: float, close_s: float, query_s: float) -> dict:
+    instrument = SimulatedDP832(transfer_latency=query_s)
+
+    def open_resource():
+        time.sleep(open_s)
+        return SlowClosingResource(instrument, close_s)
+
+    # old behaviour: every call opens the resource, does its queries and closes it again
+    start = time.perf_counter()
+    for _ in range(calls):
+        with dp832.DP832Session(RESOURCE, resource=open_resource()) as session:
+            session.measure_all([1])
+        with dp832.DP832Session(RESOURCE, resource=open_resource()) as session:
+            session.get_regulation_mode([1])
+    per_call_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with dp832.DP832Session(RESOURCE, resource=open_resource()) as session:
+        for _ in range(calls):
+            session.measure_all([1])
+            session.get_regulation_mode([1])
+    persistent_elapsed = time.perf_counter() - start
+
+    return {
+        "calls": calls * 2,
+        "open_close_per_call_s": per_call_elapsed,
+        "persistent_session_s": persistent_elapsed,
+        "open_close_per_call_us_per_call": per_call_elapsed / (calls * 2) * 1e6,
+        "persistent_session_us_per_call": persistent_elapsed / (calls * 2) * 1e6,
+        "speedup": per_call_elapsed / persistent_elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--open-ms", type=float, default=20.0)
+    parser.add_argument("--close-ms", type=float, default=5.0)
+    parser.add_argument("--query-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.calls, args.open_ms / 1e3, args.close_ms / 1e3, args.query_ms / 1e3), indent=2))
@@ -0,0 +1,191 @@
+"""
+Benchmark suite for the driver, the acquisition loop and GUI startup, run against the simulated DP832.
+
+Reports:
+- per-call latency and throughput of every dp832.py function
+- sustained samples per second of the acquisition engine with one, two and three channels enabled
+- time-to-first-frame of PowerSupplyControl (skipped when no display is available)
+
+Results are written as JSON. Pass --compare with an earlier result file to flag regressions.
+
+Usage: python benchmarks/bench_suite.py [--latency-ms 1] [--calls 50] [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(1, ROOT)
+sys.path.insert(1, os.path.join(ROOT, 'modules'))
+
+import dp832
+import visa_backend
+from acquisition import AcquisitionEngine
+from dp832_simulator import SimulatedDP832, SimulatedResourceManager
+
+RESOURCE = "USB0::0x1AB1::0x0E11::DP8SIM0000001::INSTR"
+
+# function name -> arguments after the resource string
+DRIVER_CALLS = {
+    "set_channel_output_state": ([1], "ON"),
+    "set_ovp_state": ([1], "ON"),
+    "set_ocp_state": ([1], "ON"),
+    "get_channel_settings": ([1, 2, 3],),
+    "get_ocp_status": ([1],),
+    "get_ovp_status": ([1],),
+    "get_regulation_mode": ([1],),
+    "get_output_state": ([1],),
+    "configure_voltage": ([1], 5.0),
+    "configure_current": ([1], 0.5),
+    "configure_voltage_limit": ([1], 10.0),
+    "configure_current_limit": ([1], 1.0),
+    "configure_channel_static": ([1], 5.0, 0.5),
+    "measure_output_voltage": ([1],),
+    "measure_output_current": ([1],),
+    "measure_output_power": ([1],),
+    "measure_all": ([1, 2, 3],),
+    "snapshot": ([1, 2, 3],),
+}
+
+
+def setup_simulator(latency_s: float, jitter_s: float) -> SimulatedDP832:
+    instrument = SimulatedDP832(transfer_latency=latency_s, jitter=jitter_s)
+    for channel in (1, 2, 3):
+        instrument.set_load(channel, 10.0)
+    dp832.close_all_sessions()
+    visa_backend.use_resource_manager(SimulatedResourceManager({RESOURCE: instrument}))
+    return instrument
+
+
+def summarize(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "calls": len(timings),
+        "mean_ms": statistics.fmean(timings) * 1e3,
+        "median_ms": timings[len(timings) // 2] * 1e3,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e3,
+        "calls_per_s": len(timings) / sum(timings) if sum(timings) else None,
+    }
+
+
+def bench_driver(instrument: SimulatedDP832, calls: int) -> dict:
+    results = {}
+    for name, arguments in DRIVER_CALLS.items():
+        function = getattr(dp832, name)
+        timings = []
+        transfers_before = instrument.transfer_count
+        for _ in range(calls):
+            start = time.perf_counter()
+            function(RESOURCE, *arguments)
+            timings.append(time.perf_counter() - start)
+        transfers_per_call = (instrument.transfer_count - transfers_before) / calls
+        results[name] = dict(summarize(timings), transfers_per_call=transfers_per_call)
+    return results
+
+
+def bench_acquisition(duration: float) -> dict:
+    results = {}
+    for channel_count in (1, 2, 3):
+        engine = AcquisitionEngine(RESOURCE)
+        for channel in range(1, channel_count + 1):
+            engine.enable_channel(channel)
+
+        cycles = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            engine.poll_once()
+            cycles += 1
+        elapsed = time.perf_counter() - start
+
+        results[f"{channel_count}_channels"] = {
+            "cycles_per_s": cycles / elapsed,
+            "samples_per_s": cycles * channel_count / elapsed,
+        }
+    return results
+
+
+def bench_startup() -> dict:
+    try:
+        import tkinter
+        import dp832_interface
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    start = time.perf_counter()
+    try:
+        app = dp832_interface.PowerSupplyControl(RESOURCE)
+    except tkinter.TclError as e:
+        return {"skipped": f"no display: {e}"}
+
+    try:
+        app.update()
+        return {"time_to_first_frame_ms": (time.perf_counter() - start) * 1e3}
+    finally:
+        app.on_close()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """ Returns a description of every timing that got slower than the baseline by more than the threshold. """
+    regressions = []
+
+    for name, entry in results["driver"].items():
+        old = baseline.get("driver", {}).get(name)
+        if old and entry["median_ms"] > old["median_ms"] * (1 + threshold):
+            regressions.append(f"driver.{name}: median {old['median_ms']:.3f} -> {entry['median_ms']:.3f} ms")
+
+    for name, entry in results["acquisition"].items():
+        old = baseline.get("acquisition", {}).get(name)
+        if old and entry["samples_per_s"] < old["samples_per_s"] * (1 - threshold):
+            regressions.append(f"acquisition.{name}: {old['samples_per_s']:.1f} -> {entry['samples_per_s']:.1f} "
+                               f"samples/s")
+
+    old = baseline.get("startup", {}).get("time_to_first_frame_ms")
+    new = results["startup"].get("time_to_first_frame_ms")
+    if old and new and new > old * (1 + threshold):
+        regressions.append(f"startup: {old:.1f} -> {new:.1f} ms to first frame")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated delay per transfer")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Simulated random extra delay per transfer")
+    parser.add_argument("--calls", type=int, default=50, help="Calls per driver function")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds per acquisition measurement")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    simulated_psu = setup_simulator(args.latency_ms / 1e3, args.jitter_ms / 1e3)
+    suite_results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+        },
+        "driver": bench_driver(simulated_psu, args.calls),
+        "acquisition": bench_acquisition(args.duration),
+        "startup": bench_startup(),
+    }
+    dp832.close_all_sessions()
+
+    output = json.dumps(suite_results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            found = compare(suite_results, json.load(baseline_file), args.threshold)
+        for regression in found:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
@@ -1,21 +1,161 @@
 import tkinter as tk
 from tkinter import messagebox
-from threading import Thread
+from threading import Thread, Lock
+from collections import deque
 import os
 import sys
-import time
 
 # Adjust the sys.path to include the dp832 and find_instrument modules
 path = os.path.join('..', '..', 'python-flexsollib.git', '.')
 p = os.path.abspath(path)
 sys.path.insert(1, p)
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
 
 import dp832
 import find_instrument  # Import the module that contains find_devices_by_pattern
+from acquisition import AcquisitionEngine
+from dp832_daemon import DaemonAcquisitionEngine, is_daemon_address
+from rate_policy import AdaptiveRatePolicy
+
+
+class TrendPlot(tk.Canvas):
+    """
+    Scrolling V/I/P strip chart fed from a history.MeasurementHistory.
+
+    Every pixel column covers span / width seconds and is drawn as one vertical line per trace from the minimum to
+    the maximum value that fell into it, so the number of canvas items is bounded by the width no matter how many
+    samples there are. refresh() only reads the samples that arrived since the last call: it extends the newest
+    column, or scrolls the existing items left and adds new columns, without redrawing the rest.
+    """
+
+    TRACES = ("voltage", "current", "power")
+
+    def __init__(self, master, history, colors, full_scale, span=600, width=240, height=80):
+        super().__init__(master, width=width, height=height, bg="black", highlightthickness=0)
+
+        self.history = history
+        self.colors = colors  # trace -> color
+        self.full_scale = full_scale  # trace -> value drawn at the top edge
+        self.plot_width = width
+        self.plot_height = height
+        self.seconds_per_pixel = span / width
+
+        # (column index, {trace: [minimum, maximum, canvas item, last value]}), oldest first
+        self._columns = deque()
+        self._last_values = None  # last sample of the previous column, joins neighbouring columns
+        self._last_timestamp = None
+
+    def _y(self, trace, value):
+        fraction = min(max(value / self.full_scale[trace], 0.0), 1.0)
+        return (self.plot_height - 1) * (1.0 - fraction)
+
+    def _draw_column(self, x, trace, entry):
+        y_top, y_bottom = self._y(trace, entry[1]), self._y(trace, entry[0])
+        if entry[2] is None:
+            entry[2] = self.create_line(x, y_top, x, y_bottom + 1, fill=self.colors[trace], tags="trace")
+        else:
+            self.coords(entry[2], x, y_top, x, y_bottom + 1)
+
+    def _scroll_to(self, column):
+        shift = column - self._columns[-1][0]
+        if shift >= self.plot_width:
+            self.clear()
+            return
+
+        self.move("trace", -shift, 0)
+        while self._columns and self._columns[0][0] <= column - self.plot_width:
+            for entry in self._columns.popleft()[1].values():
+                self.delete(entry[2])
+
+    def clear(self):
+        self.delete("trace")
+        self._columns.clear()
+        self._last_values = None
+
+    def _add_sample(self, timestamp, values):
+        column = int(timestamp / self.seconds_per_pixel)
+
+        if self._columns and column > self._columns[-1][0]:
+            self._last_values = {trace: self._columns[-1][1][trace][3] for trace in self.TRACES}
+            self._scroll_to(column)
+
+        if not self._columns or column > self._columns[-1][0]:
+            # start the new column at the previous sample so consecutive columns connect
+            previous = self._last_values or values
+            self._columns.append((column, {trace: [min(previous[trace], values[trace]),
+                                                   max(previous[trace], values[trace]), None, values[trace]]
+                                           for trace in self.TRACES}))
+        else:
+            for trace, entry in self._columns[-1][1].items():
+                entry[0] = min(entry[0], values[trace])
+                entry[1] = max(entry[1], values[trace])
+                entry[3] = values[trace]
+
+        for trace, entry in self._columns[-1][1].items():
+            self._draw_column(self.plot_width - 1, trace, entry)
+
+    def refresh(self):
+        """ Draws the samples appended to the history since the last refresh. """
+        for segment in self.history.window(start_time=self._last_timestamp):
+            for timestamp, voltage, current, power in zip(segment.timestamps, segment.voltage, segment.current,
+                                                          segment.power):
+                if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+                    continue
+                self._add_sample(timestamp, {"voltage": voltage, "current": current, "power": power})
+                self._last_timestamp = timestamp
+
+
+class UIUpdateQueue:
+    """
+    Coalesces UI updates posted from worker threads and applies them on the Tk main loop at a capped frame rate.
+
+    post() only records the newest update per key, so a burst of snapshots for one channel costs one redraw per frame
+    instead of one after() callback each. configure() skips config() calls that wouldn't change anything.
+
+    Parameters:
+    root: The Tk widget whose main loop applies the updates.
+    max_fps (float): Upper bound on frames per second.
+    """
+
+    def __init__(self, root, max_fps=20):
+        self.root = root
+        self.frame_interval_ms = max(1, int(1000 / max_fps))
+        self._pending = {}  # key -> (callback, args), insertion ordered
+        self._lock = Lock()
+        self._applied = {}  # (widget, option) -> last value set through configure()
+        self._after_id = self.root.after(self.frame_interval_ms, self._flush)
+
+    def post(self, key, callback, *args):
+        """ Schedules callback(*args) for the next frame, replacing a still pending update with the same key. """
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = (callback, args)
+
+    def configure(self, widget, **options):
+        """ widget.config(**options), leaving out the options that already have the given value. """
+        changed = {name: value for name, value in options.items() if self._applied.get((widget, name)) != value}
+        if changed:
+            widget.config(**changed)
+            for name, value in changed.items():
+                self._applied[(widget, name)] = value
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for callback, args in pending.values():
+            try:
+                callback(*args)
+            except tk.TclError:
+                pass  # widget destroyed in the meantime
+        self._after_id = self.root.after(self.frame_interval_ms, self._flush)
+
+    def stop(self):
+        self.root.after_cancel(self._after_id)
 
 
 class ChannelFrame(tk.Frame):
-    def __init__(self, master, channel_number, color, voltage_range, current_range, instrument):
+    def __init__(self, master, channel_number, color, voltage_range, current_range, instrument, acquisition_engine,
+                 ui_updates=None):
         super().__init__(master, bg="black", padx=10, pady=10)
 
         self.color = color
@@ -26,12 +166,14 @@ class ChannelFrame(tk.Frame):
         self.channel_enabled = False
         self.voltage_limit_enabled = False
         self.current_limit_enabled = False
-        self.refresh_rate = 2
-        self.refresh_thread = None
-        self.refresh_active = False
 
-        self.ovp_ocp_monitor_thread = None
-        self.monitor_ovp_ocp = False  # Flag to indicate if we should monitor OVP/OCP
+        # Updates from worker threads are applied once per display frame, shared by all channels of a window
+        self.ui_updates = ui_updates if ui_updates is not None else UIUpdateQueue(self)
+
+        # Measurements and OVP/OCP alarms come from the instrument-wide acquisition engine
+        self.acquisition_engine = acquisition_engine
+        self.acquisition_engine.subscribe(channel_number, self.on_snapshot, self.on_acquisition_error)
+        self.acquisition_engine.subscribe_events(self.on_protection_event)
 
         # Full row background label (Row 1)
         self.row_1_full_bg = tk.Frame(self, bg="black", height=30)
@@ -68,6 +210,21 @@ class ChannelFrame(tk.Frame):
         # Row 5: Set and Limit Table
         self.create_set_limit_table()
 
+        # Row 7: V/I/P trend, voltage in the channel color
+        self.trend_plot = TrendPlot(
+            self, acquisition_engine.history[channel_number],
+            colors={"voltage": color, "current": "white", "power": "gray50"},
+            full_scale={"voltage": voltage_range[1], "current": current_range[1],
+                        "power": voltage_range[1] * current_range[1]}
+        )
+        self.trend_plot.grid(row=7, column=0, columnspan=4, padx=10, pady=(0, 5))
+
+        # Row 8: energy, charge, CV/CC time and I/P statistics since the last reset
+        self.statistics = acquisition_engine.statistics[channel_number]
+        self.statistics_label = tk.Label(self, text=self.format_statistics(self.statistics.summary()),
+                                         font=("Courier", 10), fg="gray70", bg="black", justify="left")
+        self.statistics_label.grid(row=8, column=0, columnspan=4, sticky="w", padx=10)
+
     def initialize_from_settings(self, settings):
         """ Initialize channel labels with the given settings. """
         self.set_voltage_label.config(text=f"{settings['voltage']:06.3f} V")
@@ -82,6 +239,27 @@ class ChannelFrame(tk.Frame):
             self.update_channel_state()
             self.start_refresh()
 
+    def apply_settings(self, settings):
+        """ Follow settings that were changed on the instrument itself, e.g. on the front panel. """
+        self.set_voltage_label.config(text=f"{settings['voltage']:06.3f} V")
+        self.set_current_label.config(text=f"{settings['current']:.3f} A")
+        self.voltage_limit_label.config(text=f"{settings['voltage_limit']:06.3f} V")
+        self.current_limit_label.config(text=f"{settings['current_limit']:.3f} A")
+
+        self.voltage_limit_enabled = settings['ovp_enabled']
+        self.current_limit_enabled = settings['ocp_enabled']
+        self.update_voltage_limit()
+        self.update_current_limit()
+
+        if settings['output'] != self.channel_enabled:
+            self.channel_enabled = settings['output']
+            self.update_channel_state()
+            if self.channel_enabled:
+                self.start_refresh()
+            else:
+                self.stop_refresh()
+        self.update_button_state()
+
     def create_set_limit_table(self):
         table_frame = tk.Frame(self, bg="black")
         table_frame.grid(row=6, column=0, columnspan=4, padx=10, pady=10)
@@ -128,45 +306,59 @@ class ChannelFrame(tk.Frame):
         set_button.grid(row=row, column=col + 2, padx=2, pady=2)
 
     def start_refresh(self):
-        if not self.refresh_active:
-            self.refresh_active = True
-            self.refresh_thread = Thread(target=self.refresh_loop)
-            self.refresh_thread.start()
+        self.acquisition_engine.enable_channel(self.channel_number)
 
     def stop_refresh(self):
-        self.refresh_active = False
-        self.monitor_ovp_ocp = False  # Stop monitoring OVP/OCP
-
-        if self.refresh_thread:
-            self.refresh_thread.join()
-
-        if self.ovp_ocp_monitor_thread:
-            self.ovp_ocp_monitor_thread.join()
-
-    def refresh_loop(self):
-        while self.refresh_active:
-            try:
-                measurements = dp832.measure_all(self.instrument, [self.channel_number])
-                voltage = measurements[self.channel_number]['voltage']
-                current = measurements[self.channel_number]['current']
-                power = measurements[self.channel_number]['power']
-
-                # Query regulation mode
-                regulation_mode = dp832.get_regulation_mode(self.instrument, [self.channel_number])
-                reg_mode = regulation_mode[f'CH{self.channel_number}']
-
-                # Safely update the UI in the main thread
-                self.after(0, self.update_measurements, voltage, current, power, reg_mode)
-
-            except Exception as e:
-                self.after(0, self.display_error, str(e))
-            time.sleep(1 / self.refresh_rate)
+        self.acquisition_engine.disable_channel(self.channel_number)
+
+    def on_snapshot(self, snapshot):
+        """ Called from the acquisition thread with this channel's latest dp832.ChannelSnapshot. """
+        # Only the newest snapshot per frame reaches the main thread
+        self.ui_updates.post(("measurements", self), self.update_measurements, snapshot.voltage, snapshot.current,
+                             snapshot.power, snapshot.regulation_mode)
+
+        # one message for both alarms, two posts under the same key would coalesce into the last one
+        tripped = [name for name, enabled, alarm in (("OVP", self.voltage_limit_enabled, snapshot.ovp_tripped),
+                                                     ("OCP", self.current_limit_enabled, snapshot.ocp_tripped))
+                   if enabled and alarm]
+        if tripped:
+            self.ui_updates.post(("error", self), self.display_error,
+                                 f"{' and '.join(tripped)} triggered for CH {self.channel_number}")
+
+    def on_protection_event(self, event):
+        """ Called from the protection monitor thread with every protection.ProtectionEvent of the instrument. """
+        # trips show up here within a monitor interval, the snapshot that follows right away updates the readings
+        if event.channel == self.channel_number and event.kind in ("ovp", "ocp"):
+            self.ui_updates.post(("error", self), self.display_error,
+                                 f"{event.kind.upper()} triggered for CH {self.channel_number}")
+
+    def on_acquisition_error(self, message):
+        self.ui_updates.post(("error", self), self.display_error, message)
 
     def update_measurements(self, voltage, current, power, reg_mode):
-        self.voltage_display.config(text=f"{voltage:06.3f} V")
-        self.current_display.config(text=f"{current:.3f} A")
-        self.power_display.config(text=f"{power:.3f} W")
-        self.row_1_label_right.config(text=reg_mode)
+        self.ui_updates.configure(self.voltage_display, text=f"{voltage:06.3f} V")
+        self.ui_updates.configure(self.current_display, text=f"{current:.3f} A")
+        self.ui_updates.configure(self.power_display, text=f"{power:.3f} W")
+        self.ui_updates.configure(self.row_1_label_right, text=reg_mode)
+        self.ui_updates.configure(self.statistics_label, text=self.format_statistics(self.statistics.summary()))
+        self.trend_plot.refresh()
+
+    @staticmethod
+    def format_statistics(summary):
+        def duration(seconds):
+            minutes, seconds = divmod(int(seconds), 60)
+            return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+
+        current = summary["current"] or {"mean": 0.0, "rms": 0.0}
+        power = summary["power"] or {"mean": 0.0, "max": 0.0}
+        return (f"{summary['energy_wh']:.4f} Wh  {summary['charge_ah']:.4f} Ah\n"
+                f"CV {duration(summary['mode_time_s']['CV'])}  CC {duration(summary['mode_time_s']['CC'])}\n"
+                f"I avg {current['mean']:.3f} rms {current['rms']:.3f} A\n"
+                f"P avg {power['mean']:.3f} max {power['max']:.3f} W")
+
+    def reset_statistics(self):
+        self.statistics.reset()
+        self.ui_updates.configure(self.statistics_label, text=self.format_statistics(self.statistics.summary()))
 
     def toggle_channel(self):
         Thread(target=self._toggle_channel_task).start()
@@ -182,9 +374,6 @@ class ChannelFrame(tk.Frame):
                 self.after(0, self.clear_error)
                 if self.channel_enabled:
                     self.start_refresh()
-                    self.monitor_ovp_ocp = True
-                    self.ovp_ocp_monitor_thread = Thread(target=self.monitor_ovp_ocp_status)
-                    self.ovp_ocp_monitor_thread.start()
                 else:
                     self.stop_refresh()
             else:
@@ -192,29 +381,8 @@ class ChannelFrame(tk.Frame):
         except Exception as e:
             self.after(0, self.display_error, str(e))
 
-    def monitor_ovp_ocp_status(self):
-        """ Monitor OVP/OCP status periodically for this channel. """
-        while self.monitor_ovp_ocp:
-            try:
-                if self.voltage_limit_enabled or self.current_limit_enabled:
-                    # Query OVP/OCP status for this channel
-                    if self.voltage_limit_enabled:
-                        ovp_status = dp832.get_ovp_status(self.instrument, [self.channel_number])
-                        if ovp_status[f'CH{self.channel_number}'] == "YES":
-                            self.after(0, self.display_error, f"OVP triggered for CH {self.channel_number}")
-
-                    if self.current_limit_enabled:
-                        ocp_status = dp832.get_ocp_status(self.instrument, [self.channel_number])
-                        if ocp_status[f'CH{self.channel_number}'] == "YES":
-                            self.after(0, self.display_error, f"OCP triggered for CH {self.channel_number}")
-
-            except Exception as e:
-                self.after(0, self.display_error, str(e))
-
-            time.sleep(1)
-
     def display_error(self, message):
-        self.error_label.config(text=message)
+        self.ui_updates.configure(self.error_label, text=message)
 
     def toggle_voltage_limit(self):
         Thread(target=self._toggle_voltage_limit_task).start()
@@ -271,7 +439,8 @@ class ChannelFrame(tk.Frame):
                 if success:
                     self.after(0, self.update_set_value_label, label_text, value)
                 else:
-                    self.after(0, self.display_error, f"Failed to set {label_text}")
+                    details = f": {success.errors[0]}" if success.errors else ""
+                    self.after(0, self.display_error, f"Failed to set {label_text}{details}")
             else:
                 self.after(0, self.display_error,
                            f"{label_text.split()[1]} must be between {value_range[0]:.3f} - {value_range[1]:.3f}")
@@ -293,7 +462,7 @@ class ChannelFrame(tk.Frame):
             self.current_limit_label.config(text=f"{formatted_value} A")
 
     def clear_error(self):
-        self.error_label.config(text="")
+        self.ui_updates.configure(self.error_label, text="")
 
     def update_channel_state(self):
         if self.channel_enabled:
@@ -344,12 +513,23 @@ class PowerSupplyControl(tk.Tk):
 
         self.title("Power Supply Control")
         self.configure(bg="#ebeaea")
-        self.geometry("1063x683")
-        self.minsize(1063, 683)
+        self.geometry("1063x903")
+        self.minsize(1063, 903)
 
         self.device = device
 
-        # Get the current channel settings
+        # One polling thread for all three channels, or the stream of a dp832_daemon that polls for all its clients
+        if is_daemon_address(self.device):
+            self.acquisition_engine = DaemonAcquisitionEngine(self.device)
+        else:
+            # trips are caught through the status registers every 0.2 s, even while a channel polls at its idle rate
+            self.acquisition_engine = AcquisitionEngine(self.device, rate_policy=AdaptiveRatePolicy(),
+                                                        protection_interval=0.2)
+
+        # Measurement updates of all channels are coalesced and drawn at most 20 times per second
+        self.ui_updates = UIUpdateQueue(self, max_fps=20)
+
+        # Get the current channel settings (one transfer, later reads are served from the driver's shadow model)
         channel_settings = dp832.get_channel_settings(self.device, [1, 2, 3])
 
         channels_frame = tk.Frame(self, bg="black", bd=2, relief="ridge")
@@ -359,7 +539,7 @@ class PowerSupplyControl(tk.Tk):
         self.channel_1_frame = ChannelFrame(
             channels_frame, channel_number=1, color="yellow",
             voltage_range=(0.0, 32.0), current_range=(0.0, 3.2),
-            instrument=self.device
+            instrument=self.device, acquisition_engine=self.acquisition_engine, ui_updates=self.ui_updates
         )
         self.channel_1_frame.grid(row=0, column=0, padx=20, pady=10)
         self.channel_1_frame.initialize_from_settings(channel_settings[1])
@@ -368,7 +548,7 @@ class PowerSupplyControl(tk.Tk):
         self.channel_2_frame = ChannelFrame(
             channels_frame, channel_number=2, color="cyan",
             voltage_range=(0.0, 32.0), current_range=(0.0, 3.2),
-            instrument=self.device
+            instrument=self.device, acquisition_engine=self.acquisition_engine, ui_updates=self.ui_updates
         )
         self.channel_2_frame.grid(row=0, column=2, padx=20, pady=10)
         self.channel_2_frame.initialize_from_settings(channel_settings[2])
@@ -377,7 +557,7 @@ class PowerSupplyControl(tk.Tk):
         self.channel_3_frame = ChannelFrame(
             channels_frame, channel_number=3, color="magenta",
             voltage_range=(0.0, 5.3), current_range=(0.0, 3.2),
-            instrument=self.device
+            instrument=self.device, acquisition_engine=self.acquisition_engine, ui_updates=self.ui_updates
         )
         self.channel_3_frame.grid(row=0, column=4, padx=20, pady=10)
         self.channel_3_frame.initialize_from_settings(channel_settings[3])
@@ -388,6 +568,21 @@ class PowerSupplyControl(tk.Tk):
 
         self.add_vertical_lines()
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.acquisition_engine.subscribe_settings(self.on_settings_changed)
+        self.acquisition_engine.start()
+
+    def on_settings_changed(self, settings):
+        """ Called from the acquisition thread when the instrument settings changed outside this GUI. """
+        frames = {1: self.channel_1_frame, 2: self.channel_2_frame, 3: self.channel_3_frame}
+        for channel, channel_settings in settings.items():
+            self.ui_updates.post(("settings", channel), frames[channel].apply_settings, channel_settings)
+
+    def on_close(self):
+        self.acquisition_engine.stop()
+        self.ui_updates.stop()
+        self.destroy()
+
     def create_channel_controls(self, channel_number, channel_frame):
         btn_frame = tk.Frame(self, bg="#ebeaea")
         btn_frame.grid(row=1, column=(channel_number * 2) - 2, padx=5, pady=10)
@@ -425,6 +620,10 @@ class PowerSupplyControl(tk.Tk):
         error_label.grid(row=11, column=0, columnspan=3, pady=5)
         channel_frame.error_label = error_label
 
+        reset_statistics_btn = tk.Button(btn_frame, text="Reset Statistics", command=channel_frame.reset_statistics,
+                                         fg="white", bg="#757a82", width=15)
+        reset_statistics_btn.grid(row=12, column=0, padx=2, pady=2)
+
     def add_vertical_lines(self):
         line1 = tk.Frame(self, width=2, height=100, bg="black")
         line1.grid(row=1, column=1, rowspan=1, padx=5, pady=5)
@@ -454,10 +653,39 @@ class DeviceSelection(tk.Tk):
         self.populate_device_list()
 
     def populate_device_list(self):
-        devices = find_instrument.find_devices_by_pattern("DP8")
-        for device in devices:
+        # Show the devices from the last scan right away
+        for device in find_instrument.get_cached_devices("DP8"):
             self.device_listbox.insert(tk.END, device)
 
+        # Then revalidate in the background, devices show up in the listbox as they answer
+        Thread(target=self._scan_devices_task, daemon=True).start()
+
+    def _scan_devices_task(self):
+        try:
+            devices = find_instrument.find_devices_by_pattern("DP8", on_found=self._on_device_found)
+            self._post(self._remove_stale_devices, devices)
+        except Exception as e:
+            self._post(messagebox.showerror, "Error", f"Device scan failed: {e}")
+
+    def _on_device_found(self, resource, idn_response):
+        self._post(self._add_device, resource)
+
+    def _add_device(self, resource):
+        if resource not in self.device_listbox.get(0, tk.END):
+            self.device_listbox.insert(tk.END, resource)
+
+    def _remove_stale_devices(self, devices):
+        # cached devices that did not answer the scan
+        for index in reversed(range(self.device_listbox.size())):
+            if self.device_listbox.get(index) not in devices:
+                self.device_listbox.delete(index)
+
+    def _post(self, callback, *args):
+        try:
+            self.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            pass  # dialog already closed
+
     def connect_device(self):
         try:
             selected_index = self.device_listbox.curselection()[0]
@@ -468,11 +696,17 @@ class DeviceSelection(tk.Tk):
 
 
 if __name__ == "__main__":
-    # Step 1: Show the device selection dialog first
-    device_selection_app = DeviceSelection()
-    device_selection_app.mainloop()
+    # A resource string or daemon address ("dp832d://127.0.0.1:5832") on the command line skips the dialog
+    device_selected = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if device_selected is None:
+        # Step 1: Show the device selection dialog first
+        device_selection_app = DeviceSelection()
+        device_selection_app.mainloop()
+        device_selected = device_selection_app.device_selected
 
-    if device_selection_app.device_selected:
+    if device_selected:
         # Step 2: Launch the main control GUI with the selected device
-        app = PowerSupplyControl(device_selection_app.device_selected)
+        app = PowerSupplyControl(device_selected)
         app.mainloop()
+        dp832.close_all_sessions()
@@ -0,0 +1,248 @@
+import threading
+import time
+
+import dp832
+import metrics
+from channel_statistics import ChannelStatistics
+from history import MeasurementHistory
+from protection import ProtectionMonitor
+from scheduler import DeadlineScheduler
+
+
+class AcquisitionEngine:
+    """
+    Single polling thread per instrument.
+
+    Every cycle reads all enabled channels with one dp832.snapshot() call (OVP/OCP alarms through the status
+    registers, see DP832Session.snapshot()), appends each ChannelSnapshot to that channel's MeasurementHistory and
+    ChannelStatistics (self.history, self.statistics) and hands it to the callbacks subscribed for that channel.
+    Callbacks run on the engine thread, so GUI subscribers have to hop back to the Tk main loop themselves (e.g. with
+    after()).
+
+    Cycles run on a DeadlineScheduler, so the polling period holds regardless of how long the I/O takes. Cycles
+    that would start late by more than a period are skipped; see timing_stats().
+
+    With a rate_policy (e.g. rate_policy.AdaptiveRatePolicy) every channel has its own rate: the engine ticks at the
+    fastest one and each cycle reads only the channels that are due, still in one snapshot transfer.
+
+    Parameters:
+    instrument (str): The VISA resource string of the power supply.
+    refresh_rate (float): Polling cycles per second.
+    history_capacity (int): Samples kept per channel in self.history.
+    settings_check_interval (float): Seconds between re-reads of the channel settings (dp832.refresh_shadow) that
+    pick up front-panel changes, None to disable.
+    rate_policy: Object with rate(channel), reset(channel) and update(snapshot, settings) -> rate that sets the
+    per-channel polling rates, None to poll every channel at refresh_rate.
+    protection_interval (float): Seconds between the status register reads of a protection.ProtectionMonitor run
+    alongside the polling (self.protection), None for none. Its events go to the subscribe_events() callbacks, and a
+    channel with an event is read right away instead of waiting for its polling rate.
+    """
+
+    def __init__(self, instrument: str, refresh_rate: float = 2, history_capacity: int = 86400,
+                 settings_check_interval: float = 5.0, rate_policy=None, protection_interval: float = None):
+        self.instrument = instrument
+        self.refresh_rate = refresh_rate
+        self.rate_policy = rate_policy
+        self._next_due = {1: 0.0, 2: 0.0, 3: 0.0}  # time.monotonic() at which each channel is read next
+        self.settings_check_interval = settings_check_interval
+        self._settings_subscribers = []
+        self._next_settings_check = time.monotonic()
+        self.history = {channel: MeasurementHistory(history_capacity) for channel in (1, 2, 3)}
+        self.statistics = {channel: ChannelStatistics() for channel in (1, 2, 3)}
+        self._subscribers = {1: [], 2: [], 3: []}
+        self._event_subscribers = []
+        self.protection = None
+        if protection_interval is not None:
+            self.protection = ProtectionMonitor(instrument, protection_interval, on_event=self._on_protection_event,
+                                                on_error=lambda message: self._publish_error(self.enabled_channels,
+                                                                                             message))
+        self._enabled_channels = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.scheduler = DeadlineScheduler(1 / refresh_rate)
+        self._running = False
+        self._thread = None
+
+    def subscribe(self, channel: int, on_snapshot, on_error=None):
+        """
+        Registers callbacks for a channel.
+
+        Parameters:
+        channel (int): The channel to subscribe to.
+        on_snapshot: Called with a dp832.ChannelSnapshot after every cycle in which the channel was read.
+        on_error: Called with the error message if a cycle fails.
+        """
+        with self._lock:
+            self._subscribers[channel].append((on_snapshot, on_error))
+
+    def subscribe_settings(self, on_settings_changed):
+        """
+        Registers a callback for settings that changed on the instrument behind our back (e.g. on the front panel).
+
+        Parameters:
+        on_settings_changed: Called from the engine thread with {channel: settings dict} for the changed channels.
+        """
+        with self._lock:
+            self._settings_subscribers.append(on_settings_changed)
+
+    def subscribe_events(self, on_event):
+        """
+        Registers a callback for the protection.ProtectionEvents (OVP/OCP trips, output and CV/CC changes) of all
+        channels. Called from the monitor thread.
+        """
+        with self._lock:
+            self._event_subscribers.append(on_event)
+
+    def _on_protection_event(self, event):
+        self._publish_event(event)
+        with self._lock:
+            enabled = event.channel in self._enabled_channels
+            if enabled:
+                self._next_due[event.channel] = 0.0
+        if enabled:
+            # show the new state now rather than at the channel's (possibly idle) polling rate
+            if self.rate_policy is not None:
+                self.rate_policy.reset(event.channel)
+            self._wake.set()
+
+    def _publish_event(self, event):
+        with self._lock:
+            subscribers = list(self._event_subscribers)
+        for on_event in subscribers:
+            on_event(event)
+
+    def check_settings(self):
+        """ Re-reads the channel settings in one transfer and notifies the settings subscribers of changes. """
+        try:
+            with metrics.caller("settings"):
+                changes = dp832.refresh_shadow(self.instrument)
+                settings = dp832.get_channel_settings(self.instrument, list(changes)) if changes else {}
+        except Exception as e:
+            self._publish_error([1, 2, 3], str(e))
+            return
+
+        if settings:
+            self._publish_settings(settings)
+
+    def enable_channel(self, channel: int):
+        with self._lock:
+            self._enabled_channels.add(channel)
+            self._next_due[channel] = 0.0
+        if self.rate_policy is not None:
+            self.rate_policy.reset(channel)
+        self._wake.set()
+
+    def disable_channel(self, channel: int):
+        with self._lock:
+            self._enabled_channels.discard(channel)
+
+    @property
+    def enabled_channels(self) -> list:
+        with self._lock:
+            return sorted(self._enabled_channels)
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"acquisition {self.instrument}", daemon=True)
+            self._thread.start()
+            if self.protection is not None:
+                self.protection.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self.protection is not None:
+            self.protection.stop()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def timing_stats(self) -> dict:
+        """ Polling cycle timing, see DeadlineScheduler.stats(). """
+        return self.scheduler.stats()
+
+    def channel_rates(self) -> dict:
+        """ Current polling rate per enabled channel in Hz. """
+        return {channel: self.rate_policy.rate(channel) if self.rate_policy is not None else self.refresh_rate
+                for channel in self.enabled_channels}
+
+    def _poll_period(self) -> float:
+        return 1 / max(self.channel_rates().values(), default=self.refresh_rate)
+
+    def poll_once(self):
+        """ Reads the enabled channels that are due (all of them without a rate policy) and publishes the results. """
+        channels = self.enabled_channels
+        if self.rate_policy is not None:
+            # half a tick of slack, so a channel due just after this tick doesn't wait for the next one
+            now = time.monotonic()
+            horizon = now + self.scheduler.period / 2 if self.scheduler.period else now
+            channels = [channel for channel in channels if self._next_due[channel] <= horizon]
+        if not channels:
+            return
+
+        try:
+            with metrics.caller("refresh"):
+                snapshots = dp832.snapshot(self.instrument, channels)
+                settings = dp832.get_channel_settings(self.instrument, channels) if self.rate_policy else None
+        except Exception as e:
+            self._publish_error(channels, str(e))
+            return
+
+        if self.rate_policy is not None:
+            for channel, snapshot in snapshots.items():
+                self._next_due[channel] = now + 1 / self.rate_policy.update(snapshot, settings[channel])
+
+        self._publish_snapshots(snapshots, time.time())
+
+    def _publish_snapshots(self, snapshots: dict, timestamp: float):
+        for channel, snapshot in snapshots.items():
+            self.history[channel].append_snapshot(snapshot, timestamp)
+            self.statistics[channel].update_snapshot(snapshot, timestamp)
+
+        with self._lock:
+            subscribers = {channel: list(self._subscribers[channel]) for channel in snapshots}
+
+        for channel, snapshot in snapshots.items():
+            for on_snapshot, _ in subscribers[channel]:
+                on_snapshot(snapshot)
+
+    def _publish_settings(self, settings: dict):
+        with self._lock:
+            subscribers = list(self._settings_subscribers)
+        for on_settings_changed in subscribers:
+            on_settings_changed(settings)
+
+    def _publish_error(self, channels: list, message: str):
+        with self._lock:
+            subscribers = {channel: list(self._subscribers[channel]) for channel in channels}
+
+        for channel in channels:
+            for _, on_error in subscribers[channel]:
+                if on_error is not None:
+                    on_error(message)
+
+    def _check_settings_if_due(self):
+        if self.settings_check_interval is not None and time.monotonic() >= self._next_settings_check:
+            self._next_settings_check = time.monotonic() + self.settings_check_interval
+            self.check_settings()
+
+    def _run(self):
+        while self._running:
+            if not self.enabled_channels:
+                # nothing to poll, sleep until a channel gets enabled or the settings are due
+                self._check_settings_if_due()
+                self._wake.wait(self.settings_check_interval)
+                self._wake.clear()
+                self.scheduler.reset()
+                continue
+
+            self.scheduler.period = self._poll_period()
+            if not self.scheduler.wait(self._wake):
+                # woken early by a newly enabled channel or stop(), read the new channel right away
+                self._wake.clear()
+                self.scheduler.reset()
+                continue
+
+            self.poll_once()
+            self._check_settings_if_due()
@@ -0,0 +1,140 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import dp832
+
+
+class AsyncDP832:
+    """
+    Asyncio front-end for a DP832(A).
+
+    VISA I/O is blocking, so every operation runs on one I/O thread owned by this object. Coroutines only await the
+    result, so any number of in-flight calls cost that single thread rather than one executor thread each, and the
+    instrument sees the calls strictly one after another.
+
+    Use as an async context manager:
+
+        async with AsyncDP832(resource) as psu:
+            await psu.configure_voltage([1], 5.0)
+            async for sample in psu.stream([1, 2], interval=0.1):
+                ...
+
+    Without a session, every call goes to the shared dp832.get_session() session, so daemon addresses
+    ("dp832d://host:port") work too and a session closed elsewhere is opened again. close() stops the I/O thread but
+    leaves the shared session open for its other users (see dp832.close_all_sessions()), and open() starts over.
+
+    Parameters:
+    dp8_instrument_id (str): The VISA resource string of the power supply.
+    session (dp832.DP832Session): An existing session to use instead of the shared one. It is not closed on exit.
+    """
+
+    def __init__(self, dp8_instrument_id: str, session: dp832.DP832Session = None):
+        self.instrument_id = dp8_instrument_id
+        self._session = session
+        self._executor = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"async {self.instrument_id}")
+        # opened now, so a wrong resource fails here and not on the first call
+        await self._run(self._get_session)
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False)
+
+    def _get_session(self):
+        return self._session if self._session is not None else dp832.get_session(self.instrument_id)
+
+    async def _run(self, function, *args):
+        if self._executor is None:
+            raise RuntimeError(f"AsyncDP832 for {self.instrument_id} is not open")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def _call(self, method: str, *args):
+        # the session is looked up on the I/O thread, get_session() may have to open it
+        return await self._run(lambda: getattr(self._get_session(), method)(*args))
+
+    async def set_channel_output_state(self, channels: list, state: str, verification: str = None):
+        return await self._call("set_channel_output_state", channels, state, verification)
+
+    async def set_ovp_state(self, channels: list, state: str, verification: str = None):
+        return await self._call("set_ovp_state", channels, state, verification)
+
+    async def set_ocp_state(self, channels: list, state: str, verification: str = None):
+        return await self._call("set_ocp_state", channels, state, verification)
+
+    async def get_channel_settings(self, channels: list):
+        return await self._call("get_channel_settings", channels)
+
+    async def get_ocp_status(self, channels: list):
+        return await self._call("get_ocp_status", channels)
+
+    async def get_ovp_status(self, channels: list):
+        return await self._call("get_ovp_status", channels)
+
+    async def get_regulation_mode(self, channels: list):
+        return await self._call("get_regulation_mode", channels)
+
+    async def get_output_state(self, channels: list):
+        return await self._call("get_output_state", channels)
+
+    async def configure_voltage(self, channels: list, voltage: float, verification: str = None):
+        return await self._call("configure_voltage", channels, voltage, verification)
+
+    async def configure_current(self, channels: list, current: float, verification: str = None):
+        return await self._call("configure_current", channels, current, verification)
+
+    async def configure_voltage_limit(self, channels: list, voltage_limit: float, verification: str = None):
+        return await self._call("configure_voltage_limit", channels, voltage_limit, verification)
+
+    async def configure_current_limit(self, channels: list, current_limit: float, verification: str = None):
+        return await self._call("configure_current_limit", channels, current_limit, verification)
+
+    async def configure_channel_static(self, channels: list, voltage: float, current: float, verification: str = None):
+        return await self._call("configure_channel_static", channels, voltage, current, verification)
+
+    async def measure_output_voltage(self, channels: list):
+        return await self._call("measure_output_voltage", channels)
+
+    async def measure_output_current(self, channels: list):
+        return await self._call("measure_output_current", channels)
+
+    async def measure_output_power(self, channels: list):
+        return await self._call("measure_output_power", channels)
+
+    async def measure_all(self, channels: list):
+        return await self._call("measure_all", channels)
+
+    async def snapshot(self, channels: list):
+        return await self._call("snapshot", channels)
+
+    async def stream(self, channels: list, interval: float = 0.5, count: int = None):
+        """
+        Polls the given channels and yields a snapshot dict (see dp832.snapshot) per poll.
+
+        The stream stops after count samples, or when the consuming task is cancelled or breaks out of the loop.
+
+        Parameters:
+        channels (list): The channels to read.
+        interval (float): Seconds between the start of consecutive polls.
+        count (int): Number of samples to yield, None for no limit.
+        """
+        loop = asyncio.get_running_loop()
+        next_poll = loop.time()
+        samples = 0
+
+        while count is None or samples < count:
+            yield await self.snapshot(channels)
+            samples += 1
+
+            next_poll += interval
+            await asyncio.sleep(max(0.0, next_poll - loop.time()))
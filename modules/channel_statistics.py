@@ -0,0 +1,156 @@
+import math
+import threading
+
+from history import REGULATION_MODES
+
+try:
+    import numpy
+except ImportError:  # window_statistics() falls back to a plain loop
+    numpy = None
+
+QUANTITIES = ("voltage", "current", "power")
+
+
+class ChannelStatistics:
+    """
+    Running energy, charge and V/I/P statistics of one channel, updated in O(1) per sample.
+
+    Integrals use the trapezoidal rule on the real sample timestamps, so uneven polling (adaptive rates, skipped
+    cycles) doesn't skew them. Means and RMS values are time-weighted. The time between two samples counts towards
+    the regulation mode of the first one. Gaps longer than max_gap (e.g. while the channel wasn't polled) are left
+    out of all integrals instead of being bridged.
+
+    Parameters:
+    max_gap (float): Longest interval in seconds that is integrated, None for no limit.
+    """
+
+    def __init__(self, max_gap: float = 10.0):
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            self.duration = 0.0  # integrated seconds, gaps excluded
+            self._integral = dict.fromkeys(QUANTITIES, 0.0)  # integral of x dt
+            self._square_integral = dict.fromkeys(QUANTITIES, 0.0)  # integral of x^2 dt
+            self._minimum = dict.fromkeys(QUANTITIES, math.inf)
+            self._maximum = dict.fromkeys(QUANTITIES, -math.inf)
+            self.mode_time = dict.fromkeys(REGULATION_MODES, 0.0)
+            self._previous = None  # (timestamp, voltage, current, power, mode)
+
+    def update(self, timestamp: float, voltage: float, current: float, power: float, regulation_mode: str):
+        values = (voltage, current, power)
+        with self._lock:
+            self.samples += 1
+            for name, value in zip(QUANTITIES, values):
+                if value < self._minimum[name]:
+                    self._minimum[name] = value
+                if value > self._maximum[name]:
+                    self._maximum[name] = value
+
+            previous = self._previous
+            self._previous = (timestamp, voltage, current, power, regulation_mode)
+            if previous is None:
+                return
+            dt = timestamp - previous[0]
+            if dt <= 0 or (self.max_gap is not None and dt > self.max_gap):
+                return
+
+            self.duration += dt
+            for name, value, previous_value in zip(QUANTITIES, values, previous[1:4]):
+                self._integral[name] += (value + previous_value) * dt / 2
+                self._square_integral[name] += (value * value + previous_value * previous_value) * dt / 2
+            if previous[4] in self.mode_time:
+                self.mode_time[previous[4]] += dt
+
+    def update_snapshot(self, snapshot, timestamp: float):
+        """ Feeds a dp832.ChannelSnapshot taken at timestamp. """
+        self.update(timestamp, snapshot.voltage, snapshot.current, snapshot.power, snapshot.regulation_mode)
+
+    @property
+    def energy_wh(self) -> float:
+        return self._integral["power"] / 3600
+
+    @property
+    def charge_ah(self) -> float:
+        return self._integral["current"] / 3600
+
+    def summary(self) -> dict:
+        """
+        Returns samples, duration_s, energy_wh, charge_ah, mode_time_s (per regulation mode) and min, max, mean and
+        rms for each of voltage, current and power (None before the first sample).
+        """
+        with self._lock:
+            return _summary(self.samples, self.duration, self._integral, self._square_integral, self._minimum,
+                            self._maximum, self.mode_time, self._previous)
+
+
+def _summary(samples, duration, integral, square_integral, minimum, maximum, mode_time, last_sample) -> dict:
+    result = {
+        "samples": samples,
+        "duration_s": duration,
+        "energy_wh": integral["power"] / 3600,
+        "charge_ah": integral["current"] / 3600,
+        "mode_time_s": dict(mode_time),
+    }
+    for index, name in enumerate(QUANTITIES):
+        if not samples:
+            result[name] = None
+        elif duration > 0:
+            result[name] = {"min": minimum[name], "max": maximum[name], "mean": integral[name] / duration,
+                            "rms": math.sqrt(square_integral[name] / duration)}
+        else:
+            # a single sample (or only gaps) has no time weight, report the last value
+            value = last_sample[1 + index]
+            result[name] = {"min": minimum[name], "max": maximum[name], "mean": value, "rms": abs(value)}
+    return result
+
+
+def window_statistics(history, start_time: float = None, end_time: float = None, max_gap: float = 10.0) -> dict:
+    """
+    Recomputes the statistics of ChannelStatistics.summary() over a window of a history.MeasurementHistory.
+
+    Vectorized with numpy when it is installed, reading the ring buffer through its memoryviews without copying
+    each segment. Without numpy the samples are fed through a ChannelStatistics one by one.
+    """
+    segments = history.window(start_time, end_time)
+
+    if numpy is None:
+        statistics = ChannelStatistics(max_gap)
+        for segment in segments:
+            for timestamp, voltage, current, power, mode in zip(*segment):
+                statistics.update(timestamp, voltage, current, power,
+                                  REGULATION_MODES[mode] if mode >= 0 else "??")
+        return statistics.summary()
+
+    def column(index, dtype):
+        parts = [numpy.frombuffer(segment[index], dtype=dtype) for segment in segments]
+        return parts[0] if len(parts) == 1 else numpy.concatenate(parts) if parts else numpy.empty(0, dtype)
+
+    timestamps = column(0, numpy.float64)
+    values = {name: column(1 + index, numpy.float64) for index, name in enumerate(QUANTITIES)}
+    modes = column(4, numpy.int8)
+
+    dt = numpy.diff(timestamps)
+    integrated = dt > 0
+    if max_gap is not None:
+        integrated &= dt <= max_gap
+    dt = numpy.where(integrated, dt, 0.0)
+
+    integral, square_integral, minimum, maximum = {}, {}, {}, {}
+    for name, series in values.items():
+        integral[name] = float(numpy.sum((series[1:] + series[:-1]) * dt) / 2)
+        square_integral[name] = float(numpy.sum((series[1:] ** 2 + series[:-1] ** 2) * dt) / 2)
+        minimum[name] = float(series.min()) if len(series) else math.inf
+        maximum[name] = float(series.max()) if len(series) else -math.inf
+
+    interval_modes = modes[:-1]
+    mode_time = {mode: float(numpy.sum(dt[interval_modes == index])) for index, mode in enumerate(REGULATION_MODES)}
+    last_sample = None
+    if len(timestamps):
+        last_sample = (timestamps[-1],) + tuple(float(values[name][-1]) for name in QUANTITIES)
+
+    return _summary(len(timestamps), float(numpy.sum(dt)), integral, square_integral, minimum, maximum, mode_time,
+                    last_sample)
@@ -1,415 +1,893 @@
-import sys
-import pyvisa as visa
-import colorama
-from colorama import Fore, Style
-
-rm = visa.ResourceManager()  # assign resource manager to rm
-instrument_tuple = rm.list_resources()
-colorama.init(autoreset=True)
-
-
-def set_channel_output_state(dp8_instrument_id: str, channels: list, state: str):
-    psu = rm.open_resource(dp8_instrument_id)
-
-    if state not in ['ON', 'OFF']:
-        print(
-            f"{Fore.RED}Error: Tried to set DP832 channel output with ID {dp8_instrument_id} to unsupported value: {state} - accepted values are ['ON' | 'OFF'] (str)")
-        return False
-
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(
-                f"{Fore.RED}Error: Tried to configure an invalid channel of DP832 with ID {dp8_instrument_id}: CH{channel} - accepted values are 1, 2 or 3")
-            return False
-        psu.write(f":OUTP CH{channel},{state}")
-        reply = psu.query(f":OUTP? CH{channel}")
-        if reply == f"{state}\n":
-            print(f"Configured DP832 power supply output CH{channel} to {state}")
-        else:
-            print(f"{Fore.RED}Error: Failed to set DP832 channel CH{channel} state to {state}")
-            return False
-
-    psu.close()
-    return True
-
-
-def set_ovp_state(dp8_instrument_id: str, channels: list, state: str):
-    psu = rm.open_resource(dp8_instrument_id)
-
-    if state not in ['ON', 'OFF']:
-        print(
-            f"{Fore.RED}Error: Tried to set DP832 channel OVP with ID {dp8_instrument_id} to unsupported value: {state} - accepted values are ['ON' | 'OFF'] (str)")
-        return False
-
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(
-                f"{Fore.RED}Error: Tried to configure OVP of an invalid channel of DP832 with ID {dp8_instrument_id}: CH{channel} - accepted values are 1, 2 or 3")
-            return False
-        psu.write(f":SOURce[{channel}]:VOLT:PROT:STAT {state}")
-        reply = psu.query(f":SOURce[{channel}]:VOLT:PROT:STAT?")
-        if reply == f"{state}\n":
-            print(f"Configured DP832 power supply OCP on CH {channel} to {state}")
-        else:
-            print(f"{Fore.RED}Error: Failed to set DP832 OCP on CH{channel} state to {state}")
-            return False
-
-    psu.close()
-    return True
-
-
-def set_ocp_state(dp8_instrument_id: str, channels: list, state: str):
-    psu = rm.open_resource(dp8_instrument_id)
-
-    if state not in ['ON', 'OFF']:
-        print(
-            f"{Fore.RED}Error: Tried to set DP832 channel OCP with ID {dp8_instrument_id} to unsupported value: {state} - accepted values are ['ON' | 'OFF'] (str)")
-        return False
-
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(
-                f"{Fore.RED}Error: Tried to configure OCP of an invalid channel of DP832 with ID {dp8_instrument_id}: CH{channel} - accepted values are 1, 2 or 3")
-            return False
-        psu.write(f":SOURce[{channel}]:CURR:PROT:STAT {state}")
-        reply = psu.query(f":SOURce[{channel}]:CURR:PROT:STAT?")
-        if reply == f"{state}\n":
-            print(f"Configured DP832 power supply OCP on CH {channel} to {state}")
-        else:
-            print(f"{Fore.RED}Error: Failed to set DP832 OCP on CH{channel} state to {state}")
-            return False
-
-    psu.close()
-    return True
-
-
-def get_channel_settings(dp8_instrument_id: str, channels: list):
-    psu = rm.open_resource(dp8_instrument_id)
-    channel_settings_dict = {}
-
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"{Fore.RED}Error: Invalid channel {channel}.")
-            return False
-
-        # Query channel settings and process the response
-        reply = psu.query(f":APPL? CH{channel}").strip()
-        channel_settings = reply.split(',')
-
-        # Store settings in the dictionary
-        channel_settings_dict[channel] = {
-            "voltage": float(channel_settings[1]),
-            "current": float(channel_settings[2]),
-            "voltage_limit": float(psu.query(f":OUTP:OVP:VAL? CH{channel}").strip()),
-            "current_limit": float(psu.query(f":OUTP:OCP:VAL? CH{channel}").strip())
-        }
-
-    psu.close()
-    return channel_settings_dict
-
-
-# psu responds with "YES" or "NO"
-def get_ocp_status(device_id, channels: int):
-    psu = rm.open_resource(device_id)
-    ocp_states = dict()
+import threading
+from dataclasses import dataclass, field
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"what the hell mate, {channel} is an invalid channel")
-            psu.close()
-            return None
+import metrics
+import visa_backend
 
-        ocp_states[f'CH{channel}'] = psu.query(f":OUTPut:OCP:ALAR? CH{channel}").strip('\n')
+_colorama_initialized = False
 
-        psu.close()
-        return ocp_states
+# "batch" pipelines the writes and checks them once via *OPC?/:SYST:ERR?, "strict" reads every setting back
+VERIFICATION_MODES = ("batch", "strict")
 
+CHANNEL_RATINGS = {1: "30V/3A", 2: "30V/3A", 3: "5V/3A"}
+MAX_VOLTAGE = {1: 32.0, 2: 32.0, 3: 5.3}
+MAX_CURRENT = {1: 3.2, 2: 3.2, 3: 3.2}
 
-# psu responds with "YES" or "NO"
-def get_ovp_status(device_id, channels: list):
-    psu = rm.open_resource(device_id)
-    ovp_states = dict()
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"what the hell mate, {channel} is an invalid channel")
-            psu.close()
-            return None
+def _print_error(message: str):
+    # colorama is only imported once there is an error to print, it is not worth its import time on every start
+    global _colorama_initialized
+    import colorama
 
-        ovp_states[f'CH{channel}'] = psu.query(f":OUTPut:OVP:ALAR? CH{channel}").strip('\n')
+    if not _colorama_initialized:
+        colorama.init(autoreset=True)
+        _colorama_initialized = True
+    print(f"{colorama.Fore.RED}Error: {message}")
 
-    psu.close()
-    return ovp_states
 
+@dataclass
+class ConfigurationResult:
+    """ Outcome of a setting change. Truthy when it succeeded, so it can be used like the old True/False. """
+    ok: bool
+    errors: list = field(default_factory=list)
+
+    def __bool__(self):
+        return self.ok
+
+
+# queries sent per channel by DP832Session.refresh_shadow(), in reply order
+SHADOW_QUERIES = (":APPL?", ":OUTP:OVP:VAL?", ":OUTP:OCP:VAL?", ":OUTP:OVP?", ":OUTP:OCP?", ":OUTP?")
+
+# queries sent per channel by DP832Session.snapshot(), in reply order. The alarms aren't polled per channel: the
+# snapshot ends with the questionable condition register (bit n set while channel n has an OVP/OCP alarm, reading it
+# clears nothing) and ALARM_QUERIES only go out for the channels it flags.
+SNAPSHOT_QUERIES = (":MEAS:ALL?", ":OUTP:CVCC?", ":OUTP?")
+ALARM_CONDITION_QUERY = ":STAT:QUES:INST:COND?"
+ALARM_QUERIES = (":OUTP:OVP:ALAR?", ":OUTP:OCP:ALAR?")
 
-# psu responds with "CV", "CC", or "UR"
-def get_regulation_mode(device_id, channels: list):
-    psu = rm.open_resource(device_id)
-    regulation_modes = dict()
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"what the hell mate, {channel} is an invalid channel")
-            psu.close()
-            return "??"
+# *STB? bits (IEEE 488.2 / SCPI): error queue not empty, questionable summary, operation summary
+STB_ERROR_QUEUE = 1 << 2
+STB_QUESTIONABLE = 1 << 3
+STB_OPERATION = 1 << 7
+
+# one transfer: status byte, questionable instrument event and condition registers, operation instrument event
+# register. In the instrument registers bit n stands for channel n, reading an event register clears it.
+STATUS_SUMMARY_QUERY = "*STB?;:STAT:QUES:INST?;:STAT:QUES:INST:COND?;:STAT:OPER:INST?"
+
+# queries sent per channel by DP832Session.read_events(), in reply order
+EVENT_QUERIES = (":OUTP:OVP:ALAR?", ":OUTP:OCP:ALAR?", ":OUTP:CVCC?", ":OUTP?")
 
-        regulation_modes[f'CH{channel}'] = psu.query(f":OUTPut:CVCC? CH{channel}").strip('\n')
-
-    psu.close()
-    return regulation_modes
 
+@dataclass
+class StatusSummary:
+    """ Result of DP832Session.read_status_summary(). Channel sets are decoded from the per-channel register bits. """
+    status_byte: int
+    questionable_event: set  # channels with an OVP/OCP trip since the last read
+    questionable_condition: set  # channels whose OVP/OCP alarm is still set
+    operation_event: set  # channels whose output or CV/CC mode changed since the last read
+
+    @property
+    def quiet(self) -> bool:
+        return not (self.questionable_event or self.operation_event
+                    or self.status_byte & (STB_QUESTIONABLE | STB_OPERATION))
+
+
+def _channels_from_register(value: str) -> set:
+    bits = int(float(value))
+    return {channel for channel in (1, 2, 3) if bits & (1 << channel)}
+
+
+@dataclass
+class ChannelSnapshot:
+    """ State of one channel as returned by a single DP832Session.snapshot() transfer. """
+    channel: int
+    voltage: float
+    current: float
+    power: float
+    regulation_mode: str  # "CV", "CC" or "UR"
+    output_enabled: bool
+    ovp_tripped: bool
+    ocp_tripped: bool
+
+
+def build_snapshot_command(channels: list) -> str:
+    return ";".join([f"{query} CH{channel}" for channel in channels for query in SNAPSHOT_QUERIES] +
+                    [ALARM_CONDITION_QUERY])
+
+
+def parse_snapshot_reply(channels: list, reply: str, alarms: dict = None):
+    """
+    Parses the semicolon separated reply to build_snapshot_command().
+
+    Parameters:
+    channels (list): The channels the command was built for, in the same order.
+    reply (str): The raw reply from the power supply.
+    alarms (dict): channel -> (ovp_tripped, ocp_tripped) for the flagged channels. Channels missing from it are
+    reported untripped.
+
+    Returns:
+    tuple: (ChannelSnapshot per channel number, set of the channels the alarm condition register flags)
+    """
+    fields = [field.strip() for field in reply.strip().split(';')]
+    if len(fields) != len(channels) * len(SNAPSHOT_QUERIES) + 1:
+        raise ValueError(f"Expected {len(channels) * len(SNAPSHOT_QUERIES) + 1} fields in snapshot reply, "
+                         f"got {reply!r}")
+    flagged = _channels_from_register(fields[-1]) & set(channels)
+    alarms = alarms or {}
+
+    snapshots = {}
+    for index, channel in enumerate(channels):
+        measurement, regulation_mode, output_state = \
+            fields[index * len(SNAPSHOT_QUERIES):(index + 1) * len(SNAPSHOT_QUERIES)]
+        voltage, current, power = (float(value) for value in measurement.split(','))
+        ovp_tripped, ocp_tripped = alarms.get(channel, (False, False)) if channel in flagged else (False, False)
+        snapshots[channel] = ChannelSnapshot(
+            channel=channel,
+            voltage=voltage,
+            current=current,
+            power=power,
+            regulation_mode=regulation_mode,
+            output_enabled=output_state == "ON",
+            ovp_tripped=ovp_tripped,
+            ocp_tripped=ocp_tripped,
+        )
+
+    return snapshots, flagged
+
+
+def is_connection_error(error: Exception) -> bool:
+    """ True for errors that mean the link to the instrument is gone or hung (sockets, timeouts, pyvisa's VisaIOError). """
+    # TimeoutError and ConnectionError are OSErrors, pyvisa is matched by name so it doesn't have to be imported
+    return isinstance(error, OSError) or type(error).__name__ == "VisaIOError"
+
+
+class _ConnectionGuard:
+    """
+    Passes transfers through to the session's resource and tells the session when one fails with a connection error.
+
+    With an opener, the resource is dropped on such an error and opened again by the next transfer.
+    """
+
+    def __init__(self, resource, session, opener=None):
+        self.resource = resource
+        self.closed = False
+        self._session = session
+        self._opener = opener
+        self._timeout = None  # last timeout set, applied again to a reopened resource
+
+    def __getattr__(self, name):
+        return getattr(self._open(), name)
+
+    def _open(self):
+        if self.closed:
+            raise ConnectionError(f"Session to {self._session.instrument_id} is closed")
+        if self.resource is None:
+            self.resource = self._opener()
+            if self._timeout is not None:
+                self.resource.timeout = self._timeout
+        return self.resource
+
+    def drop(self):
+        # the resource is dead or out of sync, one we can't reopen is kept in case it reconnects by itself (like
+        # socket_transport.SocketResource)
+        if self._opener is not None and self.resource is not None:
+            try:
+                self.resource.close()
+            except Exception:
+                pass
+            self.resource = None
+
+    @property
+    def timeout(self):
+        return self._open().timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+        if self.resource is not None:
+            self.resource.timeout = value
+
+    def _guarded(self, name: str, *args):
+        try:
+            return getattr(self._open(), name)(*args)
+        except Exception as e:
+            if is_connection_error(e):
+                self._session._connection_lost()
+            raise
+
+    def write(self, command: str):
+        return self._guarded("write", command)
+
+    def read(self) -> str:
+        return self._guarded("read")
+
+    def query(self, command: str) -> str:
+        return self._guarded("query", command)
+
+    @property
+    def query_pipelined(self):
+        # only there when the wrapped transport pipelines, see DP832Session._query_all()
+        getattr(self._open(), "query_pipelined")
+        return lambda commands: self._guarded("query_pipelined", commands)
+
+    def close(self):
+        self.closed = True
+        if self.resource is not None:
+            resource, self.resource = self.resource, None
+            resource.close()
+
+
+def _merge_changes(into: dict, changes: dict):
+    # merges refresh_shadow()-style changes, keeping the oldest old value and the newest new value of every field
+    for channel, changed in changes.items():
+        merged = into.setdefault(channel, {})
+        for name, (old, new) in changed.items():
+            merged[name] = (merged.get(name, (old, new))[0], new)
+
+
+class DP832Session:
+    """
+    Long-lived session to a single DP832(A).
+
+    The VISA resource is opened once and reused for every operation, instead of being opened and closed on each call.
+    All operations are serialized through a lock, so a session can be shared between the GUI threads.
+
+    A transfer failing with a connection error (see is_connection_error()) still raises, but drops the resource and
+    the cached state, and the next transfer opens the resource again, e.g. after the supply was replugged or the LAN
+    link dropped. A resource passed in is kept instead, it may reconnect by itself (like socket_transport does).
+
+    Parameters:
+    dp8_instrument_id (str): The VISA resource string of the power supply. "TCPIP::host::5555::SOCKET" resources use
+    the raw socket transport and need no VISA library.
+    resource: An already opened VISA resource (or anything with write/query/close). Opened through
+    visa_backend.open_resource() if omitted.
+    instrumented (bool): Record every transfer in metrics.registry.
+    verification (str): Default verification of setting changes, "batch" or "strict" (see _apply()).
+    """
+
+    def __init__(self, dp8_instrument_id: str, resource=None, instrumented: bool = True, verification: str = "batch"):
+        self.instrument_id = dp8_instrument_id
+        self.verification = verification
+        self._instrumented = instrumented
+        if resource is None:
+            self._psu = _ConnectionGuard(self._open_resource(), self, opener=self._open_resource)
+        else:
+            if instrumented:
+                resource = metrics.InstrumentedResource(resource, dp8_instrument_id)
+            self._psu = _ConnectionGuard(resource, self)
+        self._lock = threading.RLock()
+        # client-side copy of every channel's settings, see refresh_shadow()
+        self._shadow = {}
+        # channels whose shadow entry may be out of date (after write_batch or a failed write), re-read before use
+        self._stale = set()
+        # changes found by reads outside refresh_shadow(), reported by its next call
+        self._unreported_changes = {}
+        # channel -> (ovp_tripped, ocp_tripped) of the channels the alarm condition register flagged, see snapshot()
+        self._alarms = {}
+        # the instrument's error queue is known to be empty, see _write_checked()
+        self._error_queue_empty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if not self._psu.closed:
+                self._psu.close()
+
+    def _open_resource(self):
+        resource = visa_backend.open_resource(self.instrument_id)
+        if self._instrumented:
+            resource = metrics.InstrumentedResource(resource, self.instrument_id)
+        return resource
+
+    def _connection_lost(self):
+        # whatever we knew about the instrument may have changed while it was unreachable
+        with self._lock:
+            self._psu.drop()
+            self._shadow.clear()
+            self._stale.clear()
+            self._unreported_changes.clear()
+            self._alarms.clear()
+            self._error_queue_empty = False
+
+    @property
+    def closed(self) -> bool:
+        """ True after close(). A connection error doesn't close the session. """
+        return self._psu.closed
+
+    def _check_channels(self, channels: list, errors: list) -> bool:
+        for channel in channels:
+            if channel not in [1, 2, 3]:
+                errors.append(f"Invalid channel CH{channel} of DP832 with ID {self.instrument_id} - accepted values are 1, 2 or 3")
+        return not errors
+
+    def _apply(self, steps: list, verification: str = None) -> ConfigurationResult:
+        """
+        Sends a list of setting changes and verifies them.
+
+        In "strict" mode every write is followed by its read-back query, and the first mismatch stops the sequence.
+        In "batch" mode all writes go out in one transfer together with *OPC? and :SYST:ERR?, so the whole batch
+        costs a single round-trip and is checked once at the end through the instrument's error queue (see
+        _write_checked()).
+
+        Parameters:
+        steps (list): (write command, read-back query, check(reply) -> bool, description, (channel, shadow fields))
+        per setting. The shadow fields are applied to the shadow model once the step is verified.
+        verification (str): "batch" or "strict", self.verification if omitted.
+
+        Returns:
+        ConfigurationResult: ok plus the errors that were found.
+        """
+        verification = verification or self.verification
+        if verification not in VERIFICATION_MODES:
+            return ConfigurationResult(False, [f"Unsupported verification mode {verification} - accepted values are {VERIFICATION_MODES}"])
+
+        with self._lock:
+            if verification == "strict":
+                # a rejected write goes unnoticed in the error queue here
+                self._error_queue_empty = False
+                for write, readback, check, description, (channel, fields) in steps:
+                    self._psu.write(write)
+                    reply = self._psu.query(readback)
+                    if not check(reply):
+                        self.invalidate_shadow([channel])
+                        return ConfigurationResult(False, [f"Failed to verify {description}, got {reply.strip()}"])
+                    self._update_shadow(channel, fields)
+                return ConfigurationResult(True)
+
+            errors = self._write_checked([step[0] for step in steps])
+
+            for _, _, _, _, (channel, fields) in steps:
+                if errors:
+                    # no telling which of the writes failed
+                    self.invalidate_shadow([channel])
+                else:
+                    self._update_shadow(channel, fields)
+
+        if errors:
+            return ConfigurationResult(False, [f"Instrument reported {error} while setting "
+                                               f"{', '.join(step[3] for step in steps)}" for error in errors])
+        return ConfigurationResult(True)
+
+    def _write_checked(self, commands: list) -> list:
+        # one transfer with the writes, *OPC? and :SYST:ERR?, then drain the error queue if something failed.
+        # No *CLS to start from an empty queue, it also clears the status event registers protection.ProtectionMonitor
+        # reads. Errors left by other transfers are drained first instead, which only costs a transfer after
+        # raw queries, strict writes or a reconnect: the driver's own queries don't produce errors.
+        with self._lock:
+            if not self._error_queue_empty:
+                self._drain_errors()
+            reply = self._psu.query(";".join(list(commands) + ["*OPC?", ":SYST:ERR?"]))
+            errors = []
+            error = reply.strip().split(';')[-1]
+            # bounded in case the instrument keeps answering with errors
+            while not error.startswith("0,") and len(errors) < 20:
+                errors.append(error)
+                error = self._psu.query(":SYST:ERR?").strip()
+            self._error_queue_empty = error.startswith("0,")
+        return errors
+
+    def _drain_errors(self):
+        for _ in range(20):
+            if self._psu.query(":SYST:ERR?").strip().startswith("0,"):
+                self._error_queue_empty = True
+                return
+
+    def write_batch(self, commands: list) -> ConfigurationResult:
+        """
+        Sends raw SCPI commands in one transfer and checks them through *OPC? and :SYST:ERR?.
+
+        The shadow model is invalidated, since the commands may change any setting.
+
+        Parameters:
+        commands (list): The SCPI commands, without terminators.
+
+        Returns:
+        ConfigurationResult: ok plus the errors reported by the instrument.
+        """
+        errors = self._write_checked(commands)
+        self.invalidate_shadow()
+        return ConfigurationResult(not errors, [f"Instrument reported {error}" for error in errors])
+
+    def query(self, command: str) -> str:
+        """ Sends one raw SCPI query and returns the stripped reply. """
+        with self._lock:
+            self._error_queue_empty = False
+            return self._psu.query(command).strip()
+
+    def _set_state(self, channels: list, state: str, what: str, field: str, write: str, readback: str,
+                   verification: str):
+        errors = []
+        if state not in ['ON', 'OFF']:
+            errors.append(f"Tried to set DP832 channel {what} with ID {self.instrument_id} to unsupported value: {state} - accepted values are ['ON' | 'OFF'] (str)")
+        if not self._check_channels(channels, errors):
+            return ConfigurationResult(False, errors)
+
+        return self._apply([(write.format(channel=channel, state=state), readback.format(channel=channel),
+                             lambda reply: reply.strip() == state, f"{what} of CH{channel} to {state}",
+                             (channel, {field: state == "ON"})) for channel in channels], verification)
+
+    def set_channel_output_state(self, channels: list, state: str, verification: str = None):
+        return self._set_state(channels, state, "output", "output", ":OUTP CH{channel},{state}", ":OUTP? CH{channel}",
+                               verification)
+
+    def set_ovp_state(self, channels: list, state: str, verification: str = None):
+        return self._set_state(channels, state, "OVP", "ovp_enabled", ":SOURce[{channel}]:VOLT:PROT:STAT {state}",
+                               ":SOURce[{channel}]:VOLT:PROT:STAT?", verification)
+
+    def set_ocp_state(self, channels: list, state: str, verification: str = None):
+        return self._set_state(channels, state, "OCP", "ocp_enabled", ":SOURce[{channel}]:CURR:PROT:STAT {state}",
+                               ":SOURce[{channel}]:CURR:PROT:STAT?", verification)
+
+    @staticmethod
+    def _check_range(channels: list, value: float, what: str, unit: str, limits: dict, errors: list) -> bool:
+        for channel in channels:
+            if not 0 <= value <= limits[channel]:
+                errors.append(f"{what} for CH{channel} is outside the 0.000 - {limits[channel]:.3f} {unit} range.")
+        return not errors
+
+    @staticmethod
+    def _matches_float(expected: float):
+        def check(reply):
+            try:
+                return abs(float(reply.strip()) - expected) < 1e-3
+            except ValueError:
+                return False
+        return check
+
+    def configure_voltage(self, channels: list, voltage: float, verification: str = None):
+        errors = []
+        if not (self._check_channels(channels, errors) and
+                self._check_range(channels, voltage, "Voltage", "V", MAX_VOLTAGE, errors)):
+            return ConfigurationResult(False, errors)
+
+        def check(channel):
+            # DP832 replies with 2 decimals, DP832A with 3
+            return lambda reply: (f"CH{channel}:{CHANNEL_RATINGS[channel]},{voltage:.3f}" in reply or
+                                  f"CH{channel}:{CHANNEL_RATINGS[channel]},{voltage:.2f}" in reply)
+
+        return self._apply([(f":APPL CH{channel}, {voltage:.3f}", f":APPL? CH{channel}", check(channel),
+                             f"voltage of CH{channel} to {voltage:.3f} V", (channel, {"voltage": float(voltage)}))
+                            for channel in channels], verification)
+
+    def configure_current(self, channels: list, current: float, verification: str = None):
+        errors = []
+        if not (self._check_channels(channels, errors) and
+                self._check_range(channels, current, "Current", "A", MAX_CURRENT, errors)):
+            return ConfigurationResult(False, errors)
+
+        return self._apply([(f":SOURce[{channel}]:CURR {current:.3f}", f":SOURce[{channel}]:CURR?",
+                             self._matches_float(current), f"current of CH{channel} to {current:.3f} A",
+                             (channel, {"current": float(current)})) for channel in channels], verification)
+
+    def configure_voltage_limit(self, channels: list, voltage_limit: float, verification: str = None):
+        errors = []
+        if not (self._check_channels(channels, errors) and
+                self._check_range(channels, voltage_limit, "Voltage limit", "V", MAX_VOLTAGE, errors)):
+            return ConfigurationResult(False, errors)
+
+        return self._apply([(f":OUTP:OVP:VAL CH{channel},{voltage_limit:.3f}", f":OUTP:OVP:VAL? CH{channel}",
+                             self._matches_float(voltage_limit),
+                             f"voltage limit of CH{channel} to {voltage_limit:.3f} V",
+                             (channel, {"voltage_limit": float(voltage_limit)})) for channel in channels], verification)
+
+    def configure_current_limit(self, channels: list, current_limit: float, verification: str = None):
+        errors = []
+        if not (self._check_channels(channels, errors) and
+                self._check_range(channels, current_limit, "Current limit", "A", MAX_CURRENT, errors)):
+            return ConfigurationResult(False, errors)
+
+        return self._apply([(f":OUTP:OCP:VAL CH{channel},{current_limit:.3f}", f":OUTP:OCP:VAL? CH{channel}",
+                             self._matches_float(current_limit),
+                             f"current limit of CH{channel} to {current_limit:.3f} A",
+                             (channel, {"current_limit": float(current_limit)})) for channel in channels], verification)
+
+    def configure_channel_static(self, channels: list, voltage: float, current: float, verification: str = None):
+        errors = []
+        if not (self._check_channels(channels, errors) and
+                self._check_range(channels, voltage, "Voltage", "V", MAX_VOLTAGE, errors) and
+                self._check_range(channels, current, "Current", "A", MAX_CURRENT, errors)):
+            return ConfigurationResult(False, errors)
+
+        def check(channel):
+            # DP832 replies with 2 decimals for the voltage, DP832A with 3
+            return lambda reply: reply.strip() in (
+                f"CH{channel}:{CHANNEL_RATINGS[channel]},{voltage:.3f},{current:.3f}",
+                f"CH{channel}:{CHANNEL_RATINGS[channel]},{voltage:.2f},{current:.3f}")
+
+        return self._apply([(f":APPL CH{channel}, {voltage:.3f}, {current:.3f}", f":APPL? CH{channel}", check(channel),
+                             f"CH{channel} to {voltage:.3f} V, {current:.3f} A",
+                             (channel, {"voltage": float(voltage), "current": float(current)})) for channel in channels],
+                           verification)
+
+    def _update_shadow(self, channel: int, fields: dict):
+        with self._lock:
+            # channels that were never read stay unknown, so a partial entry can't pass for a complete one
+            if channel in self._shadow:
+                self._shadow[channel].update(fields)
+
+    def invalidate_shadow(self, channels: list = None):
+        """
+        Marks the shadow model of the given channels (all if omitted) as stale, so the next read goes to the bus.
+
+        The last known values are kept, so the re-read reports what actually changed (see refresh_shadow()).
+        """
+        with self._lock:
+            self._stale.update(channel for channel in (list(self._shadow) if channels is None else channels)
+                               if channel in self._shadow)
+
+    def refresh_shadow(self, channels: list = (1, 2, 3)) -> dict:
+        """
+        Reads the settings of the given channels in one transfer and updates the shadow model.
+
+        This doubles as the cheap change check: call it periodically to pick up changes made on the front panel, or
+        made through write_batch() and failed writes, which leave the model stale.
+
+        Parameters:
+        channels (list): The channels to read.
+
+        Returns:
+        dict: channel -> {field: (old value, new value)} for every field that differed from the model, including
+        changes that get_channel_settings() found while re-reading stale channels since the last call. Channels
+        that were not in the model yet are not reported.
+        """
+        with self._lock:
+            changes = {channel: self._unreported_changes.pop(channel) for channel in channels
+                       if channel in self._unreported_changes}
+            _merge_changes(changes, self._read_settings(channels))
+        # fields that went back to their old value in between are no change
+        changes = {channel: {name: values for name, values in changed.items() if values[0] != values[1]}
+                   for channel, changed in changes.items()}
+        return {channel: changed for channel, changed in changes.items() if changed}
+
+    def _read_settings(self, channels: list) -> dict:
+        # reads the settings into the model and returns what changed, like refresh_shadow() but without the
+        # unreported changes
+        command = ";".join(f"{query} CH{channel}" for channel in channels for query in SHADOW_QUERIES)
+
+        with self._lock:
+            fields = [field.strip() for field in self._psu.query(command).strip().split(';')]
+            if len(fields) != len(channels) * len(SHADOW_QUERIES):
+                raise ValueError(f"Expected {len(channels) * len(SHADOW_QUERIES)} fields in settings reply, "
+                                 f"got {';'.join(fields)!r}")
+
+            changes = {}
+            for index, channel in enumerate(channels):
+                applied, ovp_value, ocp_value, ovp_state, ocp_state, output_state = \
+                    fields[index * len(SHADOW_QUERIES):(index + 1) * len(SHADOW_QUERIES)]
+                applied = applied.split(',')
+                state = {
+                    "voltage": float(applied[1]),
+                    "current": float(applied[2]),
+                    "voltage_limit": float(ovp_value),
+                    "current_limit": float(ocp_value),
+                    "ovp_enabled": ovp_state == "ON",
+                    "ocp_enabled": ocp_state == "ON",
+                    "output": output_state == "ON",
+                }
+
+                previous = self._shadow.get(channel)
+                if previous is not None:
+                    changed = {name: (previous[name], value) for name, value in state.items()
+                               if previous[name] != value}
+                    if changed:
+                        changes[channel] = changed
+                self._shadow[channel] = state
+                self._stale.discard(channel)
+
+        return changes
+
+    def get_channel_settings(self, channels: list, refresh: bool = False):
+        """
+        Returns the settings of the given channels from the shadow model.
+
+        Only channels missing from the model or stale are read from the instrument (all of them with refresh=True),
+        in a single transfer. What that read changed is still reported by the next refresh_shadow().
+
+        Returns:
+        dict: channel -> voltage, current, voltage_limit, current_limit, ovp_enabled, ocp_enabled and output.
+        """
+        for channel in channels:
+            if channel not in [1, 2, 3]:
+                _print_error(f"Invalid channel {channel}.")
+                return False
 
-# psu responds with "ON" or "OFF"
-def get_output_state(device_id, channels: list):
-    output_states = dict()
-    psu = rm.open_resource(device_id)
+        with self._lock:
+            missing = list(channels) if refresh else [channel for channel in channels
+                                                      if channel not in self._shadow or channel in self._stale]
+            if missing:
+                _merge_changes(self._unreported_changes, self._read_settings(missing))
+            return {channel: dict(self._shadow[channel]) for channel in channels}
+
+    # psu responds with "YES" or "NO"
+    def get_ocp_status(self, channels: list):
+        return self._query_per_channel(":OUTPut:OCP:ALAR?", channels, None)
+
+    # psu responds with "YES" or "NO"
+    def get_ovp_status(self, channels: list):
+        return self._query_per_channel(":OUTPut:OVP:ALAR?", channels, None)
+
+    # psu responds with "CV", "CC", or "UR"
+    def get_regulation_mode(self, channels: list):
+        return self._query_per_channel(":OUTPut:CVCC?", channels, "??")
+
+    # psu responds with "ON" or "OFF", served from the shadow model when all channels are in it
+    def get_output_state(self, channels: list, refresh: bool = False):
+        with self._lock:
+            if not refresh and all(channel in self._shadow and channel not in self._stale for channel in channels):
+                return {f'CH{channel}': "ON" if self._shadow[channel]["output"] else "OFF" for channel in channels}
+
+            output_states = self._query_per_channel(":OUTPut:STATe?", channels, "??")
+            if output_states != "??":
+                for channel in channels:
+                    self._update_shadow(channel, {"output": output_states[f'CH{channel}'] == "ON"})
+            return output_states
+
+    def _query_all(self, commands: list) -> list:
+        # transports that can pipeline (socket_transport) send all queries at once and match the replies in order
+        with self._lock:
+            query_pipelined = getattr(self._psu, "query_pipelined", None)
+            if query_pipelined is not None and len(commands) > 1:
+                return query_pipelined(commands)
+            return [self._psu.query(command) for command in commands]
+
+    def _query_per_channel(self, command: str, channels: list, invalid_result):
+        for channel in channels:
+            if channel not in [1, 2, 3]:
+                print(f"what the hell mate, {channel} is an invalid channel")
+                return invalid_result
+
+        replies = self._query_all([f"{command} CH{channel}" for channel in channels])
+        return {f'CH{channel}': reply.strip('\n') for channel, reply in zip(channels, replies)}
+
+    def measure_output_voltage(self, channels: list):
+        return self._measure_per_channel(":MEAS:VOLT?", channels)
+
+    def measure_output_current(self, channels: list):
+        return self._measure_per_channel(":MEAS:CURR?", channels)
+
+    def measure_output_power(self, channels: list):
+        return self._measure_per_channel(":MEAS:POWE?", channels)
+
+    def _measure_per_channel(self, command: str, channels: list):
+        replies = self._query_all([f"{command} CH{channel}" for channel in channels])
+        return {channel: float(reply.strip("\n")) for channel, reply in zip(channels, replies)}
+
+    def measure_all(self, channels: list):
+        measurements_dict = {}
+
+        replies = self._query_all([f":MEAS:ALL? CH{channel}" for channel in channels])
+        for channel, reply in zip(channels, replies):
+            channel_results = reply.strip('\n').split(',')
+            measurements_dict[channel] = {
+                "voltage": float(channel_results[0]),
+                "current": float(channel_results[1]),
+                "power": float(channel_results[2]),
+            }
+
+        return measurements_dict
+
+    def snapshot(self, channels: list):
+        """
+        Reads V/I/P, regulation mode, output state and OVP/OCP alarms of all channels in one round-trip.
+
+        The alarms come from the questionable condition register read in the same transfer. Only when it flags a
+        channel whose alarms aren't known yet (or whose output is on again) are that channel's OVP/OCP alarms read,
+        in a second transfer.
+
+        Parameters:
+        channels (list): The channels to read, 1, 2 and/or 3.
+
+        Returns:
+        dict: ChannelSnapshot per channel number, or None if a channel is invalid.
+        """
+        for channel in channels:
+            if channel not in [1, 2, 3]:
+                _print_error(f"Invalid channel {channel}.")
+                return None
+
+        with self._lock:
+            reply = self._psu.query(build_snapshot_command(channels))
+            snapshots, flagged = parse_snapshot_reply(channels, reply, self._alarms)
+            for channel in channels:
+                if channel not in flagged:
+                    self._alarms.pop(channel, None)
+            # a channel that got its output back may have tripped the other protection since, read it again too
+            unknown = [channel for channel in sorted(flagged)
+                       if channel not in self._alarms or snapshots[channel].output_enabled]
+            if unknown:
+                self._alarms.update(self._read_alarms(unknown))
+                snapshots, _ = parse_snapshot_reply(channels, reply, self._alarms)
+            # outputs also switch off on OVP/OCP trips, keep the model in line with what was just read
+            for channel, channel_snapshot in snapshots.items():
+                self._update_shadow(channel, {"output": channel_snapshot.output_enabled})
+
+        return snapshots
+
+    def _read_alarms(self, channels: list) -> dict:
+        command = ";".join(f"{query} CH{channel}" for channel in channels for query in ALARM_QUERIES)
+        fields = [field.strip() for field in self._psu.query(command).strip().split(';')]
+        if len(fields) != len(channels) * len(ALARM_QUERIES):
+            raise ValueError(f"Expected {len(channels) * len(ALARM_QUERIES)} fields in alarm reply, "
+                             f"got {';'.join(fields)!r}")
+        return {channel: (fields[2 * index] == "YES", fields[2 * index + 1] == "YES")
+                for index, channel in enumerate(channels)}
+
+    def read_status_summary(self) -> StatusSummary:
+        """ Reads the status byte and the instrument summary registers in one transfer (see STATUS_SUMMARY_QUERY). """
+        with self._lock:
+            fields = self._psu.query(STATUS_SUMMARY_QUERY).strip().split(';')
+        if len(fields) != 4:
+            raise ValueError(f"Expected 4 fields in status summary reply, got {';'.join(fields)!r}")
+        return StatusSummary(int(float(fields[0])), _channels_from_register(fields[1]),
+                             _channels_from_register(fields[2]), _channels_from_register(fields[3]))
+
+    def read_events(self, channels: list) -> dict:
+        """
+        Reads OVP/OCP alarms, regulation mode and output state of the given channels in one transfer.
+
+        Meant to follow a read_status_summary() that flagged these channels.
+
+        Returns:
+        dict: channel -> {"ovp_tripped", "ocp_tripped", "regulation_mode", "output_enabled"}.
+        """
+        command = ";".join(f"{query} CH{channel}" for channel in channels for query in EVENT_QUERIES)
+        with self._lock:
+            fields = [field.strip() for field in self._psu.query(command).strip().split(';')]
+            if len(fields) != len(channels) * len(EVENT_QUERIES):
+                raise ValueError(f"Expected {len(channels) * len(EVENT_QUERIES)} fields in event reply, "
+                                 f"got {';'.join(fields)!r}")
+
+            events = {}
+            for index, channel in enumerate(channels):
+                ovp, ocp, mode, output = fields[index * len(EVENT_QUERIES):(index + 1) * len(EVENT_QUERIES)]
+                events[channel] = {"ovp_tripped": ovp == "YES", "ocp_tripped": ocp == "YES",
+                                   "regulation_mode": mode, "output_enabled": output == "ON"}
+                self._update_shadow(channel, {"output": output == "ON"})
+                if ovp == "YES" or ocp == "YES":
+                    self._alarms[channel] = (ovp == "YES", ocp == "YES")
+        return events
+
+
+# one session per resource string, shared by every caller of the functions below
+_sessions = dict()
+_sessions_lock = threading.Lock()
+
+
+def get_session(dp8_instrument_id: str) -> DP832Session:
+    """
+    Returns the shared session for the given instrument, opening it on first use and again after it was closed.
+
+    Parameters:
+    dp8_instrument_id (str): The VISA resource string of the power supply, or "dp832d://host:port" to go through a
+    dp832_daemon, in which case a DaemonSession with the same interface is returned.
+
+    Returns:
+    DP832Session: The open session for the instrument.
+    """
+    with _sessions_lock:
+        session = _sessions.get(dp8_instrument_id)
+        if session is None or session.closed:
+            if dp8_instrument_id.startswith("dp832d://"):
+                import dp832_daemon
+                session = dp832_daemon.DaemonSession(dp8_instrument_id)
+            else:
+                session = DP832Session(dp8_instrument_id)
+            _sessions[dp8_instrument_id] = session
+        return session
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"what the hell mate, {channel} is an invalid channel")
-            psu.close()
-            return "??"
 
-        output_states[f'CH{channel}'] = psu.query(f":OUTPut:STATe? CH{channel}").strip('\n')
+def has_session(dp8_instrument_id: str) -> bool:
+    """ True when get_session() would return an already open session for the instrument. """
+    with _sessions_lock:
+        session = _sessions.get(dp8_instrument_id)
+        return session is not None and not session.closed
 
-    psu.close()
-    return output_states
 
+def close_session(dp8_instrument_id: str):
+    with _sessions_lock:
+        session = _sessions.pop(dp8_instrument_id, None)
+    if session is not None:
+        session.close()
 
-def configure_voltage(dp8_instrument_id: str, channels: list, voltage: float):
-    psu = rm.open_resource(dp8_instrument_id)
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"{Fore.RED}Error: Invalid channel {channel}.")
-            return False
-        if channel in [1, 2] and not 0 <= voltage <= 32.000:
-            print(f"{Fore.RED}Error: Voltage for CH{channel} is outside the 0.000 - 32.000 V range.")
-            return False
-        if channel == 3 and not 0 <= voltage <= 5.300:
-            print(f"{Fore.RED}Error: Voltage for CH3 is outside the 0.000 - 5.300 V range.")
-            return False
+def close_all_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
 
-        # configure channel
-        psu.write(f":APPL CH{channel}, {voltage:.3f}")
-        reply = psu.query(f":APPL? CH{channel}")
 
-        valid_reply_ch1_ch2_dp832a = f"CH{channel}:30V/3A,{voltage:.3f}"
-        valid_reply_ch1_ch2_dp832 = f"CH{channel}:30V/3A,{voltage:.2f}"
+def set_channel_output_state(dp8_instrument_id: str, channels: list, state: str, verification: str = None):
+    return get_session(dp8_instrument_id).set_channel_output_state(channels, state, verification)
 
-        valid_reply_ch3_dp832a = f"CH{channel}:5V/3A,{voltage:.3f}"
-        valid_reply_ch3_dp832 = f"CH{channel}:5V/3A,{voltage:.2f}"
 
-        if channel in [1, 2]:
-            if valid_reply_ch1_ch2_dp832a in reply or valid_reply_ch1_ch2_dp832 in reply:
-                print(f"Configured DP832 CH{channel} to {voltage:.3f} V")
-            else:
-                print(
-                    f"{Fore.RED}Error: Configuration for DP832(A) channel CH{channel} failed. Expected part of {valid_reply_ch1_ch2_dp832a} or {valid_reply_ch1_ch2_dp832}, got {reply}")
-                sys.exit()
-        elif channel == 3:
-            if valid_reply_ch3_dp832a in reply or valid_reply_ch3_dp832 in reply:
-                print(f"Configured DP832 CH{channel} to {voltage:.3f} V")
-            else:
-                print(
-                    f"{Fore.RED}Error: Configuration for DP832(A) channel CH{channel} failed. Expected part of {valid_reply_ch3_dp832a} or {valid_reply_ch3_dp832}, got {reply}")
-                sys.exit()
+def set_ovp_state(dp8_instrument_id: str, channels: list, state: str, verification: str = None):
+    return get_session(dp8_instrument_id).set_ovp_state(channels, state, verification)
 
-    psu.close()
-    return True
 
+def set_ocp_state(dp8_instrument_id: str, channels: list, state: str, verification: str = None):
+    return get_session(dp8_instrument_id).set_ocp_state(channels, state, verification)
 
-def configure_current(dp8_instrument_id: str, channels: list, current: float):
-    psu = rm.open_resource(dp8_instrument_id)
 
-    print(f"tryna set CH {channels} to {current:.3f}")
+def get_channel_settings(dp8_instrument_id: str, channels: list, refresh: bool = False):
+    return get_session(dp8_instrument_id).get_channel_settings(channels, refresh)
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"{Fore.RED}Error: Invalid channel {channel}.")
-            return False
-        if not 0 <= current <= 3.200:
-            print(f"{Fore.RED}Error: Current for CH{channel} is outside the 0.000 - 3.200 A range.")
-            return False
 
-        # configure channel
-        psu.write(f":SOURce[{channel}]:CURR {current}")
-        reply = psu.query(f":SOURce[{channel}]:CURR?")
+# psu responds with "YES" or "NO"
+def get_ocp_status(device_id, channels: list):
+    return get_session(device_id).get_ocp_status(channels)
 
-        if current == float(reply.strip()):
-            print(f"Configured DP832 CH{channel} to {current:.3f} A")
-        else:
-            print(
-                f"{Fore.RED}Error: Configuration for DP832(A) channel CH{channel} failed. Expected reply {current}, got {reply}")
-            return False
 
-    psu.close()
-    return True
+# psu responds with "YES" or "NO"
+def get_ovp_status(device_id, channels: list):
+    return get_session(device_id).get_ovp_status(channels)
 
 
-def configure_voltage_limit(dp8_instrument_id: str, channels: list, voltage_limit: float):
-    psu = rm.open_resource(dp8_instrument_id)
+# psu responds with "CV", "CC", or "UR"
+def get_regulation_mode(device_id, channels: list):
+    return get_session(device_id).get_regulation_mode(channels)
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"{Fore.RED}Error: Invalid channel {channel}.")
-            return False
 
-        # Ensure that the correct voltage limit range is enforced per channel
-        if channel in [1, 2] and not 0 <= voltage_limit <= 32.000:
-            print(f"{Fore.RED}Error: Voltage limit for CH{channel} is outside the 0.000 - 32.000 V range.")
-            return False
-        if channel == 3 and not 0 <= voltage_limit <= 5.300:
-            print(f"{Fore.RED}Error: Voltage limit for CH3 is outside the 0.000 - 5.300 V range.")
-            return False
+# psu responds with "ON" or "OFF"
+def get_output_state(device_id, channels: list, refresh: bool = False):
+    return get_session(device_id).get_output_state(channels, refresh)
 
-        try:
-            # Set voltage protection for the correct channel using explicit formatting
-            psu.write(f":OUTP:OVP:VAL CH{channel},{voltage_limit:.3f}")
 
-            # Verify the voltage limit was correctly set by querying the channel again
-            reply = psu.query(f":OUTP:OVP:VAL? CH{channel}")
+def configure_voltage(dp8_instrument_id: str, channels: list, voltage: float, verification: str = None):
+    return get_session(dp8_instrument_id).configure_voltage(channels, voltage, verification)
 
-            if abs(float(reply.strip()) - voltage_limit) < 1e-3:
-                print(f"Voltage limit successfully set to {voltage_limit:.3f} V on CH{channel}")
-            else:
-                print(
-                    f"{Fore.RED}Error: Failed to verify voltage limit on CH{channel}. Expected {voltage_limit:.3f}, got {reply}")
-                return False
 
-        except Exception as e:
-            print(f"{Fore.RED}Exception occurred while setting voltage limit on CH{channel}: {str(e)}")
-            return False
+def configure_current(dp8_instrument_id: str, channels: list, current: float, verification: str = None):
+    return get_session(dp8_instrument_id).configure_current(channels, current, verification)
 
-    psu.close()
-    return True
 
+def configure_voltage_limit(dp8_instrument_id: str, channels: list, voltage_limit: float, verification: str = None):
+    return get_session(dp8_instrument_id).configure_voltage_limit(channels, voltage_limit, verification)
 
-def configure_current_limit(dp8_instrument_id: str, channels: list, current_limit: float):
-    psu = rm.open_resource(dp8_instrument_id)
 
-    for channel in channels:
-        if channel not in [1, 2, 3]:
-            print(f"{Fore.RED}Error: Invalid channel {channel}.")
-            return False
-        if not 0 <= current_limit <= 3.200:
-            print(f"{Fore.RED}Error: Current limit for CH{channel} is outside the 0.000 - 3.200 A range.")
-            return False
+def configure_current_limit(dp8_instrument_id: str, channels: list, current_limit: float, verification: str = None):
+    return get_session(dp8_instrument_id).configure_current_limit(channels, current_limit, verification)
 
-        try:
-            # Set current protection for the correct channel using explicit formatting
-            psu.write(f":OUTP:OCP:VAL CH{channel},{current_limit:.3f}")
 
-            # Verify the current limit was correctly set by querying the channel again
-            reply = psu.query(f":OUTP:OCP:VAL? CH{channel}")
+def configure_channel_static(dp8_instrument_id: str, channels: list, voltage: float, current: float,
+                             verification: str = None):
+    return get_session(dp8_instrument_id).configure_channel_static(channels, voltage, current, verification)
 
-            if abs(float(reply.strip()) - current_limit) < 1e-3:
-                print(f"Current limit successfully set to {current_limit:.3f} A on CH{channel}")
-            else:
-                print(
-                    f"{Fore.RED}Error: Failed to verify current limit on CH{channel}. Expected {current_limit:.3f}, got {reply}")
-                return False
 
-        except Exception as e:
-            print(f"{Fore.RED}Exception occurred while setting current limit on CH{channel}: {str(e)}")
-            return False
-
-    psu.close()
-    return True
-
-
-def configure_channel_static(dp8_instrument_id: str, channels: list, voltage: float, current: float):
-    psu = rm.open_resource(dp8_instrument_id)
-
-    for channel in channels:
-        # perform input check
-        if channel not in [1, 2, 3]:
-            print(
-                f"{Fore.RED}Error: Tried to configure an invalid channel of DP832 with ID {dp8_instrument_id}: CH{channel} - accepted values are ['CH1' | 'CH2' | 'CH3'] (str) ")
-            sys.exit()
-        if not 0 <= voltage <= 32.000:
-            print(
-                f"{Fore.RED}Error: Attempted to set voltage of DP832 channel CH{channel} to {voltage:.3f} V, which is outside of the allowable range of 0.000 - 32.000 V")
-            sys.exit()
-        if not 0 <= current <= 3.200:
-            print(
-                f"{Fore.RED}Error: Attempted to set current of DP832 channel CH{channel} to {current:.3f} A, which is outside of the allowable range of 0.000 - 3.200 A")
-            sys.exit()
-
-        # configure channel
-        psu.write(f":APPL CH{channel}, {voltage:.3f}, {current:.3f}")
-        reply = psu.query(f":APPL? CH{channel}")
-
-        valid_reply_ch1_ch2_dp832a = f"CH{channel}:30V/3A,{voltage:.3f},{current:.3f}\n"
-        valid_reply_ch1_ch2_dp832 = f"CH{channel}:30V/3A,{voltage:.2f},{current:.3f}\n"
-
-        valid_reply_ch3_dp832a = f"CH{channel}:5V/3A,{voltage:.3f},{current:.3f}\n"
-        valid_reply_ch3_dp832 = f"CH{channel}:5V/3A,{voltage:.2f},{current:.3f}\n"
-
-        if channel in [1, 2]:
-            if reply == valid_reply_ch1_ch2_dp832a:
-                print(f"Configured DP832A CH{channel} to {voltage:.3f} V, {current:.3f} A")
-            elif reply == valid_reply_ch1_ch2_dp832:
-                print(f"Configured DP832 CH{channel} to {voltage:.2f} V, {current:.3f} A")
-            else:
-                print(
-                    f"{Fore.RED}Error: Configuration for DP832(A) channel CH{channel} failed. Expected {valid_reply_ch1_ch2_dp832a} or {valid_reply_ch1_ch2_dp832}, got {reply}")
-                sys.exit()
-        elif channel in [3]:
-            if reply == valid_reply_ch3_dp832a:
-                print(f"Configured DP832A CH{channel} to {voltage:.3f} V, {current:.3f} A")
-            elif reply == valid_reply_ch3_dp832:
-                print(f"Configured DP832 CH{channel} to {voltage:.2f} V, {current:.3f} A")
-            else:
-                print(
-                    f"{Fore.RED}Error: Configuration for DP832(A) channel CH{channel} failed. Expected {valid_reply_ch3_dp832a} or {valid_reply_ch3_dp832}, got {reply}")
-                sys.exit()
-    psu.close()
-    return True
+def measure_output_voltage(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).measure_output_voltage(channels)
 
 
-def measure_output_voltage(dp8_instrument_id: str, channels: list):
-    psu = rm.open_resource(dp8_instrument_id)
-    measurements_dict = {}
+def measure_output_current(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).measure_output_current(channels)
 
-    for channel in channels:
-        measurements_dict[channel] = float(psu.query(f":MEAS:VOLT? CH{channel}").strip("\n"))
 
-    psu.close()
-    return measurements_dict
+def measure_output_power(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).measure_output_power(channels)
 
 
-def measure_output_current(dp8_instrument_id: str, channels: list):
-    psu = rm.open_resource(dp8_instrument_id)
-    measurements_dict = {}
+def measure_all(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).measure_all(channels)
 
-    for channel in channels:
-        measurements_dict[channel] = float(psu.query(f":MEAS:CURR? CH{channel}").strip("\n"))
 
-    psu.close()
-    return measurements_dict
+def snapshot(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).snapshot(channels)
 
 
-def measure_output_power(dp8_instrument_id: str, channels: list):
-    psu = rm.open_resource(dp8_instrument_id)
-    measurements_dict = {}
+def refresh_shadow(dp8_instrument_id: str, channels: list = (1, 2, 3)):
+    return get_session(dp8_instrument_id).refresh_shadow(list(channels))
 
-    for channel in channels:
-        measurements_dict[channel] = float(psu.query(f":MEAS:POWE? CH{channel}").strip("\n"))
 
-    psu.close()
-    return measurements_dict
+def read_status_summary(dp8_instrument_id: str):
+    return get_session(dp8_instrument_id).read_status_summary()
 
 
-def measure_all(dp8_instrument_id: str, channels: list):
-    psu = rm.open_resource(dp8_instrument_id)
-    measurements_dict = {}
-    for channel in channels:
-        channel_results = psu.query(f":MEAS:ALL? CH{channel}").strip('\n').split(',')
-        measurements_dict[channel] = {
-            "voltage": float(channel_results[0]),
-            "current": float(channel_results[1]),
-            "power": float(channel_results[2]),
-        }
-    psu.close()
-    return measurements_dict
+def read_events(dp8_instrument_id: str, channels: list):
+    return get_session(dp8_instrument_id).read_events(channels)
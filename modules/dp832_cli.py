@@ -0,0 +1,294 @@
+"""
+Command line interface to a DP832(A) for scripts and CI jobs, without the GUI.
+
+    python modules/dp832_cli.py [--backend sim] [--json] COMMAND RESOURCE [options]
+
+Commands:
+    discover                 List the connected supplies (no RESOURCE).
+    set RESOURCE             Change setpoints, limits, OVP/OCP enables and outputs of --channels.
+    measure RESOURCE         Print V/I/P of --channels.
+    snapshot RESOURCE        Print V/I/P, regulation mode, output state and alarms of --channels.
+    log RESOURCE FILE        Append snapshots to a .csv or .jsonl file every --interval seconds.
+    run RESOURCE SCRIPT      Run a script of commands over one session, SCRIPT "-" reads stdin.
+
+Script lines are the commands above without the resource, plus "sleep SECONDS". Blank lines and lines starting
+with '#' are skipped:
+
+    set --channels 1 --voltage 5 --current 0.5 --output ON
+    sleep 0.5
+    snapshot --channels 1
+
+Only the modules a command needs are imported (no tkinter, no pyvisa before the first transfer), so a call costs
+little more than the interpreter start; benchmarks/bench_import.py checks the startup budget. Exits non-zero when a
+command fails, with the errors on stderr.
+"""
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+
+CHANNELS = (1, 2, 3)
+LOG_FIELDS = ("timestamp", "channel", "voltage", "current", "power", "regulation_mode", "output_enabled",
+              "ovp_tripped", "ocp_tripped")
+
+
+def _on_off(value: str) -> str:
+    state = value.upper()
+    if state not in ("ON", "OFF"):
+        raise argparse.ArgumentTypeError(f"expected ON or OFF, got {value!r}")
+    return state
+
+
+def _add_channels(parser, default=CHANNELS):
+    parser.add_argument("--channels", "-c", type=int, nargs='+', choices=CHANNELS, default=list(default),
+                        help="Channels to act on (default: %(default)s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="dp832_cli", description="Control a Rigol DP832(A) from the command line.")
+    parser.add_argument("--backend", help="VISA backend, e.g. '@py' or 'sim' (default: $DP832_VISA_BACKEND)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    discover = commands.add_parser("discover", help="List the connected supplies")
+    discover.add_argument("--pattern", default="DP8", help="Text the *IDN? reply must contain")
+    discover.add_argument("--timeout", type=float, default=2.0, help="Seconds allowed per resource")
+    discover.add_argument("--deadline", type=float, default=5.0, help="Seconds allowed for the whole scan")
+    discover.add_argument("--no-cache", action="store_true", help="Don't update the discovery cache")
+
+    set_parser = commands.add_parser("set", help="Change settings, in one batched transfer per setting")
+    set_parser.add_argument("resource")
+    _add_channels(set_parser, default=())
+    set_parser.add_argument("--voltage", "-v", type=float, help="Voltage setpoint (V)")
+    set_parser.add_argument("--current", "-i", type=float, help="Current setpoint (A)")
+    set_parser.add_argument("--ovp", type=float, help="OVP level (V)")
+    set_parser.add_argument("--ocp", type=float, help="OCP level (A)")
+    set_parser.add_argument("--ovp-state", type=_on_off, help="ON or OFF")
+    set_parser.add_argument("--ocp-state", type=_on_off, help="ON or OFF")
+    set_parser.add_argument("--output", type=_on_off, help="ON or OFF, applied after everything else")
+    set_parser.add_argument("--verification", choices=("batch", "strict"), help="See DP832Session")
+
+    for name, help_text in (("measure", "Print V/I/P"), ("snapshot", "Print V/I/P, mode, output and alarms")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("resource")
+        _add_channels(command)
+
+    log = commands.add_parser("log", help="Append snapshots to a .csv or .jsonl file")
+    log.add_argument("resource")
+    log.add_argument("file", help="Output file, JSON lines if it ends in .jsonl, CSV otherwise")
+    _add_channels(log)
+    log.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    log.add_argument("--duration", type=float, help="Stop after this many seconds (default: until Ctrl+C)")
+    log.add_argument("--samples", type=int, help="Stop after this many samples")
+
+    run = commands.add_parser("run", help="Run a script of commands over one session")
+    run.add_argument("resource")
+    run.add_argument("script", help="Script file, '-' for stdin")
+    run.add_argument("--keep-going", action="store_true", help="Run the remaining lines after a failing one")
+
+    return parser
+
+
+def _print_result(args, data, text_lines):
+    if args.json:
+        print(json.dumps(data))
+    else:
+        for line in text_lines:
+            print(line)
+
+
+def _fail(errors: list) -> int:
+    for error in errors:
+        print(f"Error: {error}", file=sys.stderr)
+    return 1
+
+
+def cmd_discover(args) -> int:
+    import find_instrument
+
+    devices = []
+    find_instrument.find_devices_by_pattern(args.pattern, args.timeout, args.deadline,
+                                            on_found=lambda resource, idn: devices.append((resource, idn.strip())),
+                                            use_cache=not args.no_cache)
+    _print_result(args, [{"resource": resource, "idn": idn} for resource, idn in devices],
+                  [f"{resource}  {idn}" for resource, idn in devices])
+    return 0 if devices else 1
+
+
+def cmd_set(args) -> int:
+    import dp832
+
+    if not args.channels:
+        return _fail(["set needs --channels"])
+    session = dp832.get_session(args.resource)
+    channels, verification = args.channels, args.verification
+
+    # limits before setpoints so raising both in one call doesn't trip, outputs last
+    steps = []
+    if args.ovp is not None:
+        steps.append(lambda: session.configure_voltage_limit(channels, args.ovp, verification))
+    if args.ocp is not None:
+        steps.append(lambda: session.configure_current_limit(channels, args.ocp, verification))
+    if args.voltage is not None and args.current is not None:
+        steps.append(lambda: session.configure_channel_static(channels, args.voltage, args.current, verification))
+    elif args.voltage is not None:
+        steps.append(lambda: session.configure_voltage(channels, args.voltage, verification))
+    elif args.current is not None:
+        steps.append(lambda: session.configure_current(channels, args.current, verification))
+    if args.ovp_state is not None:
+        steps.append(lambda: session.set_ovp_state(channels, args.ovp_state, verification))
+    if args.ocp_state is not None:
+        steps.append(lambda: session.set_ocp_state(channels, args.ocp_state, verification))
+    if args.output is not None:
+        steps.append(lambda: session.set_channel_output_state(channels, args.output, verification))
+    if not steps:
+        return _fail(["set needs at least one of --voltage, --current, --ovp, --ocp, --ovp-state, --ocp-state, "
+                      "--output"])
+
+    for step in steps:
+        result = step()
+        if not result:
+            return _fail(result.errors)
+    return 0
+
+
+def cmd_measure(args) -> int:
+    import dp832
+
+    measurements = dp832.get_session(args.resource).measure_all(args.channels)
+    _print_result(args, {str(channel): values for channel, values in measurements.items()},
+                  [f"CH{channel}  {values['voltage']:7.3f} V  {values['current']:6.4f} A  {values['power']:7.3f} W"
+                   for channel, values in measurements.items()])
+    return 0
+
+
+def _format_snapshot(snapshot) -> str:
+    alarms = " ".join(name for name, tripped in (("OVP", snapshot.ovp_tripped), ("OCP", snapshot.ocp_tripped))
+                      if tripped)
+    return (f"CH{snapshot.channel}  {snapshot.voltage:7.3f} V  {snapshot.current:6.4f} A  {snapshot.power:7.3f} W  "
+            f"{snapshot.regulation_mode}  {'ON' if snapshot.output_enabled else 'OFF'}  {alarms}").rstrip()
+
+
+def cmd_snapshot(args) -> int:
+    import dataclasses
+    import dp832
+
+    snapshots = dp832.get_session(args.resource).snapshot(args.channels)
+    _print_result(args, {str(channel): dataclasses.asdict(snapshot) for channel, snapshot in snapshots.items()},
+                  [_format_snapshot(snapshot) for snapshot in snapshots.values()])
+    return 0
+
+
+def cmd_log(args) -> int:
+    import csv
+    import dp832
+    from scheduler import DeadlineScheduler
+
+    session = dp832.get_session(args.resource)
+    as_json = args.file.endswith(".jsonl")
+    write_header = not as_json and (not os.path.exists(args.file) or os.path.getsize(args.file) == 0)
+    scheduler = DeadlineScheduler(args.interval)
+    end = time.monotonic() + args.duration if args.duration is not None else None
+    samples = 0
+
+    with open(args.file, "a", newline="") as file:
+        writer = None if as_json else csv.writer(file)
+        if write_header:
+            writer.writerow(LOG_FIELDS)
+        try:
+            while args.samples is None or samples < args.samples:
+                scheduler.wait()  # the first sample is taken right away
+                if end is not None and time.monotonic() >= end:
+                    break
+                timestamp = time.time()
+                for snapshot in session.snapshot(args.channels).values():
+                    row = (timestamp, snapshot.channel, snapshot.voltage, snapshot.current, snapshot.power,
+                           snapshot.regulation_mode, snapshot.output_enabled, snapshot.ovp_tripped,
+                           snapshot.ocp_tripped)
+                    if as_json:
+                        file.write(json.dumps(dict(zip(LOG_FIELDS, row))) + "\n")
+                    else:
+                        writer.writerow(row)
+                file.flush()
+                samples += 1
+        except KeyboardInterrupt:
+            pass
+
+    timing = scheduler.stats()
+    print(f"Logged {samples} samples to {args.file} ({timing['missed']} missed deadlines)", file=sys.stderr)
+    return 0
+
+
+def _read_script(path: str) -> list:
+    if path == "-":
+        return sys.stdin.read().splitlines()
+    with open(path) as file:
+        return file.read().splitlines()
+
+
+def cmd_run(args) -> int:
+    parser = build_parser()
+    failed = 0
+
+    for number, line in enumerate(_read_script(args.script), start=1):
+        tokens = shlex.split(line, comments=True)
+        if not tokens:
+            continue
+        command, options = tokens[0], tokens[1:]
+
+        if command == "sleep":
+            time.sleep(float(options[0]))
+            continue
+        if command in ("run", "discover"):
+            status = _fail([f"line {number}: '{command}' can't be used in a script"])
+        else:
+            try:
+                # every line reuses the cached session of the resource, so the script runs over one connection
+                line_args = parser.parse_args([command, args.resource] + options)
+            except SystemExit:
+                status = _fail([f"line {number}: {line.strip()}"])
+            else:
+                line_args.json = args.json
+                try:
+                    status = COMMANDS[command](line_args)
+                except Exception as e:
+                    status = _fail([f"line {number}: {e}"])
+
+        if status:
+            failed += 1
+            if not args.keep_going:
+                return status
+    return 1 if failed else 0
+
+
+COMMANDS = {
+    "discover": cmd_discover,
+    "set": cmd_set,
+    "measure": cmd_measure,
+    "snapshot": cmd_snapshot,
+    "log": cmd_log,
+    "run": cmd_run,
+}
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.backend is not None:
+        import visa_backend
+
+        visa_backend.set_backend(args.backend)
+
+    try:
+        return COMMANDS[args.command](args)
+    except Exception as e:
+        return _fail([str(e)])
+    finally:
+        if "dp832" in sys.modules:
+            sys.modules["dp832"].close_all_sessions()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
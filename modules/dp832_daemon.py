@@ -0,0 +1,536 @@
+"""
+Headless daemon that owns one DP832 and shares it with any number of local clients.
+
+The daemon holds the only VISA session to the supply and runs the only AcquisitionEngine. Clients connect over TCP
+and exchange newline-delimited JSON:
+
+    request:  {"id": 1, "method": "configure_voltage", "args": [[1], 5.0]}
+    reply:    {"id": 1, "result": ...} or {"id": 1, "error": "..."}
+    events:   {"event": "snapshot", "timestamp": ..., "snapshot": ...}, {"event": "settings", "settings": ...},
+              {"event": "error", "channel": 1, "message": "..."}, {"event": "protection", "protection": ...}
+
+"method" is any DP832Session method in REMOTE_METHODS, or "subscribe" / "unsubscribe" (args: [channels]) and
+"subscribe_settings" to receive events. The engine polls the union of all subscribed channels once per cycle, so N
+readers cost one poll. Protection events (OVP/OCP trips, output and CV/CC changes from the engine's
+protection.ProtectionMonitor) go to the clients subscribed to their channel and are never dropped.
+
+Clients use the address "dp832d://host:port" wherever a VISA resource string is accepted: dp832.get_session() then
+returns a DaemonSession, and DaemonAcquisitionEngine replaces AcquisitionEngine.
+
+Run with: python dp832_daemon.py RESOURCE [--host 127.0.0.1] [--port 5832] [--refresh-rate 2]
+"""
+import dataclasses
+import itertools
+import json
+import queue
+import socket
+import threading
+
+import dp832
+from acquisition import AcquisitionEngine
+from protection import ProtectionEvent
+
+DAEMON_SCHEME = "dp832d://"
+DEFAULT_PORT = 5832
+
+# DP832Session methods clients may call
+REMOTE_METHODS = (
+    "set_channel_output_state", "set_ovp_state", "set_ocp_state", "configure_voltage", "configure_current",
+    "configure_voltage_limit", "configure_current_limit", "configure_channel_static", "get_channel_settings",
+    "get_ocp_status", "get_ovp_status", "get_regulation_mode", "get_output_state", "measure_output_voltage",
+    "measure_output_current", "measure_output_power", "measure_all", "snapshot", "refresh_shadow", "write_batch",
+    "query",
+)
+
+# events queued per client before further snapshot events are dropped for it, replies are never dropped
+CLIENT_QUEUE_SIZE = 256
+# seconds a reply or protection event waits for room in a full client queue before that client is disconnected
+CLIENT_SEND_TIMEOUT = 2.0
+
+
+def is_daemon_address(address: str) -> bool:
+    return isinstance(address, str) and address.startswith(DAEMON_SCHEME)
+
+
+def parse_daemon_address(address: str):
+    """ "dp832d://host:port" -> (host, port), the port defaults to DEFAULT_PORT. """
+    host, _, port = address[len(DAEMON_SCHEME):].rstrip('/').partition(':')
+    return host or "127.0.0.1", int(port) if port else DEFAULT_PORT
+
+
+def encode(value):
+    """ Turns driver return values into JSON-compatible values that decode() restores. """
+    if isinstance(value, dp832.ConfigurationResult):
+        return {"__type__": "ConfigurationResult", "ok": value.ok, "errors": list(value.errors)}
+    if isinstance(value, dp832.ChannelSnapshot):
+        return dict(dataclasses.asdict(value), __type__="ChannelSnapshot")
+    if isinstance(value, ProtectionEvent):
+        return dict(dataclasses.asdict(value), __type__="ProtectionEvent")
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: encode(item) for key, item in value.items()}
+        # channel-keyed dicts, JSON objects only have string keys
+        return {"__type__": "dict", "items": [[encode(key), encode(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return value
+
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    kind = value.get("__type__")
+    if kind == "ConfigurationResult":
+        return dp832.ConfigurationResult(value["ok"], value["errors"])
+    if kind == "ChannelSnapshot":
+        return dp832.ChannelSnapshot(**{name: item for name, item in value.items() if name != "__type__"})
+    if kind == "ProtectionEvent":
+        return ProtectionEvent(**{name: item for name, item in value.items() if name != "__type__"})
+    if kind == "dict":
+        return {decode(key): decode(item) for key, item in value["items"]}
+    return {key: decode(item) for key, item in value.items()}
+
+
+class _Client:
+    """ One connected client on the daemon side: its subscriptions and a writer thread draining its queue. """
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.channels = set()
+        self.settings = False
+        self.outbox = queue.Queue(CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.disconnected = False
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def send(self, message: dict, droppable: bool = False):
+        if self.disconnected:
+            return
+        line = (json.dumps(message) + "\n").encode()
+        if droppable:
+            try:
+                self.outbox.put_nowait(line)
+            except queue.Full:
+                self.dropped += 1  # slow reader, it must not stall the acquisition loop
+            return
+        try:
+            self.outbox.put(line, timeout=CLIENT_SEND_TIMEOUT)
+        except queue.Full:
+            # a client that stopped reading must not hold up the protection monitor (and with it every other client)
+            self.disconnect()
+
+    def disconnect(self):
+        """ Cuts the connection, which also ends a send the writer is stuck in and the daemon's reads. """
+        self.disconnected = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+
+    def close(self):
+        try:
+            self.outbox.put_nowait(None)
+        except queue.Full:
+            self.disconnect()
+
+    def _write_loop(self):
+        while True:
+            line = self.outbox.get()
+            if line is None:
+                break
+            try:
+                self.connection.sendall(line)
+            except OSError:
+                break
+
+
+class DP832Daemon:
+    """
+    Serves one instrument to local clients, see the module docstring for the protocol.
+
+    Parameters:
+    dp8_instrument_id (str): The VISA resource string of the power supply.
+    host (str): Interface to listen on, loopback by default.
+    port (int): Port to listen on, 0 picks a free one (see self.port after start()).
+    refresh_rate (float): Acquisition cycles per second.
+    protection_interval (float): Seconds between the protection monitor's status reads, None to run none.
+    """
+
+    def __init__(self, dp8_instrument_id: str, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 refresh_rate: float = 2, protection_interval: float = 0.2):
+        self.instrument = dp8_instrument_id
+        self.host = host
+        self.port = port
+        dp832.get_session(dp8_instrument_id)  # opened now, so a wrong resource fails here and not on the first call
+        self.engine = AcquisitionEngine(dp8_instrument_id, refresh_rate=refresh_rate,
+                                        protection_interval=protection_interval)
+        self._clients = []
+        self._lock = threading.Lock()
+        self._server_socket = None
+        self._running = False
+
+        for channel in (1, 2, 3):
+            self.engine.subscribe(channel, self._on_snapshot, lambda message, channel=channel:
+                                  self._broadcast({"event": "error", "channel": channel, "message": message},
+                                                  lambda client: channel in client.channels))
+        self.engine.subscribe_settings(self._on_settings_changed)
+        self.engine.subscribe_events(self._on_protection_event)
+
+    @property
+    def address(self) -> str:
+        return f"{DAEMON_SCHEME}{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self._server_socket = socket.create_server((self.host, self.port))
+        self.port = self._server_socket.getsockname()[1]
+        self._running = True
+        self.engine.start()
+        threading.Thread(target=self._accept_loop, name="dp832 daemon", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self._server_socket is not None:
+            self._server_socket.close()
+            self._server_socket = None
+        self.engine.stop()
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+            client.connection.close()
+
+    def _broadcast(self, message: dict, wants, droppable: bool = True):
+        with self._lock:
+            clients = [client for client in self._clients if wants(client)]
+        for client in clients:
+            client.send(message, droppable=droppable)
+
+    def _on_snapshot(self, snapshot: dp832.ChannelSnapshot):
+        self._broadcast({"event": "snapshot", "timestamp": self.engine.history[snapshot.channel].latest()[0],
+                         "snapshot": encode(snapshot)}, lambda client: snapshot.channel in client.channels)
+
+    def _on_protection_event(self, event: ProtectionEvent):
+        # rare and not repeated like snapshots, a trip must not get lost on a busy client
+        self._broadcast({"event": "protection", "protection": encode(event)},
+                        lambda client: event.channel in client.channels, droppable=False)
+
+    def _on_settings_changed(self, settings: dict):
+        self._broadcast({"event": "settings", "settings": encode(settings)}, lambda client: client.settings)
+
+    def _update_polled_channels(self):
+        # poll exactly the channels at least one client is subscribed to
+        with self._lock:
+            wanted = set().union(*(client.channels for client in self._clients))
+        for channel in (1, 2, 3):
+            if channel in wanted:
+                self.engine.enable_channel(channel)
+            else:
+                self.engine.disable_channel(channel)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                connection, _ = self._server_socket.accept()
+            except OSError:
+                break
+            client = _Client(connection)
+            with self._lock:
+                self._clients.append(client)
+            threading.Thread(target=self._serve_client, args=(client,), daemon=True).start()
+
+    def _serve_client(self, client: _Client):
+        try:
+            with client.connection.makefile("rb") as stream:
+                for line in stream:
+                    if line.strip():
+                        client.send(self._handle(client, line))
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            # let the writer send what is queued, then close the socket
+            client.close()
+            client.writer.join(CLIENT_SEND_TIMEOUT)
+            client.connection.close()
+            self._update_polled_channels()
+
+    def _handle(self, client: _Client, line: bytes) -> dict:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            method = request["method"]
+            args = decode(request.get("args", []))
+
+            if method == "subscribe":
+                client.channels.update(args[0])
+                self._update_polled_channels()
+                result = sorted(client.channels)
+            elif method == "unsubscribe":
+                client.channels.difference_update(args[0])
+                self._update_polled_channels()
+                result = sorted(client.channels)
+            elif method == "subscribe_settings":
+                client.settings = True
+                result = True
+            elif method in REMOTE_METHODS:
+                # looked up per call, in case someone closed the shared session
+                result = getattr(dp832.get_session(self.instrument), method)(*args)
+            else:
+                raise ValueError(f"Unknown method {method}")
+        except Exception as e:
+            return {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+        return {"id": request_id, "result": encode(result)}
+
+
+class DaemonSession:
+    """
+    Client of a DP832Daemon with the interface of dp832.DP832Session.
+
+    dp832.get_session() returns one of these for "dp832d://host:port" addresses, so the module-level dp832 functions
+    work unchanged against the daemon.
+
+    Parameters:
+    address (str): "dp832d://host:port" of the daemon.
+    timeout (float): Seconds to wait for a reply.
+    """
+
+    def __init__(self, address: str, timeout: float = 10.0):
+        self.address = address
+        self.timeout = timeout
+        self._socket = socket.create_connection(parse_daemon_address(address), timeout=timeout)
+        self._socket.settimeout(None)
+        self._stream = self._socket.makefile("rb")
+        self._write_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._event_handlers = []
+        self._closed = False
+        threading.Thread(target=self._read_loop, name=f"daemon client {address}", daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def add_event_handler(self, on_event):
+        """ Registers on_event(message) for the snapshot, settings and error events of this connection. """
+        self._event_handlers.append(on_event)
+
+    def _read_loop(self):
+        try:
+            for line in self._stream:
+                message = json.loads(line)
+                if "event" in message:
+                    for on_event in list(self._event_handlers):
+                        on_event(message)
+                    continue
+                pending = self._pending.pop(message.get("id"), None)
+                if pending is not None:
+                    pending[1] = message
+                    pending[0].set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._closed = True
+            for pending in list(self._pending.values()):
+                pending[0].set()
+
+    def call(self, method: str, *args):
+        """ Calls a method on the daemon and returns its decoded result, raising RuntimeError on errors. """
+        if self._closed:
+            raise ConnectionError(f"Connection to {self.address} is closed")
+
+        request_id = next(self._ids)
+        pending = self._pending[request_id] = [threading.Event(), None]
+        line = json.dumps({"id": request_id, "method": method, "args": encode(list(args))}) + "\n"
+        with self._write_lock:
+            self._socket.sendall(line.encode())
+
+        if not pending[0].wait(self.timeout):
+            self._pending.pop(request_id, None)
+            raise TimeoutError(f"{self.address} did not answer {method} within {self.timeout} s")
+        reply = pending[1]
+        if reply is None:
+            raise ConnectionError(f"Connection to {self.address} closed during {method}")
+        if "error" in reply:
+            raise RuntimeError(f"{self.address}: {reply['error']}")
+        return decode(reply["result"])
+
+    def subscribe(self, channels: list):
+        return self.call("subscribe", list(channels))
+
+    def unsubscribe(self, channels: list):
+        return self.call("unsubscribe", list(channels))
+
+    def subscribe_settings(self):
+        return self.call("subscribe_settings")
+
+    def set_channel_output_state(self, channels: list, state: str, verification: str = None):
+        return self.call("set_channel_output_state", channels, state, verification)
+
+    def set_ovp_state(self, channels: list, state: str, verification: str = None):
+        return self.call("set_ovp_state", channels, state, verification)
+
+    def set_ocp_state(self, channels: list, state: str, verification: str = None):
+        return self.call("set_ocp_state", channels, state, verification)
+
+    def configure_voltage(self, channels: list, voltage: float, verification: str = None):
+        return self.call("configure_voltage", channels, voltage, verification)
+
+    def configure_current(self, channels: list, current: float, verification: str = None):
+        return self.call("configure_current", channels, current, verification)
+
+    def configure_voltage_limit(self, channels: list, voltage_limit: float, verification: str = None):
+        return self.call("configure_voltage_limit", channels, voltage_limit, verification)
+
+    def configure_current_limit(self, channels: list, current_limit: float, verification: str = None):
+        return self.call("configure_current_limit", channels, current_limit, verification)
+
+    def configure_channel_static(self, channels: list, voltage: float, current: float, verification: str = None):
+        return self.call("configure_channel_static", channels, voltage, current, verification)
+
+    def get_channel_settings(self, channels: list, refresh: bool = False):
+        return self.call("get_channel_settings", channels, refresh)
+
+    def get_ocp_status(self, channels: list):
+        return self.call("get_ocp_status", channels)
+
+    def get_ovp_status(self, channels: list):
+        return self.call("get_ovp_status", channels)
+
+    def get_regulation_mode(self, channels: list):
+        return self.call("get_regulation_mode", channels)
+
+    def get_output_state(self, channels: list, refresh: bool = False):
+        return self.call("get_output_state", channels, refresh)
+
+    def measure_output_voltage(self, channels: list):
+        return self.call("measure_output_voltage", channels)
+
+    def measure_output_current(self, channels: list):
+        return self.call("measure_output_current", channels)
+
+    def measure_output_power(self, channels: list):
+        return self.call("measure_output_power", channels)
+
+    def measure_all(self, channels: list):
+        return self.call("measure_all", channels)
+
+    def snapshot(self, channels: list):
+        return self.call("snapshot", channels)
+
+    def refresh_shadow(self, channels: list = (1, 2, 3)):
+        return self.call("refresh_shadow", list(channels))
+
+    def write_batch(self, commands: list):
+        return self.call("write_batch", list(commands))
+
+    def query(self, command: str):
+        return self.call("query", command)
+
+
+class DaemonAcquisitionEngine(AcquisitionEngine):
+    """
+    AcquisitionEngine fed by a daemon's subscription stream instead of polling the instrument itself.
+
+    Enabling a channel subscribes to it on the daemon. Snapshots arrive on the connection's reader thread and go to
+    the history and subscribers exactly as with a local engine. The daemon also does the settings checks and pushes
+    the changes.
+
+    Parameters:
+    address (str): "dp832d://host:port" of the daemon.
+    history_capacity (int): Samples kept per channel in self.history.
+    """
+
+    def __init__(self, address: str, history_capacity: int = 86400):
+        super().__init__(address, history_capacity=history_capacity, settings_check_interval=None)
+        self.session = DaemonSession(address)
+        self.session.add_event_handler(self._on_event)
+
+    def _on_event(self, message: dict):
+        if message["event"] == "snapshot":
+            snapshot = decode(message["snapshot"])
+            if snapshot.channel in self.enabled_channels:
+                self._publish_snapshots({snapshot.channel: snapshot}, message["timestamp"])
+        elif message["event"] == "settings":
+            self._publish_settings(decode(message["settings"]))
+        elif message["event"] == "error":
+            self._publish_error([message["channel"]], message["message"])
+        elif message["event"] == "protection":
+            self._publish_event(decode(message["protection"]))
+
+    def enable_channel(self, channel: int):
+        super().enable_channel(channel)
+        self.session.subscribe([channel])
+
+    def disable_channel(self, channel: int):
+        super().disable_channel(channel)
+        self.session.unsubscribe([channel])
+
+    def check_settings(self):
+        # front-panel changes are detected by the daemon and pushed as settings events
+        pass
+
+    def poll_once(self):
+        pass
+
+    def start(self):
+        self.session.subscribe_settings()
+        if self.enabled_channels:
+            self.session.subscribe(self.enabled_channels)
+
+    def stop(self):
+        self.session.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Share a DP832 with local clients.")
+    parser.add_argument("resource", help="VISA resource string of the power supply")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--refresh-rate", type=float, default=2.0, help="Acquisition cycles per second")
+    parser.add_argument("--protection-interval", type=float, default=0.2,
+                        help="Seconds between protection status reads, 0 to disable")
+    args = parser.parse_args()
+
+    daemon = DP832Daemon(args.resource, args.host, args.port, args.refresh_rate, args.protection_interval or None)
+    daemon.start()
+    print(f"Serving {args.resource} on {daemon.address}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        dp832.close_all_sessions()
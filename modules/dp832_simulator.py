@@ -0,0 +1,637 @@
+"""
+SCPI-level DP832(A) simulator for running the driver, GUI and benchmarks without hardware.
+
+SimulatedDP832 models the instrument: setpoints, protection, outputs, a resistive load per channel and the replies
+the real supply sends. It is reachable in-process through SimulatedResource / SimulatedResourceManager (select it
+with visa_backend.set_backend("sim") or DP832_VISA_BACKEND=sim) or over a local TCP socket through SimulatorServer,
+which speaks newline-terminated SCPI like the supply's LAN port 5555.
+
+Run standalone with: python dp832_simulator.py [--port 5555] [--model DP832A] [--latency-ms 2]
+"""
+import random
+import re
+import socket
+import threading
+import time
+
+# long SCPI mnemonics -> short form, anything not listed is used as sent
+SHORT_MNEMONICS = {
+    "APPLY": "APPL", "MEASURE": "MEAS", "VOLTAGE": "VOLT", "CURRENT": "CURR", "POWER": "POWE", "OUTPUT": "OUTP",
+    "STATE": "STAT", "SOURCE": "SOUR", "PROTECTION": "PROT", "VALUE": "VAL", "ALARM": "ALAR", "CLEAR": "CLE",
+    "SYSTEM": "SYST", "ERROR": "ERR", "NEXT": "NEXT", "TIMER": "TIM", "PARAMETER": "PARA", "GROUPS": "GROU",
+    "CYCLES": "CYCL", "CYCLE": "CYCL", "ENDSTATE": "ENDS", "INSTRUMENT": "INST", "NSELECT": "NSEL",
+    "STATUS": "STAT", "QUESTIONABLE": "QUES", "OPERATION": "OPER", "EVENT": "EVEN", "CONDITION": "COND",
+}
+
+CHANNEL_RATINGS = {1: "30V/3A", 2: "30V/3A", 3: "5V/3A"}
+CHANNEL_MAX_VOLTAGE = {1: 32.0, 2: 32.0, 3: 5.3}
+MAX_CURRENT = 3.2
+TIMER_GROUPS = 2048
+TIMER_DWELL_RANGE = (1.0, 99999.0)
+
+# *STB? bits: error queue not empty, questionable summary, operation summary
+STB_ERROR_QUEUE = 1 << 2
+STB_QUESTIONABLE = 1 << 3
+STB_OPERATION = 1 << 7
+
+
+class SimulatedChannel:
+    def __init__(self, channel: int):
+        self.channel = channel
+        self.voltage = 0.0
+        self.current = 0.0
+        self.output = False
+        self.ovp_value = CHANNEL_MAX_VOLTAGE[channel]
+        self.ocp_value = MAX_CURRENT
+        self.ovp_enabled = False
+        self.ocp_enabled = False
+        self.ovp_alarm = False
+        self.ocp_alarm = False
+        self.load_ohms = float("inf")  # open circuit
+        # :TIMEr state, groups are (voltage, current, dwell) by group index
+        self.timer_groups = {}
+        self.timer_group_count = 1
+        self.timer_cycles = 1  # 0 for infinite
+        self.timer_end_state = "OFF"
+        self.timer_started = None  # instrument clock at :TIM ON, None while the timer is stopped
+        # status system: latched events, cleared when the :STAT:...:INST? event register is read
+        self.questionable_event = False  # OVP/OCP tripped
+        self.operation_event = False  # output switched or CV/CC changed
+        self.trip_time = None  # time.monotonic() of the last OVP/OCP trip
+        self._last_condition = (False, "CV")
+
+    def operating_point(self):
+        """ Returns (voltage, current, mode) at the output for the current setpoints and load. """
+        if not self.output:
+            return 0.0, 0.0, "CV"
+        if self.load_ohms <= 0:
+            return 0.0, self.current, "CC"
+
+        current = self.voltage / self.load_ohms
+        if current <= self.current:
+            return self.voltage, current, "CV"
+        return self.current * self.load_ohms, self.current, "CC"
+
+    def check_protection(self):
+        voltage, current, _ = self.operating_point()
+        if self.output and self.ovp_enabled and voltage > self.ovp_value:
+            self.ovp_alarm = True
+            self.output = False
+        if self.output and self.ocp_enabled and current > self.ocp_value:
+            self.ocp_alarm = True
+            self.output = False
+        self.update_status()
+
+    def update_status(self):
+        """ Latches status events for protection trips and output or regulation mode changes. """
+        condition = (self.output, self.operating_point()[2])
+        if (self.ovp_alarm or self.ocp_alarm) and self.trip_time is None:
+            self.trip_time = time.monotonic()
+            self.questionable_event = True
+        elif not (self.ovp_alarm or self.ocp_alarm):
+            self.trip_time = None
+        if condition != self._last_condition:
+            self.operation_event = True
+            self._last_condition = condition
+
+    def timer_points(self) -> list:
+        return [self.timer_groups.get(group, (0.0, 0.0, TIMER_DWELL_RANGE[0]))
+                for group in range(self.timer_group_count)]
+
+    def advance_timer(self, elapsed: float):
+        """ Applies the timer group active after elapsed seconds, stopping the timer once all cycles are done. """
+        points = self.timer_points()
+        period = sum(dwell for _, _, dwell in points)
+        cycle, offset = divmod(elapsed, period)
+        if self.timer_cycles and cycle >= self.timer_cycles:
+            self.timer_started = None
+            self.voltage, self.current = points[-1][0], points[-1][1]
+            if self.timer_end_state == "OFF":
+                self.output = False
+            return
+
+        for voltage, current, dwell in points:
+            if offset < dwell:
+                self.voltage, self.current = voltage, current
+                break
+            offset -= dwell
+        self.check_protection()
+
+
+class SimulatedDP832:
+    """
+    Emulates the SCPI command set of a DP832 / DP832A as used by dp832.py.
+
+    Parameters:
+    model (str): "DP832" (2 decimal voltage setpoint replies) or "DP832A" (3 decimals).
+    serial (str): Serial number reported by *IDN?.
+    transfer_latency (float): Seconds added to every write or query transfer (USB/LAN round-trip).
+    command_latency (float): Seconds added per SCPI command in a transfer.
+    jitter (float): Up to this many seconds of random extra delay per transfer.
+    latency_overrides (dict): Per-command latency in seconds, keyed by the normalized header (e.g. ":MEAS:ALL?").
+    noise (float): Standard deviation of the relative noise added to measurements.
+    timer_speed (float): How much faster than real time the :TIMEr function runs through its groups.
+    """
+
+    def __init__(self, model: str = "DP832A", serial: str = "DP8SIM0000001", transfer_latency: float = 0.0,
+                 command_latency: float = 0.0, jitter: float = 0.0, latency_overrides: dict = None,
+                 noise: float = 0.0, timer_speed: float = 1.0):
+        if model not in ("DP832", "DP832A"):
+            raise ValueError(f"Unsupported model {model}, expected DP832 or DP832A")
+
+        self.model = model
+        self.serial = serial
+        self.firmware = "00.01.16"
+        self.transfer_latency = transfer_latency
+        self.command_latency = command_latency
+        self.jitter = jitter
+        self.latency_overrides = latency_overrides or {}
+        self.noise = noise
+        self.timer_speed = timer_speed
+        self.selected_channel = 1
+        self.channels = {channel: SimulatedChannel(channel) for channel in (1, 2, 3)}
+        self.errors = []
+        self.command_count = 0
+        self.transfer_count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def idn(self) -> str:
+        return f"RIGOL TECHNOLOGIES,{self.model},{self.serial},{self.firmware}"
+
+    def set_load(self, channel: int, ohms: float):
+        """ Connects a resistive load to a channel, float("inf") for open circuit, 0 for a short. """
+        with self._lock:
+            self.channels[channel].load_ohms = ohms
+            self.channels[channel].check_protection()
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.channels = {channel: SimulatedChannel(channel) for channel in (1, 2, 3)}
+        self.selected_channel = 1
+        self.errors.clear()
+
+    def _advance_timers(self):
+        now = time.monotonic()
+        for channel in self.channels.values():
+            if channel.timer_started is not None:
+                channel.advance_timer((now - channel.timer_started) * self.timer_speed)
+
+    def transfer(self, message: str):
+        """
+        Processes one write (a message that may hold several ';'-separated commands).
+
+        Returns:
+        str: The replies of the queries in the message joined with ';', or None if it held no queries.
+        """
+        commands = [command.strip() for command in message.strip().split(';') if command.strip()]
+        replies = []
+
+        with self._lock:
+            self.transfer_count += 1
+            delay = self.transfer_latency + random.uniform(0, self.jitter)
+            self._advance_timers()
+
+            for command in commands:
+                self.command_count += 1
+                header, arguments = self._parse(command)
+                delay += self.latency_overrides.get(header, self.command_latency)
+                try:
+                    reply = self._execute(header, arguments)
+                except (ValueError, IndexError, KeyError):
+                    self.errors.append('-224,"Illegal parameter value"')
+                    reply = None
+                if header.endswith("?"):
+                    replies.append("" if reply is None else reply)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return ";".join(replies) if replies else None
+
+    @staticmethod
+    def _parse(command: str):
+        parts = command.split(None, 1)
+        arguments = [argument.strip() for argument in parts[1].split(',')] if len(parts) > 1 else []
+
+        mnemonics = []
+        for mnemonic in parts[0].upper().lstrip(':').split(':'):
+            query = mnemonic.endswith('?')
+            mnemonic = mnemonic.rstrip('?')
+            # SOURce[2] as sent by dp832.py, or SOURce2 -> SOUR with the channel as first argument
+            match = re.fullmatch(r"(SOUR(?:CE)?)\[?(\d)\]?", mnemonic)
+            if match:
+                arguments.insert(0, f"CH{match.group(2)}")
+                mnemonic = "SOUR"
+            mnemonics.append(SHORT_MNEMONICS.get(mnemonic, mnemonic) + ('?' if query else ''))
+
+        header = ":".join(mnemonics)
+        return (header if header.startswith('*') else ":" + header), arguments
+
+    @staticmethod
+    def _channel(arguments: list) -> int:
+        channel = int(arguments.pop(0).upper().replace("CH", ""))
+        if channel not in (1, 2, 3):
+            raise ValueError(channel)
+        return channel
+
+    def _measure(self, value: float) -> float:
+        return value * (1 + random.gauss(0, self.noise)) if self.noise and value else value
+
+    def _format_setpoint_voltage(self, voltage: float) -> str:
+        return f"{voltage:.3f}" if self.model == "DP832A" else f"{voltage:.2f}"
+
+    def _format_measurement(self, value: float) -> str:
+        return f"{value:.4f}" if self.model == "DP832A" else f"{value:.3f}"
+
+    def _execute(self, header: str, arguments: list):
+        if header == "*IDN?":
+            return self.idn
+        if header == "*RST":
+            self._reset()
+            return None
+        if header == "*CLS":
+            self.errors.clear()
+            for channel in self.channels.values():
+                channel.questionable_event = channel.operation_event = False
+            return None
+        if header == "*OPC?":
+            return "1"
+        if header in (":SYST:ERR?", ":SYST:ERR:NEXT?"):
+            return self.errors.pop(0) if self.errors else '0,"No error"'
+
+        if header in (":APPL", ":APPL?", ":MEAS:ALL?", ":MEAS:VOLT?", ":MEAS:CURR?", ":MEAS:POWE?", ":MEAS?",
+                      ":OUTP", ":OUTP?", ":OUTP:STAT", ":OUTP:STAT?", ":OUTP:CVCC?", ":OUTP:MODE?",
+                      ":OUTP:OVP:VAL", ":OUTP:OVP:VAL?", ":OUTP:OCP:VAL", ":OUTP:OCP:VAL?", ":OUTP:OVP:ALAR?",
+                      ":OUTP:OCP:ALAR?", ":OUTP:OVP:QUES?", ":OUTP:OCP:QUES?", ":OUTP:OVP:CLE", ":OUTP:OCP:CLE",
+                      ":OUTP:OVP", ":OUTP:OVP?", ":OUTP:OCP", ":OUTP:OCP?"):
+            channel = self.channels[self._channel(arguments)]
+            return self._execute_channel(header, channel, arguments)
+
+        if header in (":INST:NSEL", ":INST"):
+            channel = int(arguments[0].upper().replace("CH", ""))
+            if channel not in (1, 2, 3):
+                raise ValueError(channel)
+            self.selected_channel = channel
+            return None
+        if header in (":INST:NSEL?", ":INST?"):
+            return str(self.selected_channel) if header == ":INST:NSEL?" else f"CH{self.selected_channel}"
+
+        if header == "*STB?":
+            status = STB_ERROR_QUEUE if self.errors else 0
+            if any(channel.questionable_event for channel in self.channels.values()):
+                status |= STB_QUESTIONABLE
+            if any(channel.operation_event for channel in self.channels.values()):
+                status |= STB_OPERATION
+            return str(status)
+        if header.startswith(":STAT:"):
+            return self._execute_status(header, arguments)
+
+        if header.startswith(":TIM"):
+            return self._execute_timer(header, self.channels[self.selected_channel], arguments)
+
+        if header.startswith(":SOUR:"):
+            channel = self.channels[self._channel(arguments)]
+            return self._execute_source(header[len(":SOUR"):], channel, arguments)
+
+        self.errors.append('-113,"Undefined header"')
+        return None
+
+    def _execute_channel(self, header: str, channel: SimulatedChannel, arguments: list):
+        if header == ":APPL":
+            voltage = float(arguments[0])
+            if not 0 <= voltage <= CHANNEL_MAX_VOLTAGE[channel.channel]:
+                raise ValueError(voltage)
+            channel.voltage = voltage
+            if len(arguments) > 1:
+                current = float(arguments[1])
+                if not 0 <= current <= MAX_CURRENT:
+                    raise ValueError(current)
+                channel.current = current
+        elif header == ":APPL?":
+            return (f"CH{channel.channel}:{CHANNEL_RATINGS[channel.channel]},"
+                    f"{self._format_setpoint_voltage(channel.voltage)},{channel.current:.3f}")
+        elif header.startswith(":MEAS"):
+            voltage, current, _ = channel.operating_point()
+            voltage, current = self._measure(voltage), self._measure(current)
+            values = {":MEAS:ALL?": [voltage, current, voltage * current], ":MEAS:VOLT?": [voltage],
+                      ":MEAS?": [voltage], ":MEAS:CURR?": [current], ":MEAS:POWE?": [voltage * current]}[header]
+            return ",".join(self._format_measurement(value) for value in values)
+        elif header in (":OUTP", ":OUTP:STAT"):
+            channel.output = arguments[0].upper() in ("ON", "1")
+            if channel.output:
+                channel.ovp_alarm = channel.ocp_alarm = False
+                channel.trip_time = None
+        elif header in (":OUTP?", ":OUTP:STAT?"):
+            return "ON" if channel.output else "OFF"
+        elif header in (":OUTP:CVCC?", ":OUTP:MODE?"):
+            return channel.operating_point()[2]
+        elif header == ":OUTP:OVP:VAL":
+            channel.ovp_value = float(arguments[0])
+        elif header == ":OUTP:OVP:VAL?":
+            return f"{channel.ovp_value:.3f}"
+        elif header == ":OUTP:OCP:VAL":
+            channel.ocp_value = float(arguments[0])
+        elif header == ":OUTP:OCP:VAL?":
+            return f"{channel.ocp_value:.3f}"
+        elif header in (":OUTP:OVP:ALAR?", ":OUTP:OVP:QUES?"):
+            return "YES" if channel.ovp_alarm else "NO"
+        elif header in (":OUTP:OCP:ALAR?", ":OUTP:OCP:QUES?"):
+            return "YES" if channel.ocp_alarm else "NO"
+        elif header == ":OUTP:OVP:CLE":
+            channel.ovp_alarm = False
+        elif header == ":OUTP:OCP:CLE":
+            channel.ocp_alarm = False
+        elif header == ":OUTP:OVP":
+            channel.ovp_enabled = arguments[0].upper() in ("ON", "1")
+        elif header == ":OUTP:OVP?":
+            return "ON" if channel.ovp_enabled else "OFF"
+        elif header == ":OUTP:OCP":
+            channel.ocp_enabled = arguments[0].upper() in ("ON", "1")
+        elif header == ":OUTP:OCP?":
+            return "ON" if channel.ocp_enabled else "OFF"
+
+        channel.check_protection()
+        return None
+
+    def _execute_status(self, header: str, arguments: list):
+        # per-channel summary registers, bit n set for channel n
+        if header in (":STAT:QUES:INST?", ":STAT:QUES:INST:EVEN?"):
+            value = sum(1 << number for number, channel in self.channels.items() if channel.questionable_event)
+            for channel in self.channels.values():
+                channel.questionable_event = False
+            return str(value)
+        if header == ":STAT:QUES:INST:COND?":
+            return str(sum(1 << number for number, channel in self.channels.items()
+                           if channel.ovp_alarm or channel.ocp_alarm))
+        if header in (":STAT:OPER:INST?", ":STAT:OPER:INST:EVEN?"):
+            value = sum(1 << number for number, channel in self.channels.items() if channel.operation_event)
+            for channel in self.channels.values():
+                channel.operation_event = False
+            return str(value)
+        if header == ":STAT:OPER:INST:COND?":
+            return str(sum(1 << number for number, channel in self.channels.items() if channel.output))
+        self.errors.append('-113,"Undefined header"')
+        return None
+
+    def _execute_timer(self, header: str, channel: SimulatedChannel, arguments: list):
+        if header == ":TIM:PARA":
+            group, voltage, current, dwell = int(arguments[0]), float(arguments[1]), float(arguments[2]), \
+                float(arguments[3])
+            if not (0 <= group < TIMER_GROUPS and 0 <= voltage <= CHANNEL_MAX_VOLTAGE[channel.channel]
+                    and 0 <= current <= MAX_CURRENT and TIMER_DWELL_RANGE[0] <= dwell <= TIMER_DWELL_RANGE[1]):
+                raise ValueError(arguments)
+            channel.timer_groups[group] = (voltage, current, dwell)
+        elif header == ":TIM:PARA?":
+            voltage, current, dwell = channel.timer_groups.get(int(arguments[0]), (0.0, 0.0, TIMER_DWELL_RANGE[0]))
+            return f"{self._format_setpoint_voltage(voltage)},{current:.3f},{dwell:g}"
+        elif header == ":TIM:GROU":
+            count = int(arguments[0])
+            if not 1 <= count <= TIMER_GROUPS:
+                raise ValueError(count)
+            channel.timer_group_count = count
+        elif header == ":TIM:GROU?":
+            return str(channel.timer_group_count)
+        elif header == ":TIM:CYCL":
+            if arguments[0].upper() in ("I", "INF"):
+                channel.timer_cycles = 0
+            else:
+                cycles = int(arguments[1])
+                if not 1 <= cycles <= 99999:
+                    raise ValueError(cycles)
+                channel.timer_cycles = cycles
+        elif header == ":TIM:CYCL?":
+            return "I" if channel.timer_cycles == 0 else f"N,{channel.timer_cycles}"
+        elif header == ":TIM:ENDS":
+            if arguments[0].upper() not in ("OFF", "LAST"):
+                raise ValueError(arguments[0])
+            channel.timer_end_state = arguments[0].upper()
+        elif header == ":TIM:ENDS?":
+            return channel.timer_end_state
+        elif header in (":TIM", ":TIM:STAT"):
+            if arguments[0].upper() in ("ON", "1"):
+                channel.timer_started = time.monotonic()
+                channel.advance_timer(0.0)
+            else:
+                channel.timer_started = None
+        elif header in (":TIM?", ":TIM:STAT?"):
+            return "ON" if channel.timer_started is not None else "OFF"
+        else:
+            self.errors.append('-113,"Undefined header"')
+        return None
+
+    def _execute_source(self, header: str, channel: SimulatedChannel, arguments: list):
+        if header in (":CURR", ":CURR:LEV", ":CURR:LEV:IMM", ":CURR:LEV:IMM:AMPL"):
+            current = float(arguments[0])
+            if not 0 <= current <= MAX_CURRENT:
+                raise ValueError(current)
+            channel.current = current
+        elif header in (":CURR?", ":CURR:LEV?", ":CURR:LEV:IMM?", ":CURR:LEV:IMM:AMPL?"):
+            return f"{channel.current:.3f}"
+        elif header in (":VOLT", ":VOLT:LEV", ":VOLT:LEV:IMM", ":VOLT:LEV:IMM:AMPL"):
+            voltage = float(arguments[0])
+            if not 0 <= voltage <= CHANNEL_MAX_VOLTAGE[channel.channel]:
+                raise ValueError(voltage)
+            channel.voltage = voltage
+        elif header in (":VOLT?", ":VOLT:LEV?", ":VOLT:LEV:IMM?", ":VOLT:LEV:IMM:AMPL?"):
+            return self._format_setpoint_voltage(channel.voltage)
+        elif header == ":VOLT:PROT":
+            channel.ovp_value = float(arguments[0])
+        elif header == ":VOLT:PROT?":
+            return f"{channel.ovp_value:.3f}"
+        elif header == ":CURR:PROT":
+            channel.ocp_value = float(arguments[0])
+        elif header == ":CURR:PROT?":
+            return f"{channel.ocp_value:.3f}"
+        elif header == ":VOLT:PROT:STAT":
+            channel.ovp_enabled = arguments[0].upper() in ("ON", "1")
+        elif header == ":VOLT:PROT:STAT?":
+            return "ON" if channel.ovp_enabled else "OFF"
+        elif header == ":CURR:PROT:STAT":
+            channel.ocp_enabled = arguments[0].upper() in ("ON", "1")
+        elif header == ":CURR:PROT:STAT?":
+            return "ON" if channel.ocp_enabled else "OFF"
+        else:
+            self.errors.append('-113,"Undefined header"')
+            return None
+
+        channel.check_protection()
+        return None
+
+
+class SimulatedResource:
+    """
+    pyvisa-like resource on top of a SimulatedDP832 (write, read, query, close, timeout).
+
+    Replies end in "\\n" like the ones pyvisa returns from the real supply with the default termination.
+    """
+
+    def __init__(self, instrument: SimulatedDP832, resource_name: str = "SIM::DP832::INSTR"):
+        self.instrument = instrument
+        self.resource_name = resource_name
+        self.timeout = 2000
+        self._pending_reply = None
+
+    def write(self, command: str):
+        reply = self.instrument.transfer(command)
+        if reply is not None:
+            self._pending_reply = reply
+        return len(command)
+
+    def read(self) -> str:
+        if self._pending_reply is None:
+            raise TimeoutError(f"Simulated read from {self.resource_name} timed out, nothing was queried")
+        reply, self._pending_reply = self._pending_reply, None
+        return reply + "\n"
+
+    def query(self, command: str) -> str:
+        self.write(command)
+        return self.read()
+
+    def close(self):
+        self._pending_reply = None
+
+
+class SimulatedResourceManager:
+    """
+    Stand-in for pyvisa.ResourceManager serving simulated supplies.
+
+    Parameters:
+    instruments (dict): Resource string -> SimulatedDP832. Defaults to one DP832A.
+    """
+
+    def __init__(self, instruments: dict = None):
+        if instruments is None:
+            instruments = {"USB0::0x1AB1::0x0E11::DP8SIM0000001::INSTR": SimulatedDP832()}
+        self.instruments = instruments
+
+    def list_resources(self, query: str = "?*::INSTR"):
+        return tuple(self.instruments)
+
+    def open_resource(self, resource_name: str, **kwargs):
+        if resource_name not in self.instruments:
+            raise ConnectionError(f"No simulated instrument at {resource_name}")
+        resource = SimulatedResource(self.instruments[resource_name], resource_name)
+        if "timeout" in kwargs:
+            resource.timeout = kwargs["timeout"]
+        return resource
+
+    def close(self):
+        pass
+
+
+class SimulatorServer:
+    """
+    Serves a SimulatedDP832 over TCP with newline-terminated SCPI, like the supply's raw socket port.
+
+    Parameters:
+    instrument (SimulatedDP832): The instrument to serve.
+    host (str): Interface to listen on.
+    port (int): Port to listen on, 0 picks a free one (see self.port after start()).
+    """
+
+    def __init__(self, instrument: SimulatedDP832, host: str = "127.0.0.1", port: int = 0):
+        self.instrument = instrument
+        self.host = host
+        self.port = port
+        self._server_socket = None
+        self._running = False
+        self._threads = []
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def resource_name(self) -> str:
+        return f"TCPIP0::{self.host}::{self.port}::SOCKET"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        self._server_socket = socket.create_server((self.host, self.port))
+        self.port = self._server_socket.getsockname()[1]
+        self._running = True
+        thread = threading.Thread(target=self._accept_loop, name="simulator server", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._running = False
+        if self._server_socket is not None:
+            self._server_socket.close()
+            self._server_socket = None
+        self.drop_connections()
+
+    def drop_connections(self):
+        """ Closes every open client connection, like a LAN link going down. The server keeps accepting new ones. """
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            connection.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._running:
+                time.sleep(0.5)
+        finally:
+            self.stop()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                connection, _ = self._server_socket.accept()
+            except OSError:
+                break
+            thread = threading.Thread(target=self._serve_connection, args=(connection,), daemon=True)
+            thread.start()
+
+    def _serve_connection(self, connection: socket.socket):
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            with connection, connection.makefile("rwb") as stream:
+                for line in stream:
+                    reply = self.instrument.transfer(line.decode("ascii", "replace"))
+                    if reply is not None:
+                        stream.write(reply.encode("ascii") + b"\n")
+                        stream.flush()
+        except OSError:
+            pass  # dropped by drop_connections() or the client
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a simulated DP832 over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--model", default="DP832A", choices=["DP832", "DP832A"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay per transfer")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay per transfer")
+    parser.add_argument("--load", type=float, nargs=3, default=[float("inf")] * 3, metavar=("CH1", "CH2", "CH3"),
+                        help="Load resistance per channel in ohms")
+    args = parser.parse_args()
+
+    simulated_psu = SimulatedDP832(args.model, transfer_latency=args.latency_ms / 1e3, jitter=args.jitter_ms / 1e3)
+    for channel_number, ohms in zip((1, 2, 3), args.load):
+        simulated_psu.set_load(channel_number, ohms)
+
+    server = SimulatorServer(simulated_psu, args.host, args.port)
+    print(f"Simulated {args.model} listening on {server.host}:{server.port}")
+    server.serve_forever()
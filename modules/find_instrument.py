@@ -1,18 +1,126 @@
-import pyvisa
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
+import visa_backend
 
-def find_device_by_serial(serial_number: str) -> str:
+# resource string -> IDN details of every instrument that answered a scan, see load_idn_cache()
+IDN_CACHE_PATH = os.environ.get("DP832_IDN_CACHE", os.path.join(os.path.expanduser("~"), ".dp832_idn_cache.json"))
+IDN_CACHE_TTL = 24 * 60 * 60  # seconds
+
+_idn_cache_lock = threading.Lock()
+
+
+def parse_idn(idn_response: str) -> dict:
+    """
+    Splits an *IDN? response ("RIGOL TECHNOLOGIES,DP832A,DP8C241301810,00.01.16") into its fields.
+
+    Returns:
+    dict: idn, manufacturer, model, serial and firmware (empty strings for missing fields).
+    """
+    fields = [field.strip() for field in idn_response.strip().split(',')] + [""] * 4
+    return {
+        "idn": idn_response.strip(),
+        "manufacturer": fields[0],
+        "model": fields[1],
+        "serial": fields[2],
+        "firmware": fields[3],
+    }
+
+
+def load_idn_cache(path: str = IDN_CACHE_PATH) -> dict:
+    """
+    Loads the discovery cache from disk.
+
+    The cache looks like {"resources": [...], "devices": {resource: {idn, model, serial, firmware, timestamp}}}, where
+    "resources" is the resource list seen by the last scan. A missing or unreadable file gives an empty cache.
+    """
+    try:
+        with open(path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {"resources": [], "devices": {}}
+
+    cache.setdefault("resources", [])
+    cache.setdefault("devices", {})
+    return cache
+
+
+def save_idn_cache(cache: dict, path: str = IDN_CACHE_PATH):
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "w") as cache_file:
+            json.dump(cache, cache_file, indent=1)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not write device cache {path}: {e}")
+
+
+def update_idn_cache(resources: list, idn_responses: dict, path: str = IDN_CACHE_PATH):
+    """
+    Stores the result of a scan in the cache.
+
+    If the resource list differs from the one seen by the previous scan, entries for resources that are gone are dropped.
+
+    Parameters:
+    resources (list): The resource list the scan ran over.
+    idn_responses (dict): resource -> *IDN? response for every resource that answered.
+    """
+    with _idn_cache_lock:
+        cache = load_idn_cache(path)
+        resources = sorted(resources)
+
+        if resources != cache["resources"]:
+            cache["devices"] = {resource: entry for resource, entry in cache["devices"].items() if resource in resources}
+            cache["resources"] = resources
+
+        now = time.time()
+        for resource, idn_response in idn_responses.items():
+            cache["devices"][resource] = dict(parse_idn(idn_response), timestamp=now)
+
+        save_idn_cache(cache, path)
+
+
+def get_cached_devices(pattern: str, ttl: float = IDN_CACHE_TTL, path: str = IDN_CACHE_PATH) -> dict:
+    """
+    Returns cached devices whose IDN contains the pattern, without touching the bus.
+
+    Parameters:
+    pattern (str): The pattern to search for in the cached IDN response.
+    ttl (float): Entries older than this many seconds are ignored.
+
+    Returns:
+    dict: resource -> cache entry (idn, model, serial, firmware, timestamp).
+    """
+    with _idn_cache_lock:
+        cache = load_idn_cache(path)
+
+    oldest = time.time() - ttl
+    return {resource: entry for resource, entry in cache["devices"].items()
+            if pattern in entry["idn"] and entry["timestamp"] >= oldest}
+
+
+def find_device_by_serial(serial_number: str, use_cache: bool = True) -> str:
     """
     Finds the device with the given serial number.
 
+    The discovery cache is checked first, the VISA resources are only listed if the serial number is not cached.
+
     Parameters:
     serial_number (str): The serial number of the device to find.
+    use_cache (bool): Look the serial number up in the discovery cache before listing resources.
 
     Returns:
     str: The resource ID of the device with the given serial number.
     """
-    rm = pyvisa.ResourceManager()
-    resources = rm.list_resources()
+    if use_cache:
+        for resource, entry in get_cached_devices("").items():
+            if entry["serial"] == serial_number or serial_number in resource:
+                return resource
+
+    resources = visa_backend.get_resource_manager().list_resources()
 
     for resource in resources:
         if serial_number in resource:
@@ -21,31 +129,78 @@ def find_device_by_serial(serial_number: str) -> str:
     raise ValueError(f"Device with serial number {serial_number} not found")
 
 
-def find_devices_by_pattern(pattern: str) -> list:
+def probe_resource(resource: str, timeout: float = 2.0) -> str:
+    """
+    Opens a VISA resource and returns its *IDN? response, giving up after the timeout.
+
+    Parameters:
+    resource (str): The VISA resource string to probe.
+    timeout (float): Seconds allowed for opening the resource and for the *IDN? query each.
+
+    Returns:
+    str: The *IDN? response from the device.
+    """
+    timeout_ms = int(timeout * 1000)
+    instrument = visa_backend.get_resource_manager().open_resource(resource, open_timeout=timeout_ms)
+    try:
+        instrument.timeout = timeout_ms
+        return instrument.query("*IDN?")
+    finally:
+        instrument.close()  # Always close the resource
+
+
+def find_devices_by_pattern(pattern: str, timeout: float = 2.0, deadline: float = 5.0, on_found=None,
+                            use_cache: bool = True) -> list:
     """
     Finds all connected VISA devices that match the given pattern in their IDN response.
 
+    All resources are probed concurrently, so a dead entry only costs its own timeout instead of stalling the scan.
+    Resources that have not answered when the deadline passes are skipped.
+
     Parameters:
     pattern (str): The pattern to search for in the device's IDN response.
+    timeout (float): Seconds allowed per resource.
+    deadline (float): Seconds allowed for the whole scan.
+    on_found: Called with (resource, idn_response) from a worker thread as soon as a matching device answers.
+    use_cache (bool): Store the answers in the discovery cache (see get_cached_devices()).
 
     Returns:
-    list: A list of matching VISA resource strings.
+    list: A list of matching VISA resource strings, in the order they answered.
     """
-    rm = pyvisa.ResourceManager()
-    resources = rm.list_resources()
+    resources = visa_backend.get_resource_manager().list_resources()
     matching_devices = []
+    idn_responses = {}
+    if not resources:
+        if use_cache:
+            update_idn_cache(resources, idn_responses)
+        return matching_devices
 
-    for resource in resources:
-        try:
-            # Try to open the resource and check if it's a valid VISA instrument
-            instrument = rm.open_resource(resource)
-            idn_response = instrument.query("*IDN?")  # Get the IDN string
+    executor = ThreadPoolExecutor(max_workers=min(len(resources), 16), thread_name_prefix="visa probe")
+    futures = {executor.submit(probe_resource, resource, timeout): resource for resource in resources}
+
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            resource = futures[future]
+            try:
+                idn_response = future.result()
+            except Exception as e:
+                print(f"Error accessing {resource}: {e}")
+                continue
+
+            idn_responses[resource] = idn_response
             if pattern in idn_response:  # Check if the IDN contains the pattern
                 matching_devices.append(resource)
-            instrument.close()  # Always close the resource
-        except Exception as e:
-            print(f"Error accessing {resource}: {e}")
-            continue
+                if on_found is not None:
+                    on_found(resource, idn_response)
+    except FuturesTimeoutError:
+        unanswered = [resource for future, resource in futures.items() if not future.done()]
+        print(f"Device scan deadline of {deadline} s passed, skipped: {', '.join(unanswered)}")
+    finally:
+        # don't wait for probes that are still stuck in their open/query
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if use_cache:
+        update_idn_cache(resources, idn_responses)
 
     return matching_devices
 
@@ -60,7 +215,7 @@ def verify_device(resource: str) -> str:
     Returns:
     str: The *IDN? response from the device.
     """
-    rm = pyvisa.ResourceManager()
+    rm = visa_backend.get_resource_manager()
 
     try:
         instrument = rm.open_resource(resource)
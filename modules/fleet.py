@@ -0,0 +1,143 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import dp832
+
+
+@dataclass
+class DeviceResult:
+    """ Outcome of one operation on one supply. """
+    resource: str
+    value: object = None
+    error: str = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        # setting changes return a ConfigurationResult, which is falsy when the instrument rejected them
+        return self.error is None and self.value is not False and not (
+            isinstance(self.value, dp832.ConfigurationResult) and not self.value)
+
+
+@dataclass
+class FleetReport:
+    """ Results of an operation fanned out over the fleet, with the wall-clock time of the whole fan-out. """
+    results: dict = field(default_factory=dict)  # resource -> DeviceResult
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results.values())
+
+    @property
+    def failed(self) -> dict:
+        return {resource: result for resource, result in self.results.items() if not result.ok}
+
+    @property
+    def values(self) -> dict:
+        return {resource: result.value for resource, result in self.results.items()}
+
+
+class Fleet:
+    """
+    Drives several DP832s at once.
+
+    Every supply gets its own I/O worker thread, and operations are submitted to all workers together, so the
+    wall-clock time of a fan-out follows the slowest supply instead of the sum of all of them. Operations on one
+    supply still run one after another on its worker.
+
+    The workers use the shared dp832.get_session() sessions. close() only closes the ones the fleet opened, sessions
+    that were already open (e.g. by the GUI or a daemon) stay open.
+
+    Example:
+        with Fleet(find_instrument.find_devices_by_pattern("DP8")) as fleet:
+            fleet.configure_voltage([1], 5.0)
+            report = fleet.snapshot([1, 2, 3])
+
+    Parameters:
+    resources (list): VISA resource strings of the supplies.
+    """
+
+    def __init__(self, resources: list):
+        self.resources = list(resources)
+        self._workers = {resource: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"fleet {resource}")
+                         for resource in self.resources}
+        self._opened = set()  # resources whose session the fleet opened, closed again by close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self) -> FleetReport:
+        """ Opens the sessions of all supplies in parallel (they are otherwise opened on first use). """
+        return self.each(lambda session: True)
+
+    def close(self):
+        for resource, worker in self._workers.items():
+            if resource in self._opened:
+                worker.submit(dp832.close_session, resource)
+            worker.shutdown(wait=True)
+        self._opened.clear()
+
+    def _get_session(self, resource: str):
+        # runs on the resource's worker, so the check and the open can't race another fleet operation
+        if not dp832.has_session(resource):
+            self._opened.add(resource)
+        return dp832.get_session(resource)
+
+    def each(self, operation, resources: list = None) -> FleetReport:
+        """
+        Runs operation(session) for every supply on its own worker and collects the results.
+
+        Parameters:
+        operation: Callable taking a dp832.DP832Session.
+        resources (list): Subset of the fleet to run on, all supplies if omitted. Resources that aren't part of the
+        fleet get an error result.
+
+        Returns:
+        FleetReport: Per-supply value or error with timing.
+        """
+        def run(resource):
+            start = time.perf_counter()
+            try:
+                value = operation(self._get_session(resource))
+                return DeviceResult(resource, value=value, elapsed=time.perf_counter() - start)
+            except Exception as e:
+                return DeviceResult(resource, error=str(e), elapsed=time.perf_counter() - start)
+
+        targets = self.resources if resources is None else list(resources)
+        start = time.perf_counter()
+        futures = {resource: self._workers[resource].submit(run, resource)
+                   for resource in targets if resource in self._workers}
+        results = {resource: futures[resource].result() if resource in futures
+                   else DeviceResult(resource, error=f"{resource} is not part of the fleet") for resource in targets}
+        return FleetReport(results, time.perf_counter() - start)
+
+    def call(self, method: str, *args, resources: list = None, **kwargs) -> FleetReport:
+        """ Calls a DP832Session method with the same arguments on every supply, e.g. call("measure_all", [1]). """
+        return self.each(lambda session: getattr(session, method)(*args, **kwargs), resources)
+
+    def set_channel_output_state(self, channels: list, state: str, resources: list = None) -> FleetReport:
+        return self.call("set_channel_output_state", channels, state, resources=resources)
+
+    def configure_voltage(self, channels: list, voltage: float, resources: list = None) -> FleetReport:
+        return self.call("configure_voltage", channels, voltage, resources=resources)
+
+    def configure_current(self, channels: list, current: float, resources: list = None) -> FleetReport:
+        return self.call("configure_current", channels, current, resources=resources)
+
+    def configure_channel_static(self, channels: list, voltage: float, current: float,
+                                 resources: list = None) -> FleetReport:
+        return self.call("configure_channel_static", channels, voltage, current, resources=resources)
+
+    def get_channel_settings(self, channels: list, resources: list = None) -> FleetReport:
+        return self.call("get_channel_settings", channels, resources=resources)
+
+    def measure_all(self, channels: list, resources: list = None) -> FleetReport:
+        return self.call("measure_all", channels, resources=resources)
+
+    def snapshot(self, channels: list = (1, 2, 3), resources: list = None) -> FleetReport:
+        return self.call("snapshot", list(channels), resources=resources)
@@ -0,0 +1,129 @@
+import threading
+import time
+from array import array
+from typing import NamedTuple
+
+# regulation modes are stored as small integers, index into this tuple
+REGULATION_MODES = ("CV", "CC", "UR")
+
+
+class HistorySegment(NamedTuple):
+    """
+    One contiguous run of samples, as memoryviews into the ring buffer storage.
+
+    The views are not copies: once the buffer wraps around, new samples overwrite them. Copy them (e.g. with
+    array('d', segment.voltage)) if they need to outlive the next few appends.
+    """
+    timestamps: memoryview
+    voltage: memoryview
+    current: memoryview
+    power: memoryview
+    mode: memoryview
+
+
+class MeasurementHistory:
+    """
+    Fixed-capacity ring buffer of timestamp, V, I, P and regulation mode samples for one channel.
+
+    Storage is allocated once as contiguous arrays, so memory stays bounded however long it runs. Appending is O(1),
+    the oldest samples are overwritten once the buffer is full. Timestamps are expected to be non-decreasing.
+
+    Parameters:
+    capacity (int): Number of samples kept.
+    """
+
+    def __init__(self, capacity: int = 86400):
+        if capacity < 1:
+            raise ValueError(f"History capacity must be at least 1, got {capacity}")
+
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._voltage = array('d', bytes(8 * capacity))
+        self._current = array('d', bytes(8 * capacity))
+        self._power = array('d', bytes(8 * capacity))
+        self._mode = array('b', bytes(capacity))
+        self._start = 0  # physical index of the oldest sample
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, voltage: float, current: float, power: float, regulation_mode: str):
+        mode = REGULATION_MODES.index(regulation_mode) if regulation_mode in REGULATION_MODES else -1
+
+        with self._lock:
+            if self._count < self.capacity:
+                index = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                index = self._start
+                self._start = (self._start + 1) % self.capacity
+
+            self._timestamps[index] = timestamp
+            self._voltage[index] = voltage
+            self._current[index] = current
+            self._power[index] = power
+            self._mode[index] = mode
+
+    def append_snapshot(self, snapshot, timestamp: float = None):
+        """ Appends a dp832.ChannelSnapshot, stamped with time.time() unless a timestamp is given. """
+        self.append(time.time() if timestamp is None else timestamp, snapshot.voltage, snapshot.current,
+                    snapshot.power, snapshot.regulation_mode)
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._count = 0
+
+    def latest(self):
+        """ Returns the newest sample as (timestamp, voltage, current, power, regulation_mode), or None. """
+        with self._lock:
+            if not self._count:
+                return None
+            index = (self._start + self._count - 1) % self.capacity
+            mode = self._mode[index]
+            return (self._timestamps[index], self._voltage[index], self._current[index], self._power[index],
+                    REGULATION_MODES[mode] if mode >= 0 else "??")
+
+    def _bisect(self, timestamp: float, after: bool) -> int:
+        # binary search over logical indices (0 being the oldest sample) for the first sample stamped at or after
+        # the timestamp, or strictly after it
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            sample_time = self._timestamps[(self._start + middle) % self.capacity]
+            if sample_time < timestamp or (after and sample_time == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, start_time: float = None, end_time: float = None) -> list:
+        """
+        Returns the samples with start_time <= timestamp <= end_time without copying them.
+
+        Parameters:
+        start_time (float): Oldest timestamp to include, None for the start of the history.
+        end_time (float): Newest timestamp to include, None for the end of the history.
+
+        Returns:
+        list: Zero, one or two HistorySegments in chronological order (two when the window wraps around the end of
+        the storage).
+        """
+        with self._lock:
+            first = 0 if start_time is None else self._bisect(start_time, after=False)
+            last = self._count if end_time is None else self._bisect(end_time, after=True)
+            if first >= last:
+                return []
+
+            begin = (self._start + first) % self.capacity
+            end = begin + (last - first)
+            if end <= self.capacity:
+                ranges = [(begin, end)]
+            else:
+                ranges = [(begin, self.capacity), (0, end - self.capacity)]
+
+        return [HistorySegment(*(memoryview(storage)[low:high] for storage in
+                                 (self._timestamps, self._voltage, self._current, self._power, self._mode)))
+                for low, high in ranges]
@@ -0,0 +1,224 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# upper bounds of the latency histogram buckets in seconds, a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+DEFAULT_CALLER = "user"
+# command label of plain reads (InstrumentedResource.read())
+READ_COMMAND = "<read>"
+
+_context = threading.local()
+
+
+@contextmanager
+def caller(name: str):
+    """
+    Tags all instrument I/O done by the current thread inside the block with a caller name.
+
+    Example: with metrics.caller("refresh"): dp832.snapshot(device, [1, 2, 3])
+    """
+    previous = getattr(_context, "caller", DEFAULT_CALLER)
+    _context.caller = name
+    try:
+        yield
+    finally:
+        _context.caller = previous
+
+
+def current_caller() -> str:
+    return getattr(_context, "caller", DEFAULT_CALLER)
+
+
+def command_key(command: str) -> str:
+    """ Reduces a (possibly ';'-joined) SCPI message to its headers, e.g. ":MEAS:ALL? CH1" -> ":MEAS:ALL?". """
+    headers = []
+    for part in command.strip().split(';'):
+        header = part.strip().split(None, 1)[0] if part.strip() else ""
+        if header and header not in headers:
+            headers.append(header)
+    return ";".join(headers)
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class CommandMetrics:
+    """
+    Per-command counters and latency histograms, labelled by instrument, SCPI command and caller.
+
+    Recording is a lock, a dict lookup and a bisect over a short tuple, cheap enough to leave on all the time.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, instrument: str, command: str, caller_name: str, duration: float, error: bool = False):
+        key = (instrument, command, caller_name)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.errors += error
+            series.total += duration
+            series.maximum = max(series.maximum, duration)
+            series.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self, instrument: str = None, caller_name: str = None) -> list:
+        """
+        Returns the recorded series as dicts, optionally filtered by instrument and/or caller.
+
+        Each dict holds instrument, command, caller, count, errors, total_s, mean_s, max_s and buckets (a list of
+        [upper bound, cumulative count] pairs, the last bound being "+Inf").
+        """
+        with self._lock:
+            items = [(key, series.count, series.errors, series.total, series.maximum, list(series.buckets))
+                     for key, series in self._series.items()]
+
+        result = []
+        for (series_instrument, command, series_caller), count, errors, total, maximum, buckets in sorted(items):
+            if instrument is not None and series_instrument != instrument:
+                continue
+            if caller_name is not None and series_caller != caller_name:
+                continue
+
+            cumulative, running = [], 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                running += bucket_count
+                cumulative.append([bound, running])
+
+            result.append({
+                "instrument": series_instrument,
+                "command": command,
+                "caller": series_caller,
+                "count": count,
+                "errors": errors,
+                "total_s": total,
+                "mean_s": total / count if count else 0.0,
+                "max_s": maximum,
+                "buckets": cumulative,
+            })
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps({"timestamp": time.time(), "series": self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """ Renders the metrics in the Prometheus text exposition format. """
+        lines = [
+            "# HELP dp832_scpi_commands_total SCPI transfers sent to the instrument.",
+            "# TYPE dp832_scpi_commands_total counter",
+        ]
+        series_list = self.snapshot()
+
+        def labels(series, extra=""):
+            escaped = {name: str(series[name]).replace("\\", "\\\\").replace('"', '\\"')
+                       for name in ("instrument", "command", "caller")}
+            return ('{instrument="%(instrument)s",command="%(command)s",caller="%(caller)s"' % escaped) + extra + "}"
+
+        for series in series_list:
+            lines.append(f"dp832_scpi_commands_total{labels(series)} {series['count']}")
+
+        lines += [
+            "# HELP dp832_scpi_errors_total SCPI transfers that raised an error.",
+            "# TYPE dp832_scpi_errors_total counter",
+        ]
+        for series in series_list:
+            lines.append(f"dp832_scpi_errors_total{labels(series)} {series['errors']}")
+
+        lines += [
+            "# HELP dp832_scpi_latency_seconds Round-trip time of SCPI transfers.",
+            "# TYPE dp832_scpi_latency_seconds histogram",
+        ]
+        for series in series_list:
+            for bound, cumulative in series["buckets"]:
+                bucket_labels = labels(series, ',le="%s"' % bound)
+                lines.append(f"dp832_scpi_latency_seconds_bucket{bucket_labels} {cumulative}")
+            lines.append(f"dp832_scpi_latency_seconds_sum{labels(series)} {series['total_s']}")
+            lines.append(f"dp832_scpi_latency_seconds_count{labels(series)} {series['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+# shared by every DP832Session
+registry = CommandMetrics()
+
+
+class InstrumentedResource:
+    """
+    Wraps a VISA resource and records every write, read and query in a CommandMetrics registry.
+
+    Parameters:
+    resource: The resource to wrap.
+    instrument (str): Instrument label for the recorded series.
+    metrics (CommandMetrics): Registry to record into, the shared registry by default.
+    """
+
+    def __init__(self, resource, instrument: str, metrics: CommandMetrics = None):
+        self.resource = resource
+        self.instrument = instrument
+        self.metrics = metrics if metrics is not None else registry
+
+    def __getattr__(self, name):
+        return getattr(self.resource, name)
+
+    @property
+    def timeout(self):
+        return self.resource.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        # __getattr__ only delegates reads, without this the new timeout would land on the wrapper
+        self.resource.timeout = value
+
+    def _timed(self, function, command):
+        if not self.metrics.enabled:
+            return function(command)
+        key = command_key(command if isinstance(command, str) else ";".join(command))
+
+        start = time.perf_counter()
+        try:
+            result = function(command)
+        except Exception:
+            self.metrics.record(self.instrument, key, current_caller(), time.perf_counter() - start, error=True)
+            raise
+        self.metrics.record(self.instrument, key, current_caller(), time.perf_counter() - start)
+        return result
+
+    def write(self, command: str):
+        return self._timed(self.resource.write, command)
+
+    def read(self):
+        # recorded as READ_COMMAND, the command the reply answers went out with an earlier write
+        return self._timed(lambda _: self.resource.read(), READ_COMMAND)
+
+    def query(self, command: str):
+        return self._timed(self.resource.query, command)
+
+    @property
+    def query_pipelined(self):
+        # only there when the wrapped transport pipelines (AttributeError otherwise), DP832Session checks for it.
+        # recorded as one transfer, like a ';'-joined message
+        query_pipelined = self.resource.query_pipelined
+        return lambda commands: self._timed(query_pipelined, commands)
+
+    def close(self):
+        return self.resource.close()
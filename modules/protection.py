@@ -0,0 +1,137 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import dp832
+import metrics
+from scheduler import DeadlineScheduler
+
+
+@dataclass
+class ProtectionEvent:
+    """ Something ProtectionMonitor saw change on a channel. """
+    channel: int
+    kind: str  # "ovp", "ocp", "mode" or "output"
+    value: object  # True for trips, the new regulation mode or output state otherwise
+    detected_at: float  # time.time()
+    latency_bound: float  # seconds since the previous summary read that didn't show it, the event happened within
+
+
+class ProtectionMonitor:
+    """
+    Watches OVP/OCP trips, output switches and CV/CC changes through the instrument's status registers.
+
+    Every cycle costs one short transfer (dp832.STATUS_SUMMARY_QUERY: *STB? and the questionable/operation
+    instrument registers). Only when that flags channels are their alarms, mode and output read, again in one
+    transfer. The questionable condition register is part of the summary too, so a trip is still seen when someone
+    else cleared the event registers in between (with *CLS or by reading them).
+
+    The trip-detection latency of each event is bounded by the time since the previous summary read, reported in
+    ProtectionEvent.latency_bound and summarized in stats().
+
+    Parameters:
+    instrument (str): The VISA resource string of the power supply.
+    interval (float): Seconds between summary reads.
+    on_event: Called from the monitor thread with every ProtectionEvent.
+    on_error: Called from the monitor thread with the message when a cycle fails.
+    """
+
+    def __init__(self, instrument: str, interval: float = 0.2, on_event=None, on_error=None):
+        self.instrument = instrument
+        self.on_event = on_event
+        self.on_error = on_error
+        self.scheduler = DeadlineScheduler(interval)
+        self._state = {}  # channel -> last read_events() entry
+        self._last_poll = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._counts = {"summary_reads": 0, "event_reads": 0, "events": 0, "trips": 0, "errors": 0}
+        self._trip_latency_total = 0.0
+        self._trip_latency_max = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"protection {self.instrument}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.scheduler.wait(self._stop):
+                break
+            try:
+                events = self.poll_once()
+            except Exception as e:
+                self._counts["errors"] += 1
+                if self.on_error is not None:
+                    self.on_error(f"Protection monitor for {self.instrument} failed: {e}")
+                continue
+            if self.on_event is not None:
+                for event in events:
+                    self.on_event(event)
+
+    def poll_once(self) -> list:
+        """ Reads the status summary, and the flagged channels if any. Returns the new ProtectionEvents. """
+        with metrics.caller("protection"):
+            if not self._state:
+                # first cycle: learn the current state, then clear the latched events it already covers
+                self._state = dp832.read_events(self.instrument, [1, 2, 3])
+                dp832.read_status_summary(self.instrument)
+                self._last_poll = time.monotonic()
+                self._counts["event_reads"] += 1
+                self._counts["summary_reads"] += 1
+                return []
+
+            summary = dp832.read_status_summary(self.instrument)
+            now = time.monotonic()
+            self._counts["summary_reads"] += 1
+
+            known_tripped = {channel for channel, state in self._state.items()
+                             if state["ovp_tripped"] or state["ocp_tripped"]}
+            flagged = summary.questionable_event | summary.operation_event | \
+                (summary.questionable_condition ^ known_tripped)
+            latency_bound = now - self._last_poll
+            self._last_poll = now
+            if not flagged:
+                return []
+
+            states = dp832.read_events(self.instrument, sorted(flagged))
+            self._counts["event_reads"] += 1
+
+        events = []
+        timestamp = time.time()
+        for channel, state in states.items():
+            previous = self._state[channel]
+            # a latched questionable event means a new trip even if the alarm looked set before (re-armed and
+            # tripped again between two reads)
+            retripped = channel in summary.questionable_event
+            for kind, key in (("ovp", "ovp_tripped"), ("ocp", "ocp_tripped")):
+                if state[key] and (not previous[key] or retripped):
+                    events.append(ProtectionEvent(channel, kind, True, timestamp, latency_bound))
+                    self._counts["trips"] += 1
+                    self._trip_latency_total += latency_bound
+                    self._trip_latency_max = max(self._trip_latency_max or 0.0, latency_bound)
+            if state["regulation_mode"] != previous["regulation_mode"]:
+                events.append(ProtectionEvent(channel, "mode", state["regulation_mode"], timestamp, latency_bound))
+            if state["output_enabled"] != previous["output_enabled"]:
+                events.append(ProtectionEvent(channel, "output", state["output_enabled"], timestamp, latency_bound))
+            self._state[channel] = state
+
+        self._counts["events"] += len(events)
+        return events
+
+    def stats(self) -> dict:
+        """ Read and event counts, trip-detection latency bounds (s) and the scheduler's timing statistics. """
+        trips = self._counts["trips"]
+        return dict(
+            self._counts,
+            mean_trip_latency_bound_s=self._trip_latency_total / trips if trips else None,
+            max_trip_latency_bound_s=self._trip_latency_max,
+            timing=self.scheduler.stats(),
+        )
@@ -0,0 +1,109 @@
+import threading
+
+CHANNELS = (1, 2, 3)
+
+
+class AdaptiveRatePolicy:
+    """
+    Picks a polling rate per channel from what the last snapshots showed.
+
+    A channel goes to its maximum rate when its output was just switched, its regulation mode flipped between CV and
+    CC, a reading moved by more than the step thresholds, or a reading is within limit_margin of a limit (the current
+    setpoint, where the supply goes CC, or an enabled OVP/OCP level). Otherwise the rate is multiplied by backoff
+    per poll down to the minimum, and channels with the output off sit at the minimum.
+
+    Thread-safe: the acquisition thread calls update() while reset() also comes from the protection monitor's thread.
+
+    Parameters:
+    min_rate (float): Idle polls per second, default for every channel.
+    max_rate (float): Polls per second while the channel is active, default for every channel.
+    voltage_step (float): Volts a reading must move between polls to count as changing.
+    current_step (float): Amps a reading must move between polls to count as changing.
+    limit_margin (float): Fraction of a limit that counts as near it, 0.1 meaning within 10 %.
+    backoff (float): Factor applied to the rate on every steady poll.
+    channel_limits (dict): channel -> (min_rate, max_rate) overriding the defaults.
+    """
+
+    def __init__(self, min_rate: float = 0.5, max_rate: float = 10.0, voltage_step: float = 0.01,
+                 current_step: float = 0.005, limit_margin: float = 0.1, backoff: float = 0.5,
+                 channel_limits: dict = None):
+        self.voltage_step = voltage_step
+        self.current_step = current_step
+        self.limit_margin = limit_margin
+        self.backoff = backoff
+        self.limits = {channel: (min_rate, max_rate) for channel in CHANNELS}
+        self._lock = threading.Lock()
+        for channel, (channel_min, channel_max) in (channel_limits or {}).items():
+            self.set_limits(channel, channel_min, channel_max)
+        self._rates = {channel: self.limits[channel][1] for channel in CHANNELS}
+        self._last = {}
+        self.reasons = {channel: "start" for channel in CHANNELS}  # why each channel runs at its current rate
+
+    def set_limits(self, channel: int, min_rate: float, max_rate: float):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError(f"Invalid rate limits {min_rate}..{max_rate} for CH{channel}")
+        with self._lock:
+            self.limits[channel] = (min_rate, max_rate)
+            if hasattr(self, "_rates"):
+                self._rates[channel] = min(max(self._rates[channel], min_rate), max_rate)
+
+    def rate(self, channel: int) -> float:
+        with self._lock:
+            return self._rates[channel]
+
+    def reset(self, channel: int):
+        """ Forgets the history of a channel and polls it at the maximum rate, e.g. when it gets enabled. """
+        with self._lock:
+            self._last.pop(channel, None)
+            self._rates[channel] = self.limits[channel][1]
+            self.reasons[channel] = "start"
+
+    def _near(self, value: float, limit: float) -> bool:
+        return limit > 0 and value >= limit * (1 - self.limit_margin)
+
+    def _activity(self, snapshot, settings: dict) -> str:
+        # returns what makes the channel active, or None when it is steady
+        last = self._last.get(snapshot.channel)
+        if last is None:
+            return None
+        if snapshot.output_enabled != last.output_enabled:
+            return "output switched"
+        if snapshot.regulation_mode != last.regulation_mode:
+            return "CV/CC transition"
+        if (abs(snapshot.voltage - last.voltage) > self.voltage_step
+                or abs(snapshot.current - last.current) > self.current_step):
+            return "changing"
+        if settings:
+            if snapshot.regulation_mode == "CV" and self._near(snapshot.current, settings["current"]):
+                return "near current setpoint"
+            if settings["ovp_enabled"] and self._near(snapshot.voltage, settings["voltage_limit"]):
+                return "near OVP"
+            if settings["ocp_enabled"] and self._near(snapshot.current, settings["current_limit"]):
+                return "near OCP"
+        return None
+
+    def update(self, snapshot, settings: dict = None) -> float:
+        """
+        Feeds a new dp832.ChannelSnapshot and returns the rate to poll its channel at from now on.
+
+        Parameters:
+        snapshot (dp832.ChannelSnapshot): The latest reading.
+        settings (dict): The channel's settings as returned by dp832.get_channel_settings, for the limit checks.
+        """
+        channel = snapshot.channel
+        with self._lock:
+            min_rate, max_rate = self.limits[channel]
+            activity = self._activity(snapshot, settings)
+
+            if activity is not None:
+                self._rates[channel] = max_rate
+                self.reasons[channel] = activity
+            elif not snapshot.output_enabled:
+                self._rates[channel] = min_rate
+                self.reasons[channel] = "off"
+            else:
+                self._rates[channel] = max(min_rate, self._rates[channel] * self.backoff)
+                self.reasons[channel] = "steady"
+
+            self._last[channel] = snapshot
+            return self._rates[channel]
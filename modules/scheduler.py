@@ -0,0 +1,161 @@
+import threading
+import time
+
+
+class DeadlineScheduler:
+    """
+    Runs ticks on fixed deadlines of the monotonic clock.
+
+    Deadlines are start + n * period rather than "period after the last tick", so the time spent in a tick doesn't
+    stretch the period and the schedule doesn't drift. A tick that runs past one or more deadlines doesn't cause a
+    burst of catch-up ticks: the passed deadlines are skipped and counted as missed.
+
+    Periodic use:
+        scheduler = DeadlineScheduler(0.5)
+        while running:
+            if scheduler.wait(stop_event):
+                poll()
+
+    wait_until() does the same for arbitrary deadlines, e.g. the steps of a profile with different dwell times.
+
+    Parameters:
+    period (float): Seconds between ticks, None when only wait_until() is used. May be changed at any time: the
+    pending deadline moves to the last tick plus the new period (right away if that already passed), so a faster
+    rate doesn't wait out the rest of the old period.
+    """
+
+    def __init__(self, period: float = None):
+        self._period = period
+        self._last_deadline = None  # deadline of the last periodic tick
+        self._next_deadline = None
+        self._tick_start = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    @period.setter
+    def period(self, period: float):
+        if period == self._period:
+            return
+        self._period = period
+        if self._last_deadline is not None and period is not None:
+            # re-anchor the pending deadline, a new grid starts at the last tick
+            self._next_deadline = max(self._last_deadline + period, time.monotonic())
+
+    def reset(self):
+        """ Restarts the schedule, the next wait() ticks immediately. """
+        self._last_deadline = None
+        self._next_deadline = None
+        self._tick_start = None
+
+    def reset_stats(self):
+        with self._lock:
+            self._ticks = 0
+            self._missed = 0
+            self._overruns = 0
+            self._lateness_total = 0.0
+            self._lateness_max = 0.0
+            self._duration_total = 0.0
+            self._duration_max = 0.0
+            self._durations = 0
+
+    def _finish_tick(self, now: float, next_deadline: float):
+        # closes the previous tick: how long it took and whether it ran past the deadline that followed it
+        if self._tick_start is None:
+            return
+        duration = now - self._tick_start
+        with self._lock:
+            self._durations += 1
+            self._duration_total += duration
+            self._duration_max = max(self._duration_max, duration)
+            self._overruns += next_deadline is not None and now > next_deadline
+        self._tick_start = None
+
+    def _start_tick(self, now: float, deadline: float):
+        lateness = max(0.0, now - deadline)
+        with self._lock:
+            self._ticks += 1
+            self._lateness_total += lateness
+            self._lateness_max = max(self._lateness_max, lateness)
+        self._tick_start = now
+
+    def skip(self, count: int):
+        """ Counts deadlines the caller skipped itself (see wait_until). """
+        with self._lock:
+            self._missed += count
+
+    def _sleep_until(self, deadline: float, event: threading.Event):
+        # returns the time after the sleep, None when the event got set first
+        now = time.monotonic()
+        self._finish_tick(now, deadline)
+
+        if deadline > now:
+            if event is not None:
+                if event.wait(deadline - now):
+                    return None
+            else:
+                time.sleep(deadline - now)
+            now = time.monotonic()
+        return now
+
+    def wait_until(self, deadline: float, event: threading.Event = None) -> bool:
+        """
+        Sleeps until an absolute time.monotonic() deadline and starts a tick.
+
+        Returns:
+        bool: True when the deadline was reached, False when the event got set first (no tick is started then).
+        """
+        now = self._sleep_until(deadline, event)
+        if now is None:
+            return False
+        self._start_tick(now, deadline)
+        return True
+
+    def wait(self, event: threading.Event = None) -> bool:
+        """
+        Sleeps until the next periodic deadline and starts a tick. The first call after reset() ticks immediately.
+
+        Returns:
+        bool: True for a tick, False when the event got set first. The deadline stays pending in that case, so the
+        next call waits for the same one.
+        """
+        now = time.monotonic()
+        if self._next_deadline is None:
+            self._next_deadline = now
+        deadline = self._next_deadline
+
+        now = self._sleep_until(deadline, event)
+        if now is None:
+            return False
+
+        # skip the deadlines that already passed instead of queueing them, the tick serves the latest one
+        missed = int((now - deadline) // self.period)
+        if missed > 0:
+            self.skip(missed)
+            deadline += missed * self.period
+        self._start_tick(now, deadline)
+        self._last_deadline = deadline
+        self._next_deadline = deadline + self.period
+        return True
+
+    def stats(self) -> dict:
+        """
+        Returns the timing statistics since the last reset_stats().
+
+        ticks: ticks started, missed: deadlines skipped because an earlier tick ran past them, overruns: ticks that
+        ran past the following deadline, lateness: how late ticks started, duration: how long ticks ran (all in s).
+        """
+        with self._lock:
+            return {
+                "period_s": self.period,
+                "ticks": self._ticks,
+                "missed": self._missed,
+                "overruns": self._overruns,
+                "mean_lateness_s": self._lateness_total / self._ticks if self._ticks else 0.0,
+                "max_lateness_s": self._lateness_max,
+                "mean_duration_s": self._duration_total / self._durations if self._durations else 0.0,
+                "max_duration_s": self._duration_max,
+            }
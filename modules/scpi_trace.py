@@ -0,0 +1,321 @@
+"""
+Record and replay of SCPI traffic, to reproduce field sessions without the hardware.
+
+RecordingResource wraps a resource and logs every write, read, query and pipelined query with its reply, start
+time and duration. ReplayResource plays such a trace back as a fake instrument, at the recorded speed, faster, or
+without delays. Both offer the pyvisa resource methods DP832Session uses, like SimulatedResource and
+socket_transport.SocketResource.
+
+Trace files are JSON lines, gzip compressed when the name ends in .gz. The first line is a header:
+    {"format": "dp832-trace", "version": 1, "resource": "...", "started": <time.time()>}
+and every transfer after it is one array:
+    [start_s, duration_s, op, command, reply]            op: "w" write, "r" read, "q" query, "p" pipelined
+    [start_s, duration_s, op, command, reply, error]     when the call raised, error is "ExceptionType: message"
+start_s counts from the start of the recording, command and reply are lists for pipelined queries.
+
+The recorder flushes every FLUSH_RECORDS records or FLUSH_INTERVAL seconds (gzip with a sync flush), so the trace of
+a session that crashed or got killed is readable up to that point; load_trace() stops at a truncated end.
+
+Recording of everything opened through visa_backend.open_resource() is switched on with
+visa_backend.set_trace_directory() or $DP832_TRACE_DIR. Replay a trace with the visa backend "replay:FILE[,speed]",
+e.g. DP832_VISA_BACKEND=replay:field.trace.gz,10 python dp832_interface.py.
+"""
+import builtins
+import gzip
+import io
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+
+TRACE_FORMAT = "dp832-trace"
+TRACE_VERSION = 1
+
+# the recorder flushes after this many records or seconds, whichever comes first
+FLUSH_RECORDS = 50
+FLUSH_INTERVAL = 1.0
+
+
+class ReplayMismatch(ValueError):
+    """ The replayed client sent something else than the trace holds at that point. """
+
+
+def _open_trace(path: str, mode: str):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.GzipFile(path, mode + "b"), encoding="ascii")
+    return open(path, mode, encoding="ascii")
+
+
+def _read_lines(path: str) -> list:
+    # a recording that was killed leaves an unterminated gzip stream and maybe half a line, keep what is complete
+    lines = []
+    with _open_trace(path, "r") as file:
+        try:
+            for line in file:
+                lines.append(line)
+        except (EOFError, zlib.error):
+            pass
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()
+    return lines
+
+
+def load_trace(path: str):
+    """
+    Reads a trace file, also one whose recording was cut off (up to its last complete record).
+
+    Returns:
+    tuple: (header dict, list of records as written by RecordingResource)
+    """
+    lines = _read_lines(path)
+    header = json.loads(lines[0]) if lines else {}
+    if header.get("format") != TRACE_FORMAT:
+        raise ValueError(f"{path} is not a {TRACE_FORMAT} file")
+    if header.get("version", 0) > TRACE_VERSION:
+        raise ValueError(f"{path} has trace version {header['version']}, only up to {TRACE_VERSION} is supported")
+    records = [json.loads(line) for line in lines[1:] if line.strip()]
+    return header, records
+
+
+class RecordingResource:
+    """
+    Wraps a resource and writes every transfer to a trace file.
+
+    Parameters:
+    resource: The resource to wrap (pyvisa resource, SocketResource, SimulatedResource, ...).
+    path (str): Trace file to create, gzip compressed if it ends in .gz.
+    resource_name (str): Stored in the header, used by ReplayResourceManager to serve the trace under that name.
+    """
+
+    def __init__(self, resource, path: str, resource_name: str = None):
+        self.resource = resource
+        self.path = path
+        self._file = _open_trace(path, "w")
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._unflushed = 0
+        self._last_flush = self._start
+        resource_name = resource_name or getattr(resource, "resource_name", "")
+        self._file.write(json.dumps({"format": TRACE_FORMAT, "version": TRACE_VERSION, "resource": resource_name,
+                                     "started": time.time()}) + "\n")
+        self.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.resource, name)
+
+    @property
+    def timeout(self):
+        return self.resource.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.resource.timeout = value
+
+    def _recorded(self, op: str, function, command):
+        start = time.monotonic()
+        try:
+            result = function(command)
+        except Exception as e:
+            self._write_record([start - self._start, time.monotonic() - start, op, command, None,
+                                f"{type(e).__name__}: {e}"])
+            raise
+        self._write_record([start - self._start, time.monotonic() - start, op, command,
+                            None if op == "w" else result])
+        return result
+
+    def _write_record(self, record: list):
+        # rounded to µs, finer digits only inflate the file
+        record[0] = round(record[0], 6)
+        record[1] = round(record[1], 6)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+                self._unflushed += 1
+                if self._unflushed >= FLUSH_RECORDS or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                    self._flush()
+
+    def write(self, command: str):
+        return self._recorded("w", self.resource.write, command)
+
+    def read(self) -> str:
+        return self._recorded("r", lambda _: self.resource.read(), None)
+
+    def query(self, command: str) -> str:
+        return self._recorded("q", self.resource.query, command)
+
+    @property
+    def query_pipelined(self):
+        # only there when the wrapped transport pipelines, like in metrics.InstrumentedResource
+        query_pipelined = self.resource.query_pipelined
+        return lambda commands: self._recorded("p", query_pipelined, list(commands))
+
+    def _flush(self):
+        # a gzip sync flush ends the compressed block, so everything written so far can be decompressed
+        self._file.flush()
+        if isinstance(self._file.buffer, gzip.GzipFile):
+            self._file.buffer.flush(zlib.Z_SYNC_FLUSH)
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self):
+        try:
+            self.resource.close()
+        finally:
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+
+def _replayed_error(message: str) -> Exception:
+    # built-in exceptions (TimeoutError, ConnectionError, ...) come back as themselves so the driver handles them alike
+    name, _, text = message.partition(": ")
+    exception_type = getattr(builtins, name, None)
+    if isinstance(exception_type, type) and issubclass(exception_type, Exception):
+        return exception_type(text)
+    return RuntimeError(message)
+
+
+class ReplayResource:
+    """
+    Fake instrument answering from a trace recorded by RecordingResource.
+
+    Every call takes the recorded duration of its transfer divided by speed, so the instrument's latency (including
+    slow replies from the field) is reproduced while the time between calls comes from the client being replayed.
+
+    With strict=True the client has to send exactly the recorded sequence, anything else raises ReplayMismatch. With
+    strict=False each command is answered by its next recorded occurrence wherever it is, repeating the last one when
+    they run out, which is what replaying into GUI code with a different poll timing needs.
+
+    Parameters:
+    trace: Path of a trace file, or a (header, records) tuple from load_trace().
+    speed (float): 1 for the recorded timing, 10 for ten times faster, 0 or None for no delays at all.
+    strict (bool): Require the recorded order of transfers.
+    """
+
+    def __init__(self, trace, speed: float = 1.0, strict: bool = True):
+        header, records = load_trace(trace) if isinstance(trace, str) else trace
+        self.resource_name = header.get("resource", "")
+        self.timeout = 2000
+        self.speed = speed
+        self.strict = strict
+        self._records = records
+        self._position = 0
+        self._pending_replies = deque()
+        self._lock = threading.Lock()
+        self._by_command = defaultdict(deque)  # (op, command) -> records, for strict=False
+        self._last = {}
+        self._pipelined = any(record[2] == "p" for record in records)
+        for index, record in enumerate(records):
+            if record[2] == "r":
+                continue
+            key = (record[2], json.dumps(record[3]))
+            self._by_command[key].append(index)
+
+    @property
+    def remaining(self) -> int:
+        """ Recorded transfers not replayed yet (strict mode). """
+        return len(self._records) - self._position
+
+    def _delay(self, record: list):
+        if self.speed:
+            time.sleep(record[1] / self.speed)
+
+    def _next_record(self, op: str, command) -> list:
+        if self.strict:
+            if self._position >= len(self._records):
+                raise ReplayMismatch(f"Trace of {self.resource_name} ended, got {op} {command!r}")
+            record = self._records[self._position]
+            if record[2] != op or record[3] != command:
+                raise ReplayMismatch(f"Transfer {self._position} of the trace is {record[2]} {record[3]!r}, "
+                                     f"got {op} {command!r}")
+            self._position += 1
+            return record
+
+        key = (op, json.dumps(command))
+        occurrences = self._by_command.get(key)
+        if occurrences:
+            self._last[key] = occurrences.popleft()
+        elif key not in self._last:
+            raise ReplayMismatch(f"{op} {command!r} was never sent to {self.resource_name} in the trace")
+        index = self._last[key]
+
+        # the reads that followed a write in the trace carry its replies
+        following = index + 1
+        while op == "w" and following < len(self._records) and self._records[following][2] == "r":
+            self._pending_replies.append(self._records[following])
+            following += 1
+        return self._records[index]
+
+    def _replay(self, op: str, command):
+        with self._lock:
+            if op == "r" and not self.strict:
+                if not self._pending_replies:
+                    raise TimeoutError(f"Read from replayed {self.resource_name} without a pending query")
+                record = self._pending_replies.popleft()
+            else:
+                record = self._next_record(op, command)
+        self._delay(record)
+        if len(record) > 5:
+            raise _replayed_error(record[5])
+        return record[4]
+
+    def write(self, command: str):
+        self._replay("w", command)
+        return len(command)
+
+    def read(self) -> str:
+        return self._replay("r", None)
+
+    def query(self, command: str) -> str:
+        return self._replay("q", command)
+
+    @property
+    def query_pipelined(self):
+        # offered only when the recorded transport pipelined, so the driver takes the same path as in the recording
+        if not self._pipelined:
+            raise AttributeError("query_pipelined")
+        return lambda commands: self._replay("p", list(commands))
+
+    def close(self):
+        with self._lock:
+            self._pending_replies.clear()
+
+
+class ReplayResourceManager:
+    """
+    Stand-in for pyvisa.ResourceManager serving recorded traces, each under the resource name it was recorded from.
+
+    Parameters:
+    traces (list): Trace file paths.
+    speed (float): Passed to every ReplayResource.
+    strict (bool): Passed to every ReplayResource.
+    """
+
+    def __init__(self, traces: list, speed: float = 1.0, strict: bool = False):
+        self.speed = speed
+        self.strict = strict
+        self.traces = {}
+        for path in traces:
+            trace = load_trace(path)
+            self.traces[trace[0].get("resource", "")] = trace
+
+    def list_resources(self, query: str = "?*::INSTR"):
+        return tuple(self.traces)
+
+    def open_resource(self, resource_name: str, **kwargs):
+        if resource_name not in self.traces:
+            raise ConnectionError(f"No trace recorded for {resource_name}")
+        resource = ReplayResource(self.traces[resource_name], self.speed, self.strict)
+        if "timeout" in kwargs:
+            resource.timeout = kwargs["timeout"]
+        return resource
+
+    def close(self):
+        pass
@@ -0,0 +1,271 @@
+import threading
+import time
+from typing import NamedTuple
+
+import dp832
+from scheduler import DeadlineScheduler
+
+# limits of the DP832 :TIMEr function, lists outside them run host-driven
+TIMER_GROUPS = 2048
+TIMER_DWELL_RANGE = (1.0, 99999.0)
+TIMER_CYCLES = 99999
+END_STATES = ("OFF", "LAST")
+SEQUENCE_MODES = ("auto", "timer", "host")
+
+# :TIM:PARA commands per transfer while uploading
+UPLOAD_CHUNK = 64
+
+
+class SequencePoint(NamedTuple):
+    voltage: float
+    current: float
+    dwell: float  # seconds
+
+
+def timer_incompatibility(points: list, cycles: int = 1) -> str:
+    """
+    Checks whether a sequence fits the instrument's timer: point count, cycles and whole-second dwells. The
+    setpoints themselves are checked by check_points().
+
+    Returns:
+    str: Why it doesn't fit, or None when it can be uploaded.
+    """
+    if not 1 <= len(points) <= TIMER_GROUPS:
+        return f"{len(points)} points, the timer holds 1 to {TIMER_GROUPS}"
+    if cycles is not None and not 1 <= cycles <= TIMER_CYCLES:
+        return f"{cycles} cycles, the timer runs 1 to {TIMER_CYCLES} or infinitely"
+    for index, (voltage, current, dwell) in enumerate(points):
+        if not TIMER_DWELL_RANGE[0] <= dwell <= TIMER_DWELL_RANGE[1] or dwell != round(dwell):
+            return f"point {index} dwells {dwell} s, the timer takes whole seconds from " \
+                   f"{TIMER_DWELL_RANGE[0]:g} to {TIMER_DWELL_RANGE[1]:g}"
+    return None
+
+
+def check_points(channel: int, points: list):
+    """
+    Checks that every point can be set on the channel at all, in any mode.
+
+    Raises:
+    ValueError: For an empty list, a voltage or current outside the channel's range or a negative dwell.
+    """
+    if not points:
+        raise ValueError("A sequence needs at least one point")
+    for index, (voltage, current, dwell) in enumerate(points):
+        if not 0 <= voltage <= dp832.MAX_VOLTAGE[channel]:
+            raise ValueError(f"Point {index}: {voltage} V is outside the 0 - {dp832.MAX_VOLTAGE[channel]} V range "
+                             f"of CH{channel}")
+        if not 0 <= current <= dp832.MAX_CURRENT[channel]:
+            raise ValueError(f"Point {index}: {current} A is outside the 0 - {dp832.MAX_CURRENT[channel]} A range "
+                             f"of CH{channel}")
+        if dwell < 0:
+            raise ValueError(f"Point {index}: negative dwell {dwell} s")
+
+
+class Sequence:
+    """
+    Runs a list of (voltage, current, dwell) points on one channel.
+
+    In "timer" mode the list is uploaded to the supply's :TIMEr function, which then steps through it on its own
+    clock, so timing doesn't depend on the host or the bus. Lists the timer can't hold (more than 2048 points, dwells
+    that aren't whole seconds between 1 and 99999 s) run in "host" mode, where a thread sends every step on the
+    deadlines of a DeadlineScheduler. Steps whose window passed while an earlier one was being sent are skipped
+    (see self.scheduler.stats()). "auto" picks the timer whenever the list fits.
+
+    Example:
+        run = Sequence(device, 1, [(5.0, 1.0, 2), (12.0, 0.5, 10)], cycles=3)
+        run.start()
+        run.wait()
+
+    Parameters:
+    dp8_instrument_id (str): The VISA resource string of the power supply.
+    channel (int): The channel to drive.
+    points (list): SequencePoint or (voltage, current, dwell) tuples.
+    cycles (int): How often to run through the list, None to repeat until stopped.
+    end_state (str): "OFF" turns the output off at the end, "LAST" keeps the last point's setpoints.
+    mode (str): "auto", "timer" or "host".
+    """
+
+    def __init__(self, dp8_instrument_id: str, channel: int, points: list, cycles: int = 1, end_state: str = "OFF",
+                 mode: str = "auto"):
+        if channel not in (1, 2, 3):
+            raise ValueError(f"{channel} is an invalid channel")
+        if end_state not in END_STATES:
+            raise ValueError(f"Unknown end state {end_state}, expected one of {END_STATES}")
+        if mode not in SEQUENCE_MODES:
+            raise ValueError(f"Unknown sequence mode {mode}, expected one of {SEQUENCE_MODES}")
+
+        self.instrument_id = dp8_instrument_id
+        self.channel = channel
+        self.points = [SequencePoint(*point) for point in points]
+        self.cycles = cycles
+        self.end_state = end_state
+        # out of range points fail here in every mode, only real timer limits fall back to host mode
+        check_points(channel, self.points)
+
+        reason = timer_incompatibility(self.points, cycles)
+        if mode == "timer" and reason:
+            raise ValueError(f"Sequence doesn't fit the timer: {reason}")
+        self.mode = "host" if mode == "host" or reason else "timer"
+        self.fallback_reason = reason if mode == "auto" else None
+
+        self.started = None
+        self.errors = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._host_step = None
+        self.scheduler = DeadlineScheduler()
+
+    @property
+    def duration(self) -> float:
+        """ Seconds for all cycles, None when repeating until stopped. """
+        return None if self.cycles is None else sum(point.dwell for point in self.points) * self.cycles
+
+    def upload(self) -> dp832.ConfigurationResult:
+        """ Loads the points, cycle count and end state into the timer of the channel without starting it. """
+        session = dp832.get_session(self.instrument_id)
+        commands = [f":INST:NSEL {self.channel}", ":TIM:STAT OFF", f":TIM:GROU {len(self.points)}",
+                    ":TIM:CYCL I" if self.cycles is None else f":TIM:CYCL N,{self.cycles}",
+                    f":TIM:ENDS {self.end_state}"]
+        commands += [f":TIM:PARA {group},{voltage:.3f},{current:.3f},{dwell:.0f}"
+                     for group, (voltage, current, dwell) in enumerate(self.points)]
+
+        errors = []
+        for start in range(0, len(commands), UPLOAD_CHUNK):
+            result = session.write_batch(commands[start:start + UPLOAD_CHUNK])
+            errors += result.errors
+        return dp832.ConfigurationResult(not errors, errors)
+
+    def start(self) -> dp832.ConfigurationResult:
+        """ Starts the sequence (uploading it first in timer mode) and turns the channel output on. """
+        if self.is_running():
+            return dp832.ConfigurationResult(False, ["Sequence is already running"])
+
+        self.errors = []
+        self._stop.clear()
+
+        if self.mode == "timer":
+            result = self.upload()
+            if result:
+                result = dp832.get_session(self.instrument_id).write_batch(
+                    [f":OUTP CH{self.channel},ON", f":INST:NSEL {self.channel}", ":TIM:STAT ON"])
+            self.errors += result.errors
+            if result:
+                self.started = time.monotonic()
+            return result
+
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run_host, name=f"sequence CH{self.channel}", daemon=True)
+        self._thread.start()
+        return dp832.ConfigurationResult(True)
+
+    def _send_step(self, method: str, *args) -> dp832.ConfigurationResult:
+        # the session opens the resource again after a connection error, so one retry rides out a dropped link.
+        # Sending the same setpoints or output state twice is harmless
+        for attempt in range(2):
+            try:
+                return getattr(dp832.get_session(self.instrument_id), method)(*args)
+            except Exception as e:
+                if attempt or not dp832.is_connection_error(e):
+                    return dp832.ConfigurationResult(False, [f"{type(e).__name__}: {e}"])
+
+    def _run_host(self):
+        self.scheduler.reset_stats()
+        # start offset of every point within a cycle, plus the end of the cycle
+        offsets = [0.0]
+        for point in self.points:
+            offsets.append(offsets[-1] + point.dwell)
+        cycle_start = self.started
+        cycle = 0
+        output_on = False
+
+        while self.cycles is None or cycle < self.cycles:
+            index = 0
+            while index < len(self.points):
+                if not self.scheduler.wait_until(cycle_start + offsets[index], self._stop):
+                    return
+
+                # when sending an earlier step overran, go straight to the step that should be active by now
+                now = time.monotonic()
+                skipped = 0
+                while index + 1 < len(self.points) and cycle_start + offsets[index + 1] <= now:
+                    index += 1
+                    skipped += 1
+                if skipped:
+                    self.scheduler.skip(skipped)
+
+                self._host_step = index
+                voltage, current, _ = self.points[index]
+                result = self._send_step("configure_channel_static", [self.channel], voltage, current)
+                if result and not output_on:
+                    result = self._send_step("set_channel_output_state", [self.channel], "ON")
+                    output_on = True
+                if not result:
+                    self.errors += result.errors
+                    self._stop.set()
+                    return
+                index += 1
+
+            cycle_start += offsets[-1]
+            cycle += 1
+
+        if not self.scheduler.wait_until(cycle_start, self._stop):
+            return
+        self._host_step = None
+        if self.end_state == "OFF":
+            self.errors += self._send_step("set_channel_output_state", [self.channel], "OFF").errors
+
+    def is_running(self) -> bool:
+        if self.started is None:
+            return False
+        if self.mode == "host":
+            return self._thread is not None and self._thread.is_alive()
+        return dp832.get_session(self.instrument_id).query(f":INST:NSEL {self.channel};:TIM:STAT?") == "ON"
+
+    def status(self) -> dict:
+        """
+        Returns running, elapsed (s) and step, the index of the active point.
+
+        The timer doesn't report its active group, so in timer mode the step is worked out from the elapsed time.
+        """
+        running = self.is_running()
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        step = None
+
+        if running and self.mode == "host":
+            step = self._host_step
+        elif running:
+            offset = elapsed % sum(point.dwell for point in self.points)
+            for step, point in enumerate(self.points):
+                if offset < point.dwell:
+                    break
+                offset -= point.dwell
+
+        return {"mode": self.mode, "running": running, "elapsed": elapsed, "step": step, "errors": list(self.errors)}
+
+    def wait(self, timeout: float = None, poll_interval: float = 0.5) -> bool:
+        """
+        Blocks until the sequence has finished.
+
+        Returns:
+        bool: True when it finished, False on timeout.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        if self.mode == "host":
+            if self._thread is not None:
+                self._thread.join(timeout)
+            return not self.is_running()
+
+        while self.is_running():
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(poll_interval if remaining is None else min(poll_interval, remaining))
+        return True
+
+    def stop(self):
+        """ Stops the sequence, leaving the channel at its current setpoints. """
+        self._stop.set()
+        if self.mode == "timer" and self.started is not None:
+            dp832.get_session(self.instrument_id).write_batch([f":INST:NSEL {self.channel}", ":TIM:STAT OFF"])
+        elif self._thread is not None:
+            self._thread.join()
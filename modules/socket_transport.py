@@ -0,0 +1,137 @@
+"""
+Raw TCP socket SCPI transport for the supply's LAN port, without NI-VISA or pyvisa.
+
+SocketResource speaks newline-terminated SCPI to "TCPIP[n]::host::port::SOCKET" resources (the DP832 listens on
+port 5555) and offers the pyvisa resource methods the driver uses (write, read, query, close, timeout). On top of
+that, query_pipelined() sends several queries in one go and matches the replies to them in order, so N queries cost
+one round-trip instead of N.
+
+visa_backend.open_resource() routes SOCKET resources here, so DP832Session works over it unchanged.
+"""
+import re
+import socket
+import threading
+
+SOCKET_RESOURCE = re.compile(r"TCPIP\d*::(?P<host>[^:]+)::(?P<port>\d+)::SOCKET", re.IGNORECASE)
+
+
+def is_socket_resource(resource_name: str) -> bool:
+    return SOCKET_RESOURCE.fullmatch(resource_name.strip()) is not None
+
+
+def parse_socket_resource(resource_name: str):
+    """ "TCPIP0::192.168.1.20::5555::SOCKET" -> ("192.168.1.20", 5555). """
+    match = SOCKET_RESOURCE.fullmatch(resource_name.strip())
+    if match is None:
+        raise ValueError(f"{resource_name} is not a TCPIP::host::port::SOCKET resource")
+    return match.group("host"), int(match.group("port"))
+
+
+def expects_reply(message: str) -> bool:
+    """ True when a (possibly ';'-joined) message holds a query, which makes the instrument send one reply line. """
+    return any(part.strip().split(None, 1)[0].endswith('?') for part in message.split(';') if part.strip())
+
+
+class SocketResource:
+    """
+    pyvisa-like resource over a raw TCP socket.
+
+    Replies are matched to queries strictly in order: every message holding a query makes the instrument send one
+    line, and each read() takes the oldest reply still owed. When a read times out or the connection breaks, the
+    owed replies can no longer be matched (a late one would answer the next query), so the connection is dropped
+    and reopened on the next write.
+
+    Parameters:
+    resource_name (str): "TCPIP[n]::host::port::SOCKET".
+    timeout (int): Milliseconds to wait for a reply, also settable later through self.timeout like with pyvisa.
+    """
+
+    def __init__(self, resource_name: str, timeout: int = 2000):
+        self.resource_name = resource_name
+        self.timeout = timeout
+        self._address = parse_socket_resource(resource_name)
+        self._socket = None
+        self._buffer = b""
+        self._outstanding = 0  # replies the instrument still owes us
+        self._lock = threading.RLock()
+        self._connect()
+
+    def _connect(self):
+        self._socket = socket.create_connection(self._address, timeout=self.timeout / 1000)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _drop_connection(self):
+        # whatever is still owed or buffered belongs to earlier commands, start over on a fresh connection
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._buffer = b""
+        self._outstanding = 0
+
+    def _send(self, messages: list):
+        if self._socket is None:
+            self._connect()
+        try:
+            self._socket.sendall(b"".join(message.strip().encode("ascii") + b"\n" for message in messages))
+        except OSError:
+            self._drop_connection()
+            raise
+        self._outstanding += sum(expects_reply(message) for message in messages)
+
+    def _read_line(self) -> str:
+        self._socket.settimeout(self.timeout / 1000)
+        while b"\n" not in self._buffer:
+            try:
+                chunk = self._socket.recv(65536)
+            except socket.timeout:
+                self._drop_connection()
+                raise TimeoutError(f"{self.resource_name} did not reply within {self.timeout} ms") from None
+            except OSError:
+                self._drop_connection()
+                raise
+            if not chunk:
+                self._drop_connection()
+                raise ConnectionError(f"{self.resource_name} closed the connection")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode("ascii", "replace")
+
+    def write(self, command: str):
+        with self._lock:
+            self._send([command])
+        return len(command)
+
+    def read(self) -> str:
+        with self._lock:
+            if not self._outstanding:
+                raise TimeoutError(f"Read from {self.resource_name} without a pending query")
+            reply = self._read_line()
+            self._outstanding -= 1
+            return reply + "\n"
+
+    def query(self, command: str) -> str:
+        with self._lock:
+            self.write(command)
+            return self.read()
+
+    def query_pipelined(self, commands: list) -> list:
+        """
+        Sends all queries in one write and returns their replies in the same order.
+
+        Parameters:
+        commands (list): Messages that each hold at least one query.
+
+        Returns:
+        list: One reply line per command, with the "\\n" terminator like query().
+        """
+        with self._lock:
+            if self._outstanding:
+                raise RuntimeError(f"{self.resource_name} has unread replies, pipelining would mismatch them")
+            if not all(expects_reply(command) for command in commands):
+                raise ValueError("query_pipelined only takes queries, every command must produce a reply")
+            self._send(commands)
+            return [self.read() for _ in commands]
+
+    def close(self):
+        with self._lock:
+            self._drop_connection()
@@ -0,0 +1,122 @@
+import os
+import re
+import threading
+import time
+
+# "" selects the default NI-VISA backend, "@py" selects pyvisa-py, "path/to/visa.dll@ivi" a specific library,
+# "sim" the in-process simulator from dp832_simulator.py and "replay:FILE[,speed]" a trace from scpi_trace.py
+_backend = os.environ.get("DP832_VISA_BACKEND", "")
+_resource_manager = None
+_resource_manager_lock = threading.Lock()
+# every resource opened through open_resource() is recorded into a trace file here when set
+_trace_directory = os.environ.get("DP832_TRACE_DIR") or None
+
+
+def set_backend(backend: str):
+    """
+    Selects the VISA backend used by get_resource_manager().
+
+    Parameters:
+    backend (str): A pyvisa backend string, e.g. "" for NI-VISA or "@py" for pyvisa-py, "sim" for the simulator or
+    "replay:FILE[,speed]" to replay a recorded trace (speed 1 by default, 0 for no delays).
+
+    Raises:
+    RuntimeError: If the resource manager was already created with a different backend.
+    """
+    global _backend
+
+    with _resource_manager_lock:
+        if _resource_manager is not None and backend != _backend:
+            raise RuntimeError(f"VISA resource manager already created with backend '{_backend}'")
+        _backend = backend
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def get_resource_manager():
+    """
+    Returns the shared pyvisa ResourceManager, creating it on first use.
+
+    pyvisa itself is only imported here, so importing the driver modules does not load the VISA library.
+
+    Returns:
+    pyvisa.ResourceManager: The shared resource manager.
+    """
+    global _resource_manager
+
+    with _resource_manager_lock:
+        if _resource_manager is None:
+            if _backend == "sim":
+                import dp832_simulator
+
+                _resource_manager = dp832_simulator.SimulatedResourceManager()
+            elif _backend.startswith("replay:"):
+                import scpi_trace
+
+                path, speed = _backend[len("replay:"):], 1.0
+                if "," in path:
+                    path, speed = path.rsplit(",", 1)
+                _resource_manager = scpi_trace.ReplayResourceManager([path], float(speed))
+            else:
+                import pyvisa
+
+                _resource_manager = pyvisa.ResourceManager(_backend)
+        return _resource_manager
+
+
+def open_resource(resource_name: str, **kwargs):
+    """
+    Opens an instrument resource.
+
+    "TCPIP::host::port::SOCKET" resources go through the raw socket transport in socket_transport.py, which needs no
+    VISA library. Everything else is opened through the shared resource manager. With a trace directory set (see
+    set_trace_directory()) the resource is wrapped in a scpi_trace.RecordingResource.
+    """
+    import socket_transport
+
+    if socket_transport.is_socket_resource(resource_name) and not _backend.startswith("replay:"):
+        resource = socket_transport.SocketResource(resource_name, **kwargs)
+    else:
+        resource = get_resource_manager().open_resource(resource_name, **kwargs)
+
+    if _trace_directory is not None:
+        import scpi_trace
+
+        os.makedirs(_trace_directory, exist_ok=True)
+        file_name = f"{re.sub(r'[^A-Za-z0-9.]+', '_', resource_name)}-{time.strftime('%Y%m%d-%H%M%S')}.trace.gz"
+        resource = scpi_trace.RecordingResource(resource, os.path.join(_trace_directory, file_name), resource_name)
+    return resource
+
+
+def set_trace_directory(directory: str):
+    """
+    Records the traffic of every resource opened from now on into DIRECTORY/<resource>-<time>.trace.gz, for replay
+    with the "replay:FILE" backend. None stops recording new resources. Also set through $DP832_TRACE_DIR.
+    """
+    global _trace_directory
+
+    _trace_directory = directory
+
+
+def use_resource_manager(resource_manager):
+    """
+    Replaces the shared resource manager, e.g. with a dp832_simulator.SimulatedResourceManager set up by a script.
+
+    Parameters:
+    resource_manager: Anything with list_resources(), open_resource() and close().
+    """
+    global _resource_manager
+
+    with _resource_manager_lock:
+        _resource_manager = resource_manager
+
+
+def close_resource_manager():
+    global _resource_manager
+
+    with _resource_manager_lock:
+        if _resource_manager is not None:
+            _resource_manager.close()
+            _resource_manager = None
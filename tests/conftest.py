@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+import dp832  # noqa: E402
+import visa_backend  # noqa: E402
+from dp832_simulator import SimulatedDP832, SimulatorServer  # noqa: E402
+
+
+@pytest.fixture
+def instrument():
+    return SimulatedDP832()
+
+
+@pytest.fixture
+def server(instrument):
+    """ The simulated supply on a local socket, opened by the driver through the raw socket transport. """
+    with SimulatorServer(instrument) as simulator_server:
+        yield simulator_server
+
+
+@pytest.fixture(autouse=True)
+def _close_sessions():
+    yield
+    dp832.close_all_sessions()
+    visa_backend.set_trace_directory(None)
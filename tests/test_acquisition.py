@@ -0,0 +1,43 @@
+import queue
+import time
+
+import dp832
+from acquisition import AcquisitionEngine
+from rate_policy import AdaptiveRatePolicy
+
+
+def test_idle_channel_is_read_right_away_after_a_trip(instrument, server):
+    engine = AcquisitionEngine(server.resource_name, rate_policy=AdaptiveRatePolicy(min_rate=0.5, max_rate=20.0),
+                               settings_check_interval=None, protection_interval=0.05)
+    session = dp832.get_session(server.resource_name)
+    session.configure_channel_static([1], 5.0, 2.0)
+    session.configure_current_limit([1], 1.0)
+    session.set_ocp_state([1], "ON")
+    session.set_channel_output_state([1], "ON")
+
+    snapshots, events = queue.Queue(), queue.Queue()
+    engine.subscribe(1, lambda snapshot: snapshots.put((time.monotonic(), snapshot)))
+    engine.subscribe_events(events.put)
+    engine.enable_channel(1)
+    engine.start()
+    try:
+        # steady output, the channel backs off to the 0.5 Hz floor
+        deadline = time.monotonic() + 5
+        while engine.channel_rates()[1] > 0.5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert engine.channel_rates()[1] == 0.5
+
+        instrument.set_load(1, 1.0)
+        tripped = time.monotonic()
+        while True:
+            event = events.get(timeout=2)
+            if event.kind == "ocp":
+                break
+        while True:
+            received, snapshot = snapshots.get(timeout=2)
+            if snapshot.ocp_tripped:
+                break
+        assert received - tripped < 0.5
+        assert not snapshot.output_enabled
+    finally:
+        engine.stop()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+import dp832
+from async_dp832 import AsyncDP832
+from dp832_daemon import DP832Daemon
+
+
+def test_context_manager_and_calls(instrument, server):
+    async def main():
+        async with AsyncDP832(server.resource_name) as psu:
+            assert await psu.configure_channel_static([1, 2], 4.0, 0.5)
+            settings = await psu.get_channel_settings([1, 2])
+            results = await asyncio.gather(*(psu.measure_all([channel]) for channel in (1, 2, 3)))
+        return psu, settings, results
+
+    psu, settings, results = asyncio.run(main())
+    assert settings[2]["voltage"] == 4.0 and settings[2]["current"] == 0.5
+    assert [list(result) for result in results] == [[1], [2], [3]]
+    assert instrument.channels[1].voltage == 4.0
+
+    with pytest.raises(RuntimeError, match="not open"):
+        asyncio.run(psu.snapshot([1]))
+    # the shared session stays open for everyone else
+    assert not dp832.get_session(server.resource_name).closed
+
+
+def test_reopen_after_close(server):
+    async def main():
+        psu = AsyncDP832(server.resource_name)
+        async with psu:
+            await psu.snapshot([1])
+        async with psu:
+            return await psu.get_output_state([1])
+
+    assert asyncio.run(main()) == {"CH1": "OFF"}
+
+
+def test_stream_with_count(server):
+    async def main():
+        async with AsyncDP832(server.resource_name) as psu:
+            return [sample async for sample in psu.stream([1, 3], interval=0.01, count=3)]
+
+    samples = asyncio.run(main())
+    assert len(samples) == 3
+    assert all(set(sample) == {1, 3} and isinstance(sample[1], dp832.ChannelSnapshot) for sample in samples)
+
+
+def test_stream_stops_when_cancelled(server):
+    async def main():
+        samples = []
+        async with AsyncDP832(server.resource_name) as psu:
+            async def consume():
+                async for sample in psu.stream([2], interval=0.01):
+                    samples.append(sample)
+
+            task = asyncio.create_task(consume())
+            while len(samples) < 3:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            count = len(samples)
+            await asyncio.sleep(0.05)
+            assert len(samples) == count
+            # still usable after the cancelled stream
+            return await psu.snapshot([2])
+
+    assert asyncio.run(main())[2].channel == 2
+
+
+def test_calls_recover_after_the_connection_dropped(instrument, server):
+    async def main():
+        async with AsyncDP832(server.resource_name) as psu:
+            await psu.snapshot([1])
+            server.drop_connections()
+            with pytest.raises(OSError):
+                await psu.snapshot([1])
+            return await psu.configure_voltage([1], 1.5)
+
+    assert asyncio.run(main())
+    assert instrument.channels[1].voltage == 1.5
+
+
+def test_daemon_address(instrument, server):
+    async def main(address):
+        async with AsyncDP832(address) as psu:
+            assert await psu.configure_voltage([3], 2.5)
+            return await psu.snapshot([3])
+
+    with DP832Daemon(server.resource_name, port=0, protection_interval=None) as daemon:
+        snapshots = asyncio.run(main(daemon.address))
+    assert snapshots[3].channel == 3
+    assert instrument.channels[3].voltage == 2.5
@@ -0,0 +1,105 @@
+import math
+
+import pytest
+
+import channel_statistics
+from channel_statistics import ChannelStatistics, window_statistics
+from history import MeasurementHistory
+
+# uneven sample times over one hour, like adaptive polling produces
+TIMES = [0.0, 1.0, 1.5, 7.0, 60.0, 61.0, 600.0, 1800.0, 1800.5, 3599.0, 3600.0]
+
+
+def feed(statistics: ChannelStatistics, samples):
+    for sample in samples:
+        statistics.update(*sample)
+    return statistics
+
+
+def ramp(times=TIMES):
+    # current rises linearly from 0 to 1 A over the hour at a constant 10 V
+    return [(time, 10.0, time / 3600, 10.0 * time / 3600, "CV") for time in times]
+
+
+def test_trapezoid_is_exact_for_linear_signals():
+    statistics = feed(ChannelStatistics(max_gap=None), ramp())
+    assert statistics.charge_ah == pytest.approx(0.5)
+    assert statistics.energy_wh == pytest.approx(5.0)
+
+    summary = statistics.summary()
+    assert summary["duration_s"] == 3600.0
+    assert summary["current"]["mean"] == pytest.approx(0.5)
+    assert summary["current"]["min"] == 0.0 and summary["current"]["max"] == 1.0
+    assert summary["voltage"]["rms"] == pytest.approx(10.0)
+
+
+def test_time_weighting_and_regulation_modes():
+    statistics = feed(ChannelStatistics(), [
+        (0.0, 5.0, 1.0, 5.0, "CV"),
+        (1.0, 5.0, 1.0, 5.0, "CC"),
+        (4.0, 5.0, 1.0, 5.0, "CV"),
+        (5.0, 5.0, 1.0, 5.0, "CV"),
+    ])
+    # the interval after a sample counts towards that sample's mode
+    assert statistics.summary()["mode_time_s"] == {"CV": 2.0, "CC": 3.0, "UR": 0.0}
+
+
+def test_rms_of_a_step():
+    statistics = feed(ChannelStatistics(), [(0.0, 0.0, 0.0, 0.0, "CV"), (1.0, 0.0, 0.0, 0.0, "CV"),
+                                            (1.0, 2.0, 0.0, 0.0, "CV"), (2.0, 2.0, 0.0, 0.0, "CV")])
+    voltage = statistics.summary()["voltage"]
+    assert voltage["mean"] == pytest.approx(1.0)
+    assert voltage["rms"] == pytest.approx(math.sqrt(2.0))
+
+
+def test_gaps_are_not_bridged():
+    statistics = feed(ChannelStatistics(max_gap=10.0), [
+        (0.0, 1.0, 1.0, 1.0, "CV"), (2.0, 1.0, 1.0, 1.0, "CV"),
+        (100.0, 1.0, 1.0, 1.0, "CV"), (101.0, 1.0, 1.0, 1.0, "CV"),
+    ])
+    assert statistics.duration == 3.0
+    assert statistics.charge_ah == pytest.approx(3.0 / 3600)
+    assert statistics.samples == 4
+
+
+def test_single_sample_and_reset():
+    statistics = ChannelStatistics()
+    assert statistics.summary()["voltage"] is None
+    statistics.update(0.0, 3.0, -0.5, -1.5, "CV")
+    assert statistics.summary()["current"] == {"min": -0.5, "max": -0.5, "mean": -0.5, "rms": 0.5}
+
+    statistics.reset()
+    assert statistics.samples == 0 and statistics.energy_wh == 0.0
+
+
+@pytest.fixture(params=["plain", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "plain":
+        monkeypatch.setattr(channel_statistics, "numpy", None)
+    elif channel_statistics.numpy is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_window_statistics_match_the_running_statistics(backend):
+    samples = ramp() + [(3700.0, 10.0, 0.2, 2.0, "CC"), (3700.5, 10.0, 0.2, 2.0, "UR")]
+    # wraps around, so the window is two segments
+    history = MeasurementHistory(8)
+    for sample in samples:
+        history.append(*sample)
+    assert len(history.window()) == 2
+
+    expected = feed(ChannelStatistics(), samples[-8:]).summary()
+    result = window_statistics(history)
+    assert result["samples"] == expected["samples"] == 8
+    assert result["duration_s"] == pytest.approx(expected["duration_s"])
+    assert result["energy_wh"] == pytest.approx(expected["energy_wh"])
+    assert result["charge_ah"] == pytest.approx(expected["charge_ah"])
+    assert result["mode_time_s"] == pytest.approx(expected["mode_time_s"])
+    for name in channel_statistics.QUANTITIES:
+        assert result[name] == pytest.approx(expected[name])
+
+    part = window_statistics(history, 1800.0, 3600.0)
+    # the default max_gap leaves out the 1800.5 to 3599 s stretch
+    assert part["samples"] == 4 and part["duration_s"] == pytest.approx(1.5)
+    assert window_statistics(history, 5000.0)["voltage"] is None
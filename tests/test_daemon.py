@@ -0,0 +1,102 @@
+import queue
+import socket
+import time
+
+import pytest
+
+import dp832
+import dp832_daemon
+from dp832_daemon import DaemonSession, DP832Daemon, decode
+
+
+@pytest.fixture
+def daemon(server):
+    with DP832Daemon(server.resource_name, port=0, refresh_rate=20, protection_interval=0.05) as dp832_daemon:
+        yield dp832_daemon
+
+
+@pytest.fixture
+def client(daemon):
+    with DaemonSession(daemon.address, timeout=5.0) as session:
+        yield session
+
+
+def next_event(events: queue.Queue, kind: str, timeout: float = 5.0) -> dict:
+    while True:
+        message = events.get(timeout=timeout)
+        if message["event"] == kind:
+            return message
+
+
+def test_calls_round_trip(instrument, client):
+    assert client.configure_voltage([1, 2], 7.5)
+    assert instrument.channels[1].voltage == 7.5 and instrument.channels[2].voltage == 7.5
+
+    settings = client.get_channel_settings([1, 2])
+    assert set(settings) == {1, 2}
+    assert settings[2]["voltage"] == 7.5
+
+    snapshots = client.snapshot([1])
+    assert isinstance(snapshots[1], dp832.ChannelSnapshot)
+    assert client.query("*IDN?") == instrument.idn
+
+
+def test_errors_come_back_as_runtime_errors(client):
+    with pytest.raises(RuntimeError, match="Unknown method"):
+        client.call("reboot")
+
+
+def test_get_session_returns_a_daemon_session(daemon, client):
+    session = dp832.get_session(daemon.address)
+    assert isinstance(session, DaemonSession)
+    assert session.get_output_state([3]) == client.get_output_state([3])
+
+
+def test_subscribers_receive_snapshots_of_their_channels(client):
+    events = queue.Queue()
+    client.add_event_handler(events.put)
+    assert client.subscribe([2]) == [2]
+
+    snapshot = next_event(events, "snapshot")
+    assert snapshot["snapshot"]["channel"] == 2
+
+
+def test_protection_trip_is_pushed(instrument, client):
+    client.configure_channel_static([1], 5.0, 2.0)
+    client.configure_current_limit([1], 1.0)
+    client.set_ocp_state([1], "ON")
+    client.set_channel_output_state([1], "ON")
+
+    events = queue.Queue()
+    client.add_event_handler(events.put)
+    client.subscribe([1])
+    instrument.set_load(1, 1.0)
+
+    while True:
+        event = next_event(events, "protection")
+        protection_event = decode(event["protection"])
+        if protection_event.kind == "ocp":
+            break
+    assert protection_event.channel == 1 and protection_event.value is True
+
+
+def test_client_that_stops_reading_is_disconnected(monkeypatch):
+    monkeypatch.setattr(dp832_daemon, "CLIENT_SEND_TIMEOUT", 0.2)
+    daemon_side, client_side = socket.socketpair()
+    client = dp832_daemon._Client(daemon_side)
+    try:
+        # the writer gets stuck in sendall() and the queue fills up with snapshots
+        payload = {"event": "snapshot", "padding": "x" * 65536}
+        for _ in range(dp832_daemon.CLIENT_QUEUE_SIZE + 20):
+            client.send(payload, droppable=True)
+        assert client.dropped > 0
+
+        start = time.monotonic()
+        client.send({"event": "protection"})
+        assert time.monotonic() - start < 1.0
+        assert client.disconnected
+        client.writer.join(1.0)
+        assert not client.writer.is_alive()
+    finally:
+        client_side.close()
+
@@ -0,0 +1,67 @@
+import pytest
+
+import dp832
+from dp832_simulator import SimulatedDP832, SimulatorServer
+from fleet import Fleet
+
+
+@pytest.fixture
+def second_instrument():
+    return SimulatedDP832(serial="DP8SIM0000002")
+
+
+@pytest.fixture
+def second_server(second_instrument):
+    with SimulatorServer(second_instrument) as simulator_server:
+        yield simulator_server
+
+
+@pytest.fixture
+def fleet(server, second_server):
+    with Fleet([server.resource_name, second_server.resource_name]) as devices:
+        yield devices
+
+
+def test_operations_fan_out(instrument, second_instrument, server, second_server, fleet):
+    report = fleet.configure_voltage([1], 5.0)
+    assert report.ok and set(report.results) == {server.resource_name, second_server.resource_name}
+    assert instrument.channels[1].voltage == 5.0 and second_instrument.channels[1].voltage == 5.0
+
+    idns = fleet.each(lambda session: session.query("*IDN?")).values
+    assert idns == {server.resource_name: instrument.idn, second_server.resource_name: second_instrument.idn}
+
+
+def test_supplies_run_in_parallel(instrument, second_instrument, fleet):
+    fleet.open()
+    instrument.transfer_latency = second_instrument.transfer_latency = 0.3
+    report = fleet.snapshot([1])
+    assert report.ok
+    assert report.elapsed < 0.5
+
+
+def test_unknown_resource_is_an_error_result(server, fleet):
+    report = fleet.snapshot([1], resources=[server.resource_name, "TCPIP0::10.0.0.1::5555::SOCKET"])
+    assert report.results[server.resource_name].ok
+    assert "not part of the fleet" in report.failed["TCPIP0::10.0.0.1::5555::SOCKET"].error
+
+
+def test_unreachable_supply_fails_alone(server):
+    unreachable = "TCPIP0::127.0.0.1::1::SOCKET"
+    with Fleet([server.resource_name, unreachable]) as devices:
+        report = devices.measure_all([1])
+    assert list(report.failed) == [unreachable]
+    assert report.results[server.resource_name].value[1]["voltage"] == 0.0
+
+
+def test_rejected_setting_is_not_ok(fleet):
+    report = fleet.configure_voltage([3], 9.0)
+    assert not report.ok and len(report.failed) == 2
+
+
+def test_close_keeps_sessions_opened_by_others(server, second_server):
+    shared = dp832.get_session(server.resource_name)
+    with Fleet([server.resource_name, second_server.resource_name]) as devices:
+        assert devices.open().ok
+    assert not shared.closed
+    assert dp832.get_session(server.resource_name) is shared
+    assert not dp832.has_session(second_server.resource_name)
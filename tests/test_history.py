@@ -0,0 +1,83 @@
+import pytest
+
+from dp832 import ChannelSnapshot
+from history import MeasurementHistory
+
+
+def filled(capacity: int, samples: int) -> MeasurementHistory:
+    history = MeasurementHistory(capacity)
+    for index in range(samples):
+        history.append(float(index), index / 10, index / 100, index / 1000, "CC" if index % 2 else "CV")
+    return history
+
+
+def timestamps(segments: list) -> list:
+    return [timestamp for segment in segments for timestamp in segment.timestamps]
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        MeasurementHistory(0)
+
+
+def test_before_wraparound():
+    history = filled(5, 3)
+    assert len(history) == 3
+    assert timestamps(history.window()) == [0.0, 1.0, 2.0]
+    assert len(history.window()) == 1
+    assert history.latest() == (2.0, 0.2, 0.02, 0.002, "CV")
+
+
+def test_wraparound_keeps_the_newest_samples():
+    history = filled(5, 13)
+    assert len(history) == 5
+    assert history.latest()[0] == 12.0
+
+    segments = history.window()
+    # the oldest sample sits at physical index 3, so the full window spans the end of the storage
+    assert [len(segment.timestamps) for segment in segments] == [2, 3]
+    assert timestamps(segments) == [8.0, 9.0, 10.0, 11.0, 12.0]
+    assert [value for segment in segments for value in segment.voltage] == pytest.approx([0.8, 0.9, 1.0, 1.1, 1.2])
+    assert [mode for segment in segments for mode in segment.mode] == [0, 1, 0, 1, 0]
+
+
+def test_window_bounds_are_inclusive():
+    history = filled(5, 13)
+    assert timestamps(history.window(9.0, 11.0)) == [9.0, 10.0, 11.0]
+    assert timestamps(history.window(9.5, 10.5)) == [10.0]
+    assert timestamps(history.window(start_time=10.0)) == [10.0, 11.0, 12.0]
+    assert timestamps(history.window(end_time=8.0)) == [8.0]
+    # within one side of the wrap point a window is a single segment
+    assert len(history.window(10.0, 12.0)) == 1
+    assert history.window(12.5) == []
+    assert history.window(0.0, 7.0) == []
+    assert history.window(11.0, 9.0) == []
+
+
+def test_equal_timestamps():
+    history = MeasurementHistory(4)
+    for voltage in (1.0, 2.0, 3.0):
+        history.append(5.0, voltage, 0.0, 0.0, "CV")
+    history.append(6.0, 4.0, 0.0, 0.0, "CV")
+    assert [value for segment in history.window(5.0, 5.0) for value in segment.voltage] == [1.0, 2.0, 3.0]
+
+
+def test_views_are_overwritten_after_wraparound():
+    history = filled(3, 3)
+    (segment,) = history.window()
+    history.append(3.0, 0.0, 0.0, 0.0, "CV")
+    assert segment.timestamps[0] == 3.0
+
+
+def test_snapshots_clear_and_unknown_modes():
+    history = MeasurementHistory(3)
+    assert history.latest() is None
+    history.append_snapshot(ChannelSnapshot(1, 5.0, 0.5, 2.5, "UR", True, False, False), 1.0)
+    assert history.latest() == (1.0, 5.0, 0.5, 2.5, "UR")
+    history.append(2.0, 0.0, 0.0, 0.0, "??")
+    assert history.latest()[4] == "??"
+
+    history.clear()
+    assert len(history) == 0 and history.window() == []
+    history.append(3.0, 1.0, 0.0, 0.0, "CV")
+    assert timestamps(history.window()) == [3.0]
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import CommandMetrics, InstrumentedResource
+from socket_transport import SocketResource
+
+
+@pytest.fixture
+def registry():
+    return CommandMetrics()
+
+
+@pytest.fixture
+def resource(server, registry):
+    resource = InstrumentedResource(SocketResource(server.resource_name, timeout=500), "psu", registry)
+    yield resource
+    resource.close()
+
+
+def series(registry, **filters) -> dict:
+    return {(entry["command"], entry["caller"]): entry for entry in registry.snapshot(**filters)}
+
+
+def test_command_key():
+    assert metrics.command_key(":MEAS:ALL? CH1") == ":MEAS:ALL?"
+    assert metrics.command_key(":MEAS:ALL? CH1;:OUTP? CH1;:MEAS:ALL? CH2") == ":MEAS:ALL?;:OUTP?"
+    assert metrics.command_key("  ") == ""
+
+
+def test_every_transfer_is_recorded(instrument, resource, registry):
+    resource.write(":APPL CH1,1")
+    resource.write("*IDN?")
+    assert resource.read().strip() == instrument.idn
+    with metrics.caller("refresh"):
+        resource.query(":MEAS:ALL? CH1;:OUTP? CH1")
+        resource.query_pipelined([":APPL? CH1", ":APPL? CH2"])
+
+    recorded = series(registry, instrument="psu")
+    assert set(recorded) == {(":APPL", "user"), ("*IDN?", "user"), (metrics.READ_COMMAND, "user"),
+                             (":MEAS:ALL?;:OUTP?", "refresh"), (":APPL?", "refresh")}
+    assert all(entry["count"] == 1 and entry["errors"] == 0 for entry in recorded.values())
+    assert recorded[(":APPL?", "refresh")]["buckets"][-1] == ["+Inf", 1]
+
+
+def test_errors_are_counted(instrument, resource, registry):
+    instrument.transfer_latency = 0.3
+    resource.timeout = 100
+    assert resource.resource.timeout == 100
+    with pytest.raises(TimeoutError):
+        resource.query("*IDN?")
+
+    entry = series(registry)[("*IDN?", "user")]
+    assert entry["count"] == 1 and entry["errors"] == 1
+
+
+def test_disabled_registry_records_nothing(resource, registry):
+    registry.enabled = False
+    resource.query("*IDN?")
+    assert registry.snapshot() == []
+
+
+def test_exports(registry):
+    registry.record("psu", ":MEAS:ALL?", "refresh", 0.003)
+    registry.record("psu", ":MEAS:ALL?", "refresh", 0.03, error=True)
+    registry.record("other", "*IDN?", "user", 0.0001)
+
+    entry = series(registry, instrument="psu")[(":MEAS:ALL?", "refresh")]
+    assert entry["count"] == 2 and entry["errors"] == 1 and entry["max_s"] == 0.03
+    assert entry["mean_s"] == pytest.approx(0.0165)
+    assert dict((str(bound), count) for bound, count in entry["buckets"])["0.005"] == 1
+    assert series(registry, caller_name="user").keys() == {("*IDN?", "user")}
+
+    assert len(json.loads(registry.to_json())["series"]) == 2
+    text = registry.to_prometheus()
+    assert 'dp832_scpi_commands_total{instrument="psu",command=":MEAS:ALL?",caller="refresh"} 2' in text
+    assert 'dp832_scpi_errors_total{instrument="psu",command=":MEAS:ALL?",caller="refresh"} 1' in text
+    assert 'dp832_scpi_latency_seconds_bucket{instrument="psu",command=":MEAS:ALL?",caller="refresh",le="+Inf"} 2' \
+        in text
+
+    registry.reset()
+    assert registry.snapshot() == []
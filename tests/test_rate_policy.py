@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from dp832 import ChannelSnapshot
+from rate_policy import AdaptiveRatePolicy
+
+SETTINGS = {"voltage": 5.0, "current": 1.0, "voltage_limit": 6.0, "current_limit": 2.0, "ovp_enabled": False,
+            "ocp_enabled": False, "output": True}
+
+
+def reading(voltage=5.0, current=0.1, mode="CV", output=True, channel=1):
+    return ChannelSnapshot(channel, voltage, current, voltage * current, mode, output, False, False)
+
+
+@pytest.fixture
+def policy():
+    return AdaptiveRatePolicy(min_rate=0.5, max_rate=8.0, backoff=0.5)
+
+
+def test_steady_channel_backs_off_to_the_minimum(policy):
+    rates = [policy.update(reading(), SETTINGS) for _ in range(6)]
+    assert rates == [4.0, 2.0, 1.0, 0.5, 0.5, 0.5]
+    assert policy.reasons[1] == "steady"
+
+
+def test_output_off_sits_at_the_minimum(policy):
+    assert policy.update(reading(0.0, 0.0, output=False)) == 0.5
+    assert policy.reasons[1] == "off"
+
+
+@pytest.mark.parametrize("change, reason", [
+    (dict(output=False), "output switched"),
+    (dict(mode="CC"), "CV/CC transition"),
+    (dict(voltage=5.5), "changing"),
+    (dict(current=0.2), "changing"),
+])
+def test_activity_goes_to_the_maximum(policy, change, reason):
+    for _ in range(5):
+        policy.update(reading(), SETTINGS)
+    assert policy.rate(1) == 0.5
+
+    assert policy.update(reading(**change), SETTINGS) == 8.0
+    assert policy.reasons[1] == reason
+
+
+def test_small_changes_stay_steady(policy):
+    policy.update(reading(), SETTINGS)
+    assert policy.update(reading(voltage=5.005, current=0.103), SETTINGS) == 2.0
+
+
+def test_near_limits(policy):
+    policy.update(reading(current=0.95), SETTINGS)
+    assert policy.update(reading(current=0.95), SETTINGS) == 8.0
+    assert policy.reasons[1] == "near current setpoint"
+
+    # OVP/OCP levels only count when enabled
+    policy = AdaptiveRatePolicy(min_rate=0.5, max_rate=8.0)
+    policy.update(reading(voltage=5.9), SETTINGS)
+    assert policy.update(reading(voltage=5.9), SETTINGS) < 8.0
+    assert policy.update(reading(voltage=5.9), dict(SETTINGS, ovp_enabled=True)) == 8.0
+    assert policy.reasons[1] == "near OVP"
+
+
+def test_reset_and_limits(policy):
+    for _ in range(5):
+        policy.update(reading(), SETTINGS)
+    policy.reset(1)
+    assert policy.rate(1) == 8.0 and policy.reasons[1] == "start"
+    # the history is gone too, the next reading can't count as a change
+    assert policy.update(reading(voltage=1.0), SETTINGS) == 4.0
+
+    policy.set_limits(2, 1.0, 2.0)
+    assert policy.rate(2) == 2.0
+    assert AdaptiveRatePolicy(channel_limits={3: (0.1, 1.0)}).rate(3) == 1.0
+    with pytest.raises(ValueError):
+        policy.set_limits(1, 2.0, 1.0)
+
+
+def test_reset_from_another_thread(policy):
+    # the protection monitor resets channels while the acquisition thread updates them
+    stop = threading.Event()
+    errors = []
+
+    def reset_loop():
+        try:
+            while not stop.is_set():
+                policy.reset(1)
+        except Exception as e:  # pragma: no cover - what the lock prevents
+            errors.append(e)
+
+    thread = threading.Thread(target=reset_loop)
+    thread.start()
+    try:
+        for index in range(20000):
+            rate = policy.update(reading(voltage=5.0 + (index % 2)), SETTINGS)
+            assert 0.5 <= rate <= 8.0
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from scheduler import DeadlineScheduler
+
+
+def test_faster_period_applies_on_the_next_deadline():
+    scheduler = DeadlineScheduler(2.0)
+    assert scheduler.wait()
+    start = time.monotonic()
+    scheduler.period = 0.05
+    assert scheduler.wait()
+    assert time.monotonic() - start < 0.5
+
+
+def test_period_change_reanchors_on_the_last_tick():
+    scheduler = DeadlineScheduler(0.05)
+    assert scheduler.wait()
+    tick = time.monotonic()
+    scheduler.period = 0.3
+    assert scheduler.wait()
+    assert 0.25 <= time.monotonic() - tick < 0.45
+
+    # a new period whose deadline already passed ticks right away instead of skipping
+    time.sleep(0.1)
+    scheduler.period = 0.05
+    start = time.monotonic()
+    assert scheduler.wait()
+    assert time.monotonic() - start < 0.03
+    assert scheduler.stats()["missed"] == 0
+
+
+def test_deadlines_do_not_drift():
+    scheduler = DeadlineScheduler(0.02)
+    assert scheduler.wait()
+    start = time.monotonic()
+    for _ in range(10):
+        assert scheduler.wait()
+        time.sleep(0.01)  # work in the tick doesn't stretch the period
+    assert 0.2 <= time.monotonic() - start < 0.26
+    stats = scheduler.stats()
+    assert stats["ticks"] == 11 and stats["missed"] == 0 and stats["overruns"] == 0
+
+
+def test_overrun_skips_passed_deadlines():
+    scheduler = DeadlineScheduler(0.02)
+    assert scheduler.wait()
+    start = time.monotonic()
+    time.sleep(0.075)  # runs past three deadlines
+    assert scheduler.wait()
+    # no burst of catch-up ticks: the next one is back on the grid
+    assert scheduler.wait()
+    assert time.monotonic() - start < 0.11
+
+    stats = scheduler.stats()
+    assert stats["missed"] == 2
+    assert stats["overruns"] == 1
+    assert stats["ticks"] == 3
+
+
+def test_wait_returns_false_when_woken_and_keeps_the_deadline():
+    scheduler = DeadlineScheduler(0.2)
+    assert scheduler.wait()
+    event = threading.Event()
+    threading.Timer(0.05, event.set).start()
+    start = time.monotonic()
+    assert not scheduler.wait(event)
+    assert time.monotonic() - start < 0.15
+
+    event.clear()
+    assert scheduler.wait(event)
+    assert 0.18 <= time.monotonic() - start < 0.3
+    assert scheduler.stats()["ticks"] == 2
+
+
+def test_reset_ticks_immediately():
+    scheduler = DeadlineScheduler(5.0)
+    assert scheduler.wait()
+    scheduler.reset()
+    start = time.monotonic()
+    assert scheduler.wait()
+    assert time.monotonic() - start < 0.05
+
+
+def test_wait_until_and_skip():
+    scheduler = DeadlineScheduler()
+    start = time.monotonic()
+    assert scheduler.wait_until(start + 0.05)
+    assert time.monotonic() - start >= 0.05
+    # a deadline in the past ticks right away and counts its lateness
+    assert scheduler.wait_until(start)
+    scheduler.skip(2)
+
+    stats = scheduler.stats()
+    assert stats["ticks"] == 2 and stats["missed"] == 2
+    assert stats["max_lateness_s"] >= 0.05
+    scheduler.reset_stats()
+    assert scheduler.stats()["ticks"] == 0
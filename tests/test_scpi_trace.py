@@ -0,0 +1,120 @@
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dp832
+import scpi_trace
+import visa_backend
+
+
+def exercise(session: dp832.DP832Session) -> list:
+    """ A bit of everything the driver sends: batched settings, pipelined queries, snapshots, shadow reads. """
+    return [
+        session.configure_channel_static([1, 2], 5.0, 0.5),
+        session.set_channel_output_state([1], "ON"),
+        session.get_channel_settings([1, 2, 3]),
+        session.measure_all([1, 2, 3]),
+        session.get_ovp_status([1, 2]),
+        session.snapshot([1, 2, 3]),
+        session.write_batch([":APPL CH3,2.5"]),
+        session.refresh_shadow(),
+        session.snapshot([1, 3]),
+    ]
+
+
+@pytest.fixture
+def recording(server, tmp_path):
+    """ Runs exercise() against the simulator with recording on, returns (trace path, results). """
+    server.instrument.set_load(1, 20.0)
+    visa_backend.set_trace_directory(str(tmp_path))
+    session = dp832.get_session(server.resource_name)
+    results = exercise(session)
+    dp832.close_session(server.resource_name)
+    paths = glob.glob(os.path.join(str(tmp_path), "*.trace.gz"))
+    assert len(paths) == 1
+    return paths[0], results
+
+
+def test_strict_replay_reproduces_the_recorded_session(server, recording):
+    path, results = recording
+    resource = scpi_trace.ReplayResource(path, speed=0, strict=True)
+    assert resource.resource_name == server.resource_name
+
+    with dp832.DP832Session(resource.resource_name, resource=resource, instrumented=False) as session:
+        assert exercise(session) == results
+    assert resource.remaining == 0
+
+
+def test_strict_replay_rejects_a_different_sequence(recording):
+    resource = scpi_trace.ReplayResource(recording[0], speed=0, strict=True)
+    with dp832.DP832Session(resource.resource_name, resource=resource, instrumented=False) as session:
+        with pytest.raises(scpi_trace.ReplayMismatch):
+            session.snapshot([1, 2, 3])
+
+
+def test_lenient_replay_answers_out_of_order(recording):
+    path, results = recording
+    manager = scpi_trace.ReplayResourceManager([path], speed=0)
+    (resource_name,) = manager.list_resources()
+
+    with dp832.DP832Session(resource_name, resource=manager.open_resource(resource_name)) as session:
+        # the recorded snapshot of 1 and 3 was the last one, it repeats when the occurrences run out
+        for _ in range(3):
+            assert session.snapshot([1, 3]) == results[-1]
+        assert session.measure_all([1, 2, 3]) == results[3]
+
+
+def test_replay_reproduces_recorded_errors(tmp_path):
+    class Failing:
+        resource_name = "SIM::FAILING"
+
+        def query(self, command):
+            raise TimeoutError("no reply")
+
+    path = str(tmp_path / "failing.trace")
+    recorder = scpi_trace.RecordingResource(Failing(), path)
+    with pytest.raises(TimeoutError):
+        recorder.query("*IDN?")
+    recorder.flush()
+
+    with pytest.raises(TimeoutError, match="no reply"):
+        scpi_trace.ReplayResource(path, speed=0).query("*IDN?")
+
+
+@pytest.mark.parametrize("name", ["killed.trace.gz", "killed.trace"])
+def test_trace_of_a_killed_process_is_readable(tmp_path, name):
+    path = str(tmp_path / name)
+    records = scpi_trace.FLUSH_RECORDS * 2 + 7
+    script = (
+        "import os, scpi_trace\n"
+        "from dp832_simulator import SimulatedDP832, SimulatedResourceManager\n"
+        "manager = SimulatedResourceManager({'SIM::DP832': SimulatedDP832()})\n"
+        f"recorder = scpi_trace.RecordingResource(manager.open_resource('SIM::DP832'), {path!r})\n"
+        f"for _ in range({records}):\n"
+        "    recorder.query('*IDN?')\n"
+        "os._exit(1)\n"
+    )
+    modules = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules")
+    subprocess.run([sys.executable, "-c", script], cwd=modules, check=False)
+
+    header, trace = scpi_trace.load_trace(path)
+    assert header["resource"] == "SIM::DP832"
+    # everything up to the last flush, the records after it may be lost
+    assert scpi_trace.FLUSH_RECORDS * 2 <= len(trace) <= records
+    assert all(record[2:4] == ["q", "*IDN?"] for record in trace)
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "torn.trace")
+    recorder = scpi_trace.RecordingResource(scpi_trace.ReplayResource(
+        ({"resource": "SIM"}, [[0, 0, "q", "*OPC?", "1"]] * 3), speed=0), path)
+    for _ in range(3):
+        recorder.query("*OPC?")
+    recorder.close()
+    with open(path, "a") as file:
+        file.write('[0.5,0.0,"q","*OP')
+
+    assert len(scpi_trace.load_trace(path)[1]) == 3
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+import sequence
+from dp832_simulator import SimulatedDP832
+from sequence import Sequence, check_points, timer_incompatibility
+
+
+@pytest.fixture
+def instrument():
+    return SimulatedDP832(timer_speed=100)
+
+
+@pytest.fixture
+def sent(instrument):
+    """ Every message the simulator received, in order. """
+    messages = []
+    transfer = instrument.transfer
+
+    def recording_transfer(message):
+        messages.append(message)
+        return transfer(message)
+
+    instrument.transfer = recording_transfer
+    return messages
+
+
+def test_check_points():
+    check_points(3, [(5.3, 3.2, 0), (0, 0, 1.5)])
+    with pytest.raises(ValueError, match="at least one point"):
+        check_points(1, [])
+    with pytest.raises(ValueError, match="CH3"):
+        check_points(3, [(1, 1, 1), (6, 1, 1)])
+    with pytest.raises(ValueError, match="A is outside"):
+        check_points(1, [(1, 3.5, 1)])
+    with pytest.raises(ValueError, match="negative dwell"):
+        check_points(2, [(1, 1, -1)])
+
+
+def test_out_of_range_points_fail_in_every_mode(server):
+    for mode in sequence.SEQUENCE_MODES:
+        with pytest.raises(ValueError):
+            Sequence(server.resource_name, 1, [(40.0, 1.0, 0.5)], mode=mode)
+
+
+def test_timer_incompatibility():
+    assert timer_incompatibility([(1, 1, 1), (2, 1, 99999)]) is None
+    assert timer_incompatibility([(1, 1, 1)], cycles=None) is None
+    assert "whole seconds" in timer_incompatibility([(1, 1, 1.5)])
+    assert "whole seconds" in timer_incompatibility([(1, 1, 0)])
+    assert "points" in timer_incompatibility([(1, 1, 1)] * (sequence.TIMER_GROUPS + 1))
+    assert "cycles" in timer_incompatibility([(1, 1, 1)], cycles=0)
+
+
+def test_auto_mode_falls_back_to_the_host(server):
+    run = Sequence(server.resource_name, 1, [(1, 1, 2), (2, 1, 0.5)])
+    assert run.mode == "host" and "point 1" in run.fallback_reason
+
+    run = Sequence(server.resource_name, 1, [(1, 1, 2), (2, 1, 1)])
+    assert run.mode == "timer" and run.fallback_reason is None
+
+    assert Sequence(server.resource_name, 1, [(1, 1, 2)], mode="host").mode == "host"
+    with pytest.raises(ValueError, match="timer"):
+        Sequence(server.resource_name, 1, [(1, 1, 0.5)], mode="timer")
+
+
+def test_upload_loads_the_timer_in_chunks(instrument, server, sent):
+    points = [(index / 10, 1.0, 1 + index) for index in range(100)]
+    run = Sequence(server.resource_name, 2, points, cycles=3, end_state="LAST")
+    assert run.upload()
+
+    channel = instrument.channels[2]
+    assert channel.timer_group_count == 100
+    assert channel.timer_cycles == 3 and channel.timer_end_state == "LAST"
+    assert channel.timer_points()[57] == (5.7, 1.0, 58)
+    assert sum(":TIM:PARA" in message for message in sent) == 2
+
+
+def test_timer_run(instrument, server):
+    run = Sequence(server.resource_name, 1, [(1.0, 1.0, 1), (2.0, 1.0, 1)], cycles=2)
+    assert run.start()
+    assert run.is_running()
+    assert run.wait(timeout=5, poll_interval=0.01)
+
+    channel = instrument.channels[1]
+    assert not channel.output and channel.voltage == 2.0
+    assert not run.errors
+
+
+def test_host_run_steps_through_the_points(instrument, server, sent):
+    points = [(1.0, 0.5, 0.1), (2.0, 0.5, 0.1), (3.0, 0.5, 0.1)]
+    run = Sequence(server.resource_name, 3, points, cycles=2, mode="host")
+    assert run.start()
+    assert run.wait(timeout=5)
+
+    steps = [float(message.split(":APPL CH3,")[1].split(",")[0]) for message in sent if ":APPL CH3," in message]
+    assert steps == [1.0, 2.0, 3.0] * 2
+    assert not instrument.channels[3].output
+    assert not run.errors
+
+
+def test_host_run_rides_out_a_dropped_connection(instrument, server, sent):
+    points = [(1.0, 0.5, 0.1), (2.0, 0.5, 0.1)]
+    run = Sequence(server.resource_name, 1, points, end_state="LAST", mode="host")
+    assert run.start()
+    while not any(":APPL CH1," in message for message in sent):
+        time.sleep(0.005)
+    server.drop_connections()
+
+    assert run.wait(timeout=5)
+    assert not run.errors
+    assert instrument.channels[1].voltage == 2.0 and instrument.channels[1].output
+
+
+def test_failed_switch_off_is_reported(instrument, server):
+    transfer = instrument.transfer
+
+    def refusing_transfer(message):
+        if ":OUTP CH1,OFF" in message:
+            instrument.errors.append('-221,"Settings conflict"')
+        return transfer(message)
+
+    instrument.transfer = refusing_transfer
+    run = Sequence(server.resource_name, 1, [(1.0, 0.5, 0.05)], mode="host")
+    assert run.start()
+    assert run.wait(timeout=5)
+    assert run.errors and "Settings conflict" in run.errors[0]
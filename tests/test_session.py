@@ -0,0 +1,191 @@
+import pytest
+
+import dp832
+from socket_transport import SocketResource
+
+
+@pytest.fixture
+def session(server):
+    return dp832.get_session(server.resource_name)
+
+
+def test_get_session_shares_one_session(server, session):
+    assert dp832.get_session(server.resource_name) is session
+    assert dp832.configure_voltage(server.resource_name, [1], 2.0)
+    assert session.get_channel_settings([1])[1]["voltage"] == 2.0
+
+
+def test_session_recovers_after_the_connection_dropped(instrument, server, session):
+    session.get_channel_settings([1])
+    server.drop_connections()
+
+    with pytest.raises(OSError):
+        session.query("*IDN?")
+    assert not session.closed
+    assert session.query("*IDN?") == instrument.idn
+    assert dp832.get_session(server.resource_name) is session
+
+
+def test_session_on_a_passed_resource_keeps_it(instrument, server):
+    resource = SocketResource(server.resource_name, timeout=500)
+    with dp832.DP832Session(server.resource_name, resource=resource, instrumented=False) as session:
+        session.query("*IDN?")
+        server.drop_connections()
+        with pytest.raises(OSError):
+            session.query("*IDN?")
+        assert session.query("*IDN?") == instrument.idn
+
+
+def test_timeout_survives_a_reopen(server, session):
+    session._psu.timeout = 300
+    session.query("*IDN?")
+    server.drop_connections()
+    with pytest.raises(OSError):
+        session.query("*IDN?")
+    assert session._psu.timeout == 300
+
+
+def test_closed_session_raises_and_get_session_opens_a_new_one(instrument, server, session):
+    dp832.close_session(server.resource_name)
+    assert session.closed
+    with pytest.raises(ConnectionError, match="closed"):
+        session.query("*IDN?")
+
+    reopened = dp832.get_session(server.resource_name)
+    assert reopened is not session
+    assert reopened.query("*IDN?") == instrument.idn
+
+
+def test_snapshot_reads_alarms_only_for_flagged_channels(instrument, session):
+    session.configure_channel_static([1], 5.0, 2.0)
+    session.configure_current_limit([1], 1.0)
+    session.set_ocp_state([1], "ON")
+    session.set_channel_output_state([1, 2], "ON")
+
+    transfers = instrument.transfer_count
+    snapshots = session.snapshot([1, 2, 3])
+    assert instrument.transfer_count - transfers == 1
+    assert snapshots[1].output_enabled and not snapshots[1].ocp_tripped
+
+    instrument.set_load(1, 1.0)
+    transfers = instrument.transfer_count
+    snapshots = session.snapshot([1, 2, 3])
+    assert instrument.transfer_count - transfers == 2
+    assert snapshots[1].ocp_tripped and not snapshots[1].ovp_tripped and not snapshots[1].output_enabled
+    assert not snapshots[2].ocp_tripped and snapshots[2].output_enabled
+
+    # the trip is known now, the condition register alone keeps it reported
+    transfers = instrument.transfer_count
+    assert session.snapshot([1, 2, 3])[1].ocp_tripped
+    assert instrument.transfer_count - transfers == 1
+
+
+def test_parse_snapshot_reply():
+    reply = "1.000,0.500,0.500;CC;ON;0.000,0.000,0.000;CV;OFF;4"
+    snapshots, flagged = dp832.parse_snapshot_reply([1, 2], reply, {2: (True, False)})
+
+    assert flagged == {2}
+    assert snapshots[1] == dp832.ChannelSnapshot(1, 1.0, 0.5, 0.5, "CC", True, False, False)
+    assert snapshots[2].ovp_tripped and not snapshots[2].output_enabled
+
+    with pytest.raises(ValueError):
+        dp832.parse_snapshot_reply([1, 2], "1.000,0.500,0.500;CC;ON;0")
+
+
+def test_batched_writes_keep_the_status_events(instrument, session):
+    session.configure_channel_static([1], 5.0, 2.0)
+    session.configure_current_limit([1], 1.0)
+    session.set_ocp_state([1], "ON")
+    session.set_channel_output_state([1, 2], "ON")
+    session.read_status_summary()
+
+    instrument.set_load(1, 1.0)
+    assert session.configure_voltage([2], 3.0)
+    assert session.write_batch([":APPL CH3,1"])
+
+    summary = session.read_status_summary()
+    assert summary.questionable_event == {1}
+    assert 1 in summary.operation_event
+
+
+def test_errors_left_by_raw_queries_are_not_blamed_on_the_next_batch(instrument, session):
+    assert session.configure_voltage([1], 1.0)
+    transfers = instrument.transfer_count
+    assert session.configure_voltage([1], 2.0)
+    assert instrument.transfer_count - transfers == 1
+
+    session.query(":BOGUS?")
+    assert instrument.errors
+    assert session.configure_voltage([1], 3.0)
+    assert not instrument.errors
+
+    result = session.write_batch([":APPL CH3,9"])
+    assert not result and "-224" in result.errors[0]
+
+
+def test_parse_snapshot_reply():
+    reply = "1.000,0.500,0.500;CC;ON;0.000,0.000,0.000;CV;OFF;4"
+    snapshots, flagged = dp832.parse_snapshot_reply([1, 2], reply, {2: (True, False)})
+
+    assert flagged == {2}
+    assert snapshots[1] == dp832.ChannelSnapshot(1, 1.0, 0.5, 0.5, "CC", True, False, False)
+    assert snapshots[2].ovp_tripped and not snapshots[2].output_enabled
+
+    with pytest.raises(ValueError):
+        dp832.parse_snapshot_reply([1, 2], "1.000,0.500,0.500;CC;ON;0")
+
+
+def test_refresh_shadow_reports_write_batch_changes(session):
+    session.get_channel_settings([1, 2, 3])
+
+    assert session.write_batch([":APPL CH2,4"])
+    assert session.refresh_shadow() == {2: {"voltage": (0.0, 4.0)}}
+    assert session.refresh_shadow() == {}
+
+
+def test_stale_channel_is_reread_and_still_reported(session):
+    session.get_channel_settings([1, 2, 3])
+    session.write_batch([":APPL CH1,3", ":OUTP:OVP CH1,ON"])
+
+    settings = session.get_channel_settings([1])[1]
+    assert settings["voltage"] == 3.0 and settings["ovp_enabled"]
+    assert session.refresh_shadow() == {1: {"voltage": (0.0, 3.0), "ovp_enabled": (False, True)}}
+
+
+def test_change_reverted_in_between_is_not_reported(session):
+    session.get_channel_settings([1, 2, 3])
+    session.write_batch([":APPL CH3,2"])
+    session.get_channel_settings([3])
+    session.write_batch([":APPL CH3,0"])
+
+    assert session.refresh_shadow() == {}
+
+
+def test_failed_batch_leaves_the_written_channels_stale(session):
+    session.get_channel_settings([1, 2, 3])
+
+    # a batch the instrument rejects half of: channel 1 changes, the model must not keep the old value
+    assert not session.write_batch([":APPL CH1,2", ":APPL CH3,9"])
+    assert session.get_channel_settings([1])[1]["voltage"] == 2.0
+
+
+def test_settings_come_from_the_model(instrument, session):
+    session.get_channel_settings([1, 2, 3])
+    transfers = instrument.transfer_count
+    assert session.get_channel_settings([1, 2, 3])[3]["voltage_limit"] == instrument.channels[3].ovp_value
+    assert session.get_output_state([1, 2]) == {"CH1": "OFF", "CH2": "OFF"}
+    assert instrument.transfer_count == transfers
+
+    # our own writes update the model without a re-read
+    assert session.configure_voltage([2], 6.0)
+    transfers = instrument.transfer_count
+    assert session.get_channel_settings([2])[2]["voltage"] == 6.0
+    assert instrument.transfer_count == transfers
+
+
+def test_front_panel_changes_are_found_by_refresh_shadow(instrument, session):
+    session.get_channel_settings([1, 2, 3])
+    instrument.transfer(":OUTP:OCP:VAL CH3,1.5;:OUTP CH3,ON")
+
+    assert session.refresh_shadow([3]) == {3: {"current_limit": (3.2, 1.5), "output": (False, True)}}
+    assert session.get_channel_settings([3])[3]["current_limit"] == 1.5
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from socket_transport import SocketResource
+
+
+@pytest.fixture
+def resource(server):
+    resource = SocketResource(server.resource_name, timeout=200)
+    yield resource
+    resource.close()
+
+
+def test_pipelined_replies_match_their_queries(instrument, resource):
+    for channel, voltage in ((1, 1.5), (2, 2.5), (3, 3.5)):
+        resource.write(f":APPL CH{channel},{voltage}")
+
+    commands = [f":APPL? CH{channel}" if index % 2 else "*IDN?" for index in range(30) for channel in (1, 2, 3)]
+    replies = resource.query_pipelined(commands)
+
+    assert len(replies) == len(commands)
+    for command, reply in zip(commands, replies):
+        if command == "*IDN?":
+            assert reply == instrument.idn + "\n"
+        else:
+            channel = int(command[-1])
+            assert reply.startswith(f"CH{channel}:")
+            assert float(reply.split(',')[1]) == channel + 0.5
+
+
+def test_joined_queries_come_back_as_one_reply(resource):
+    assert resource.query(":APPL CH1,2;:APPL? CH1;*OPC?").strip() == "CH1:30V/3A,2.000,0.000;1"
+
+
+def test_timed_out_reply_does_not_answer_the_next_query(instrument, resource):
+    instrument.transfer_latency = 0.4
+    with pytest.raises(TimeoutError):
+        resource.query(":APPL? CH1")
+    instrument.transfer_latency = 0.0
+    # by now the late reply to the timed out query was sent, it must not be taken for the next one's
+    time.sleep(0.5)
+
+    assert resource.query("*IDN?").strip() == instrument.idn
+    assert [reply.strip() for reply in resource.query_pipelined([":OUTP? CH2", "*OPC?"])] == ["OFF", "1"]
+
+
+def test_reconnects_after_the_connection_dropped(instrument, server, resource):
+    assert resource.query("*IDN?").strip() == instrument.idn
+    server.drop_connections()
+
+    with pytest.raises(OSError):
+        resource.query("*IDN?")
+    assert resource.query("*IDN?").strip() == instrument.idn
+
+
+def test_read_without_a_query_raises(resource):
+    with pytest.raises(TimeoutError):
+        resource.read()